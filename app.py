@@ -3,10 +3,26 @@ Flask Web Application for Python Interpreter
 Provides a web interface to write and execute Python code
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, g, has_request_context
 from python_interpreter import PythonInterpreter
+from spotify_stream import SpotifyStatusHub
+import assets
+import http_cache
+import wire_format
+import data_viewer
+import inspector
+import dataflow
+import persistent_cache
+import data_export
+import jobs
+import json
+import timings
+import bounded_output
+from workspace import Workspace, WorkspaceError, QuotaExceeded
+from journal import SessionJournal
+from hibernation import HibernationManager
 import ast
-import builtins as _builtins
+import weakref
 import secrets
 import os
 from datetime import datetime
@@ -16,18 +32,61 @@ import time
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(32)
+# orjson-backed jsonify() when orjson is installed
+app.json = wire_format.FastJSONProvider(app)
+
+# Serve hashed/precompressed bundles from static/dist when `python assets.py` has been run
+assets.init_app(app)
+# gzip/brotli for large JSON and HTML responses
+http_cache.init_app(app)
 
 # Use a single global interpreter instead of per-session (simpler and works better)
-global_interpreter = PythonInterpreter()
+global_interpreter = PythonInterpreter(workspace=Workspace(session_id='global'))
+
+# Journal executed cells so a restart can restore the session (INTERPRETER_JOURNAL=0 disables)
+if os.environ.get('INTERPRETER_JOURNAL', '1') != '0':
+    global_interpreter.attach_journal(
+        SessionJournal(os.path.join(global_interpreter.workspace.path, '.journal')))
+
+# Cache results of slow, pure cells (INTERPRETER_MEMO=1 enables; %memo on/off per session)
+if os.environ.get('INTERPRETER_MEMO', '0') == '1':
+    global_interpreter.enable_memo()
+
+# Idle sessions are written to disk and woken up by their next request
+hibernation = HibernationManager()
+hibernation.register(global_interpreter)
+hibernation.start()
 
 # Store interpreters per session (backup approach)
 interpreters = {}
 
+# Encoded history entries per interpreter, so re-fetching history only
+# encodes entries that are new or were replaced
+history_caches = weakref.WeakKeyDictionary()
+
+# Inspector results are cached per interpreter state tag
+object_inspector = inspector.Inspector()
+
+# Seconds between output pushes on /api/jobs/<id>/stream
+JOB_STREAM_INTERVAL = 0.25
+
+# Recent per-phase timings of executions, summarized by /api/metrics
+execution_timings = timings.TimingStats()
+
+# Seconds /api/interrupt waits for the interrupted cell to return its partial output
+INTERRUPT_WAIT = 2.0
+
 
 def get_interpreter():
     """Get or create an interpreter for the current session."""
     # For now, use a single global interpreter to avoid session issues
     # This means all users share the same interpreter, but it works reliably
+    # Restoring from the journal happens here, on first use after a restart
+    global_interpreter.ensure_recovered()
+    if has_request_context() and 'interpreter_in_use' not in g:
+        # Wakes a hibernated session; released again in _release_interpreter
+        hibernation.acquire(global_interpreter)
+        g.interpreter_in_use = global_interpreter
     return global_interpreter
     
     # Original per-session code (commented out for now):
@@ -40,7 +99,44 @@ def get_interpreter():
     # return interpreters[session_id]
 
 
+@app.before_request
+def _start_request_timer():
+    g.request_started_ns = time.perf_counter_ns()
+
+
+def _respond_timed(result, endpoint):
+    """
+    Respond with an execution result, adding the server's own phases to its
+    `timings`: `server` (request handling outside execute(), e.g. waking a
+    hibernated session) and, in the Server-Timing header only, `encode`.
+    """
+    spans = result.get('timings')
+    if spans is None:
+        return wire_format.respond(result)
+    elapsed = time.perf_counter_ns() - g.request_started_ns
+    spans['server'] = max(0, elapsed - spans['total'])
+    started = time.perf_counter_ns()
+    response = wire_format.respond(result)
+    spans = dict(spans, encode=time.perf_counter_ns() - started)
+    response.headers['Server-Timing'] = timings.server_timing(spans)
+    execution_timings.record(endpoint, spans)
+    return response
+
+
+@app.teardown_request
+def _release_interpreter(exc):
+    interpreter = g.pop('interpreter_in_use', None)
+    if interpreter is not None:
+        hibernation.release(interpreter)
+
+
+def _state_etag():
+    """ETag for versioned reads: interpreter state plus the negotiated wire format."""
+    return f"{get_interpreter().state_tag()}-{wire_format.negotiate()}"
+
+
 @app.route('/')
+@http_cache.conditional_page('advanced.html')
 def index():
     """Render the advanced poontHER version."""
     # If Spotify redirected here with an authorization code, exchange it for tokens.
@@ -79,24 +175,28 @@ def index():
 
 
 @app.route('/modern')
+@http_cache.conditional_page('modern.html')
 def modern_page():
     """Render the modern Tailwind CSS version."""
     return render_template('modern.html')
 
 
 @app.route('/simple')
+@http_cache.conditional_page('simple.html')
 def simple_page():
     """Render the simple interpreter page (working version)."""
     return render_template('simple.html')
 
 
 @app.route('/original')
+@http_cache.conditional_page('index.html')
 def original_page():
     """Render the original CodeMirror version."""
     return render_template('index.html')
 
 
 @app.route('/test')
+@http_cache.conditional_page('test.html')
 def test_page():
     """Render a simple test page."""
     return render_template('test.html')
@@ -110,7 +210,9 @@ def execute_code():
     Expected JSON:
         {
             "code": "Python code to execute",
-            "mode": "exec" or "eval" (optional, defaults to "exec")
+            "mode": "exec" or "eval" (optional, defaults to "exec"),
+            "supersede": bool (optional) - interrupt the running cell and drop
+                         queued runs instead of waiting behind them
         }
     
     Returns JSON:
@@ -120,7 +222,9 @@ def execute_code():
             "error": str,
             "result": any,
             "variables": dict,
-            "timestamp": str
+            "timestamp": str,
+            "timings": {phase: nanoseconds} - see timings.py; also sent
+                       (with response encoding) as a Server-Timing header
         }
     """
     try:
@@ -131,7 +235,7 @@ def execute_code():
         print(f"\n[EXECUTE] Received code:\n{code}\n")  # Debug logging
         
         if not code:
-            return jsonify({
+            return wire_format.respond({
                 'success': False,
                 'error': 'No code provided',
                 'output': '',
@@ -150,17 +254,17 @@ def execute_code():
             interpreter.set_input_values(input_values)
             print(f"[EXECUTE] Set input values: {input_values}")  # Debug
         
-        result = interpreter.execute(code, mode=mode)
+        result = interpreter.execute(code, mode=mode, supersede=bool(data.get('supersede')))
         result['timestamp'] = datetime.now().isoformat()
         
         print(f"[EXECUTE] Success: {result['success']}")  # Debug logging
         print(f"[EXECUTE] Output: {result['output'][:100] if result['output'] else 'None'}")  # Debug
         print(f"[EXECUTE] Variables after: {list(result['variables'].keys())}\n")  # Debug
         
-        return jsonify(result)
+        return _respond_timed(result, 'execute')
     
     except Exception as e:
-        return jsonify({
+        return wire_format.respond({
             'success': False,
             'error': f'Server error: {str(e)}',
             'output': '',
@@ -177,7 +281,8 @@ def execute_line():
     
     Expected JSON:
         {
-            "line": "Single line of Python code"
+            "line": "Single line of Python code",
+            "supersede": bool (optional) - see /api/execute
         }
     
     Returns JSON: Same as /api/execute
@@ -187,13 +292,13 @@ def execute_line():
         line = data.get('line', '')
         
         interpreter = get_interpreter()
-        result = interpreter.execute_line(line)
+        result = interpreter.execute_line(line, supersede=bool(data.get('supersede')))
         result['timestamp'] = datetime.now().isoformat()
         
-        return jsonify(result)
+        return _respond_timed(result, 'execute_line')
     
     except Exception as e:
-        return jsonify({
+        return wire_format.respond({
             'success': False,
             'error': f'Server error: {str(e)}',
             'output': '',
@@ -204,6 +309,40 @@ def execute_line():
 
 
 
+@app.route('/api/interrupt', methods=['POST'])
+def interrupt_execution():
+    """
+    Stop the running cell with KeyboardInterrupt.
+
+    Expected JSON (optional):
+        {
+            "queued": bool (optional, default False) - also drop runs waiting behind it
+        }
+
+    Returns JSON:
+        {
+            "success": true,
+            "interrupted": bool - a running cell was interrupted,
+            "cancelled_queued": int,
+            "finished": bool - the cell stopped within INTERRUPT_WAIT seconds,
+            "output": str - what it printed before stopping
+        }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        # No hibernation acquire: interrupting must not wait behind anything
+        outcome = global_interpreter.interrupt(queued=bool(data.get('queued')))
+        run = outcome.pop('run')
+        finished = run is not None and run.done.wait(INTERRUPT_WAIT)
+        outcome.update({
+            'success': True,
+            'finished': finished,
+            'output': run.result.get('output', '') if finished and run.result else '',
+        })
+        return wire_format.respond(outcome)
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
 
 @app.route('/api/provide_input', methods=['POST'])
 def provide_input():
@@ -225,10 +364,10 @@ def provide_input():
         result = interpreter.provide_input(value)
         result['timestamp'] = datetime.now().isoformat()
         
-        return jsonify(result)
+        return _respond_timed(result, 'provide_input')
     
     except Exception as e:
-        return jsonify({
+        return wire_format.respond({
             'success': False,
             'error': f'Server error: {str(e)}',
             'output': '',
@@ -261,13 +400,13 @@ def validate_syntax():
         interpreter = get_interpreter()
         is_valid, error = interpreter.validate_syntax(code)
         
-        return jsonify({
+        return wire_format.respond({
             'valid': is_valid,
             'error': error
         })
     
     except Exception as e:
-        return jsonify({
+        return wire_format.respond({
             'valid': False,
             'error': f'Server error: {str(e)}'
         }), 500
@@ -296,49 +435,6 @@ def validate_lines():
         # We'll accumulate names defined by earlier lines (in-document symbols).
         # Start with current interpreter variables so previously executed code counts.
         defined_names = set(interpreter.get_all_variables().keys())
-        builtin_names = set(dir(_builtins))
-
-        # Helper to collect defined targets from an AST node
-        def collect_defined(node):
-            names = set()
-            for n in ast.walk(node):
-                if isinstance(n, ast.Assign):
-                    for t in n.targets:
-                        for idn in extract_target_names(t):
-                            names.add(idn)
-                elif isinstance(n, ast.AnnAssign):
-                    for idn in extract_target_names(n.target):
-                        names.add(idn)
-                elif isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                    names.add(n.name)
-                elif isinstance(n, ast.Import):
-                    for alias in n.names:
-                        names.add(alias.asname or alias.name.split('.')[0])
-                elif isinstance(n, ast.ImportFrom):
-                    for alias in n.names:
-                        names.add(alias.asname or alias.name)
-                elif isinstance(n, ast.For):
-                    for idn in extract_target_names(n.target):
-                        names.add(idn)
-                elif isinstance(n, ast.With):
-                    for item in getattr(n, 'items', []):
-                        if getattr(item, 'optional_vars', None) is not None:
-                            for idn in extract_target_names(item.optional_vars):
-                                names.add(idn)
-            return names
-
-        # Helper to extract names from assignment targets (handles tuples, names, attributes)
-        def extract_target_names(target):
-            out = []
-            if isinstance(target, ast.Name):
-                out.append(target.id)
-            elif isinstance(target, (ast.Tuple, ast.List)):
-                for elt in target.elts:
-                    out.extend(extract_target_names(elt))
-            elif isinstance(target, ast.Attribute):
-                # attribute assignment (obj.attr) - don't introduce a plain name
-                pass
-            return out
 
         for line in lines:
             # Treat purely empty/whitespace lines as ignored
@@ -356,17 +452,8 @@ def validate_lines():
             # using the document-level defined_names accumulated so far.
             if is_valid:
                 try:
-                    tree = ast.parse(line)
-                    used_names = set()
-
-                    class NameCollector(ast.NodeVisitor):
-                        def visit_Name(self, node):
-                            if isinstance(node.ctx, ast.Load):
-                                used_names.add(node.id)
-
-                    NameCollector().visit(tree)
-
-                    undefined = [n for n in used_names if n not in builtin_names and n not in defined_names]
+                    used_names = dataflow.collect_used(ast.parse(line))
+                    undefined = [n for n in used_names if n not in dataflow.BUILTIN_NAMES and n not in defined_names]
 
                     if undefined:
                         undef = undefined[0]
@@ -379,20 +466,315 @@ def validate_lines():
 
             # After checking this line, add any defined names from it so later lines see them
             try:
-                tree = ast.parse(line)
-                defs = collect_defined(tree)
-                defined_names.update(defs)
+                # nested: names bound anywhere in the line count, as before the move to dataflow
+                defined_names.update(dataflow.collect_defined(ast.parse(line), nested=True))
             except Exception:
                 # ignore parsing errors here for definition collection
                 pass
 
-        return jsonify({'results': results})
+        return wire_format.respond({'results': results})
+
+    except Exception as e:
+        return wire_format.respond({'results': [], 'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/complete', methods=['POST'])
+def complete():
+    """
+    Completions at a cursor position, ranked.
+
+    Expected JSON:
+        {
+            "code": str - the whole document,
+            "line": int, "ch": int - 0-based cursor position (CodeMirror style),
+            "limit": int (optional, default 50)
+        }
 
+    Returns JSON:
+        {
+            "completions": [{"name": str, "kind": "variable"|"function"|"class"|"module"|"keyword",
+                             "source": "namespace"|"document"|"attribute"|"builtin"|"keyword"}, ...],
+            "prefix": str, "from": {"line", "ch"}, "to": {"line", "ch"} - the range to replace
+        }
+    """
+    try:
+        data = request.get_json() or {}
+        limit = max(1, min(int(data.get('limit', 50)), 500))
+        return wire_format.respond(get_interpreter().complete(*_cursor(data), limit=limit))
     except Exception as e:
-        return jsonify({'results': [], 'error': f'Server error: {str(e)}'}), 500
+        return wire_format.respond({'completions': [], 'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/api/signature', methods=['POST'])
+def signature_help():
+    """
+    Signature help for the innermost open call at the cursor.
+
+    Expected JSON: {"code": str, "line": int, "ch": int} (as for /api/complete)
+
+    Returns JSON:
+        {
+            "found": bool, "name": str - the callee, "signature": str - e.g. "(x, y=2)",
+            "parameters": [{"name", "kind", "label"}, ...], "active": int|null - parameter
+            being typed, "doc": str
+        }
+    """
+    try:
+        return wire_format.respond(get_interpreter().signature_help(*_cursor(request.get_json() or {})))
+    except Exception as e:
+        return wire_format.respond({'found': False, 'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/api/hover', methods=['POST'])
+def hover():
+    """
+    Type, signature and docstring of the symbol under the cursor.
+
+    Expected JSON: {"code": str, "line": int, "ch": int} (as for /api/complete)
+
+    Returns JSON:
+        {
+            "found": bool, "name": str, "kind": str, "type": str, "signature": str|null,
+            "doc": str, "value": str (plain values only), "from"/"to": the word's range
+        }
+    """
+    try:
+        return wire_format.respond(get_interpreter().hover(*_cursor(request.get_json() or {})))
+    except Exception as e:
+        return wire_format.respond({'found': False, 'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/api/definition', methods=['POST'])
+def definition():
+    """
+    Where the symbol under the cursor is defined.
+
+    Expected JSON: {"code": str, "line": int, "ch": int} (as for /api/complete)
+
+    Returns JSON (lines are 0-based):
+        {"found": true, "source": "session", "cell": str|null, "run": int, "line": int, "ch": int}
+        {"found": true, "source": "file", "file": str, "line": int}
+        {"found": true, "source": "document", "line": int, "ch": int}
+        or {"found": false}
+    """
+    try:
+        return wire_format.respond(get_interpreter().find_definition(*_cursor(request.get_json() or {})))
+    except Exception as e:
+        return wire_format.respond({'found': False, 'error': f'Server error: {str(e)}'}), 500
+
+def _cursor(data):
+    """(code, line, ch) from an editor request; the cursor defaults to the end of the document."""
+    code = data.get('code', '')
+    lines = code.split('\n')
+    line = int(data.get('line', len(lines) - 1))
+    ch = int(data.get('ch', len(lines[min(max(line, 0), len(lines) - 1)])))
+    return code, line, ch
+
+@app.route('/api/cells/run', methods=['POST'])
+def run_cell():
+    """
+    Run a notebook-style cell, then the cells that depend on it.
+
+    Expected JSON:
+        {
+            "cell_id": str,
+            "code": str,
+            "reactive": bool (optional, default True) - re-run downstream cells;
+                        when False they are only flagged stale
+            "position": int (optional) - index of the cell in document order
+        }
+
+    Returns JSON:
+        {
+            "results": [execution result + "cell_id", ...] - the submitted cell first,
+                       without per-run variables,
+            "rerun": [cell_id, ...], "stale": [cell_id, ...],
+            "variables": dict - the namespace after all runs
+        }
+    """
+    try:
+        data = request.get_json() or {}
+        cell_id = str(data.get('cell_id') or '')
+        if not cell_id:
+            return wire_format.respond({'success': False, 'error': 'cell_id is required'}), 400
+
+        interpreter = get_interpreter()
+        outcome = interpreter.run_cell(cell_id, data.get('code', ''),
+                                       reactive=data.get('reactive', True) is not False,
+                                       position=data.get('position'))
+        timestamp = datetime.now().isoformat()
+        # Copies: the results are also history entries. Each one's variables
+        # are dropped; the outcome carries a single snapshot taken after all runs
+        outcome['results'] = [dict({k: v for k, v in result.items() if k != 'variables'}, timestamp=timestamp)
+                              for result in outcome['results']]
+        outcome['variables'] = {k: interpreter._serialize_value(v)
+                                for k, v in interpreter.get_all_variables().items()}
+        return wire_format.respond(outcome)
+
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/cells', methods=['GET'])
+def list_cells():
+    """Cells in document order with their defined/used names, dependencies and stale flags."""
+    try:
+        return wire_format.respond(get_interpreter().cells.to_dict())
+    except Exception as e:
+        return wire_format.respond({'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/cells/<cell_id>', methods=['DELETE'])
+def delete_cell(cell_id):
+    """Remove a cell; cells that read its names are flagged stale."""
+    try:
+        cells = get_interpreter().cells
+        if cell_id not in cells:
+            return wire_format.respond({'success': False, 'error': f"Cell '{cell_id}' not found"}), 404
+        return wire_format.respond({'success': True, 'stale': cells.remove(cell_id)})
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Run code as a background job and return at once.
+
+    Expected JSON:
+        {
+            "code": str,
+            "mode": "exec" | "eval" (optional, default "exec")
+        }
+
+    Returns JSON (202):
+        {"success": true, "job_id": str, "status": "queued"}
+    429 when the session already has the maximum number of active jobs.
+    """
+    try:
+        data = request.get_json() or {}
+        code = data.get('code', '')
+        if not code.strip():
+            return wire_format.respond({'success': False, 'error': 'code is required'}), 400
+        mode = data.get('mode', 'exec')
+        if mode not in ('exec', 'eval'):
+            return wire_format.respond({'success': False, 'error': "mode must be 'exec' or 'eval'"}), 400
+        job = get_interpreter().jobs.submit(code, mode)
+        return wire_format.respond({'success': True, 'job_id': job.id, 'status': job.status}), 202
+    except jobs.JobLimitExceeded as e:
+        return wire_format.respond({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """Background jobs of the session, oldest first, without their output."""
+    try:
+        interpreter = get_interpreter()
+        listed = []
+        for job in interpreter.jobs.list():
+            info = job.to_dict(serialize=interpreter._serialize_value)
+            info['output_length'] = info.pop('offset')
+            del info['output']
+            listed.append(info)
+        return wire_format.respond({'jobs': listed})
+    except Exception as e:
+        return wire_format.respond({'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Status of one job with the output printed since `offset`.
+
+    Query parameters:
+        offset: characters of output already received (default 0)
+
+    Returns JSON:
+        {"job_id", "status": "queued"|"running"|"cancelling"|"done"|"failed"|"cancelled",
+         "output": new output, "offset": where the next poll should start,
+         "result": repr (eval jobs, once done), "error": traceback (failed jobs), ...}
+    """
+    try:
+        interpreter = get_interpreter()
+        job = interpreter.jobs.get(job_id)
+        if job is None:
+            return wire_format.respond({'success': False, 'error': f"Job '{job_id}' not found"}), 404
+        offset = max(0, request.args.get('offset', 0, type=int))
+        return wire_format.respond(job.to_dict(offset, serialize=interpreter._serialize_value))
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    """
+    Server-sent events for one job: `output` events carry new text as it is
+    printed, a final `done` event carries the job as returned by GET /api/jobs/<id>.
+    """
+    interpreter = get_interpreter()
+    job = interpreter.jobs.get(job_id)
+    if job is None:
+        return wire_format.respond({'success': False, 'error': f"Job '{job_id}' not found"}), 404
+    offset = max(0, request.args.get('offset', 0, type=int))
+
+    def events(offset=offset):
+        while True:
+            finished = job.done.wait(JOB_STREAM_INTERVAL)
+            info = job.to_dict(offset, serialize=interpreter._serialize_value)
+            if info['output']:
+                yield f"event: output\ndata: {json.dumps({'output': info['output']})}\n\n"
+                offset = info['offset']
+            if finished:
+                info['output'] = ''
+                yield f"event: done\ndata: {json.dumps(info)}\n\n"
+                return
+
+    headers = {
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    }
+    return Response(events(), mimetype='text/event-stream', headers=headers)
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job; returns its status afterwards."""
+    try:
+        job = get_interpreter().jobs.cancel(job_id)
+        if job is None:
+            return wire_format.respond({'success': False, 'error': f"Job '{job_id}' not found"}), 404
+        return wire_format.respond({'success': True, 'job_id': job.id, 'status': job.status})
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/output/<output_id>', methods=['GET'])
+def get_output(output_id):
+    """
+    A page of a run's full output. Runs that print more than the result
+    keeps report `output_truncated: {output_id, total_bytes, truncated_bytes,
+    spilled_bytes}`; the whole stream was written to the session workspace.
+
+    Query parameters:
+        offset: byte offset to start at (default 0)
+        limit: bytes per page (default 64 KB, at most 1 MB)
+
+    Returns JSON:
+        {"output_id", "text", "offset", "next_offset": where the next page starts,
+         "size": bytes written so far, "complete": true once the last page is read}
+    """
+    try:
+        offset = max(0, request.args.get('offset', 0, type=int))
+        limit = request.args.get('limit', bounded_output.PAGE_BYTES, type=int)
+        page = get_interpreter().outputs.read(output_id, offset, limit)
+        if page is None:
+            return wire_format.respond({'success': False, 'error': f"Output '{output_id}' not found"}), 404
+        return wire_format.respond({'success': True, **page})
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 
 @app.route('/api/variables', methods=['GET'])
+@http_cache.versioned(_state_etag)
 def get_variables():
     """
     Get all variables in the current session's namespace.
@@ -412,37 +794,203 @@ def get_variables():
             for k, v in variables.items()
         }
         
-        return jsonify({
+        return wire_format.respond({
             'variables': serialized
         })
     
     except Exception as e:
-        return jsonify({
+        return wire_format.respond({
             'variables': {},
             'error': f'Server error: {str(e)}'
         }), 500
 
 
+@app.route('/api/variables/<name>/page', methods=['GET'])
+@http_cache.versioned(_state_etag)
+def get_variable_page(name):
+    """
+    Get one page of a large variable (DataFrame, Series, ndarray, list, tuple, dict, set).
+    Sorting and filtering happen on the server before paging.
+
+    Query params (all optional):
+        offset, limit: row window (limit defaults to 100, max 10000)
+        columns: comma-separated column names to include
+        sort: column to sort by; order: "asc" (default) or "desc"
+        filter: row filter "<column><op><value>", op one of == != > >= < <= ~
+
+    Returns JSON:
+        {
+            "name": str, "kind": str, "total": int, "offset": int, "limit": int,
+            "columns": list, "dtypes": dict, "index": list, "rows": list
+        }
+    """
+    try:
+        interpreter = get_interpreter()
+        if not interpreter.has_variable(name):
+            return wire_format.respond({'error': f"Variable '{name}' not found"}), 404
+
+        columns = request.args.get('columns')
+        page = data_viewer.page_value(
+            interpreter.get_variable(name),
+            offset=request.args.get('offset', 0, type=int),
+            limit=request.args.get('limit', type=int),
+            columns=[c for c in columns.split(',') if c] if columns else None,
+            sort=request.args.get('sort') or None,
+            ascending=request.args.get('order', 'asc').lower() != 'desc',
+            filter=request.args.get('filter') or None,
+        )
+        page['name'] = name
+        return wire_format.respond(page)
+
+    except data_viewer.ViewerError as e:
+        return wire_format.respond({'error': str(e)}), 400
+    except Exception as e:
+        return wire_format.respond({'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/variables/<name>/export', methods=['GET'])
+def export_variable(name):
+    """
+    Stream a variable as a downloadable file.
+
+    Query params:
+        format: "csv" (default), "json-lines", "npy" or "parquet" (needs pyarrow)
+
+    Works for DataFrames/Series, numpy arrays, lists/tuples (of dicts, tuples or
+    scalars), sets and dicts. The body is produced chunk by chunk.
+    """
+    try:
+        interpreter = get_interpreter()
+        if not interpreter.has_variable(name):
+            return wire_format.respond({'error': f"Variable '{name}' not found"}), 404
+
+        fmt = request.args.get('format', 'csv').lower()
+        chunks, mimetype, ext = data_export.export(interpreter.get_variable(name), fmt)
+        headers = {'Content-Disposition': f'attachment; filename="{name}.{ext}"'}
+        return Response(chunks, mimetype=mimetype, headers=headers)
+
+    except data_export.ExportError as e:
+        return wire_format.respond({'error': str(e)}), 400
+    except Exception as e:
+        return wire_format.respond({'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/workspace', methods=['GET'])
+def list_workspace():
+    """List the files in the session workspace with current usage and quota."""
+    try:
+        return wire_format.respond({'success': True, **get_interpreter().workspace.info()})
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/workspace/files/<path:name>', methods=['PUT', 'POST'])
+def upload_workspace_file(name):
+    """
+    Upload a file into the session workspace.
+
+    Send the raw file bytes as the request body (not multipart), e.g.
+        curl -T data.npy http://localhost:5000/api/workspace/files/data.npy
+    The body is streamed to disk in chunks, so uploads of any size use constant
+    memory. Returns 413 when the upload would exceed the workspace quota.
+    """
+    try:
+        workspace = get_interpreter().workspace
+        saved = workspace.write_stream(name, request.stream, length=request.content_length)
+        return wire_format.respond({'success': True, **saved, 'usage': workspace.usage(),
+                                    'quota': workspace.quota_bytes})
+    except QuotaExceeded as e:
+        return wire_format.respond({'success': False, 'error': str(e)}), 413
+    except WorkspaceError as e:
+        return wire_format.respond({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/workspace/files/<path:name>', methods=['DELETE'])
+def delete_workspace_file(name):
+    """Delete a file from the session workspace."""
+    try:
+        if not get_interpreter().workspace.delete(name):
+            return wire_format.respond({'success': False, 'error': f"File '{name}' not found"}), 404
+        return wire_format.respond({'success': True})
+    except WorkspaceError as e:
+        return wire_format.respond({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return wire_format.respond({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+
+@app.route('/api/inspect', methods=['GET'])
+@http_cache.versioned(_state_etag)
+def inspect_object():
+    """
+    Inspect one level of a variable, lazily.
+
+    Query params:
+        path: e.g. "data", "data['users'][3].name", "df['price'].iloc[10]"
+              (empty: list the session variables)
+        offset, limit: window of children to return (limit defaults to 50)
+
+    Returns JSON:
+        {
+            "path": str, "type": str, "preview": str, "expandable": bool,
+            "length": int, "shape": list, "dtype": str,   (when applicable)
+            "children": [{"name", "path", "type", "preview", "expandable", ...}],
+            "total_children": int, "offset": int, "limit": int
+        }
+    """
+    try:
+        interpreter = get_interpreter()
+        result = object_inspector.inspect(
+            interpreter.get_all_variables(),
+            request.args.get('path', ''),
+            interpreter.state_tag(),
+            offset=request.args.get('offset', 0, type=int),
+            limit=request.args.get('limit', type=int),
+        )
+        return wire_format.respond(result)
+
+    except KeyError as e:
+        return wire_format.respond({'error': f"Variable {e} not found"}), 404
+    except inspector.InspectError as e:
+        return wire_format.respond({'error': str(e)}), 400
+    except Exception as e:
+        return wire_format.respond({'error': f'Server error: {str(e)}'}), 500
+
+
 @app.route('/api/history', methods=['GET'])
+@http_cache.versioned(_state_etag)
 def get_history():
     """
     Get execution history for the current session.
+
+    Query params (optional):
+        offset: index of the first entry (default 0)
+        limit: maximum number of entries (default: all)
     
-    Returns JSON:
+    Returns JSON (streamed entry by entry):
         {
-            "history": list
+            "history": list,
+            "total": int,
+            "offset": int
         }
     """
     try:
         interpreter = get_interpreter()
+        cache = history_caches.get(interpreter)
+        if cache is None:
+            cache = history_caches[interpreter] = wire_format.EncodedEntryCache()
         history = interpreter.get_history()
+        offset = max(0, request.args.get('offset', 0, type=int))
+        limit = request.args.get('limit', type=int)
+        end = len(history) if limit is None else offset + max(0, limit)
         
-        return jsonify({
-            'history': history
-        })
+        return wire_format.stream_list('history', history[offset:end],
+                                       extra={'total': len(history), 'offset': offset},
+                                       cache=cache, first_seq=offset)
     
     except Exception as e:
-        return jsonify({
+        return wire_format.respond({
             'history': [],
             'error': f'Server error: {str(e)}'
         }), 500
@@ -462,14 +1010,16 @@ def reset_interpreter():
     try:
         interpreter = get_interpreter()
         interpreter.reset()
+        # The old entries are gone; don't keep them alive in the cache
+        history_caches.pop(interpreter, None)
         
-        return jsonify({
+        return wire_format.respond({
             'success': True,
             'message': 'Interpreter reset successfully'
         })
     
     except Exception as e:
-        return jsonify({
+        return wire_format.respond({
             'success': False,
             'message': f'Server error: {str(e)}'
         }), 500
@@ -498,7 +1048,7 @@ def set_variable():
         value_expr = data.get('value', '')
         
         if not name:
-            return jsonify({
+            return wire_format.respond({
                 'success': False,
                 'message': 'Variable name is required'
             })
@@ -509,29 +1059,51 @@ def set_variable():
         result = interpreter.execute(f"{name} = {value_expr}")
         
         if result['success']:
-            return jsonify({
+            return wire_format.respond({
                 'success': True,
                 'message': f'Variable {name} set successfully'
             })
         else:
-            return jsonify({
+            return wire_format.respond({
                 'success': False,
                 'message': result['error']
             })
     
     except Exception as e:
-        return jsonify({
+        return wire_format.respond({
             'success': False,
             'message': f'Server error: {str(e)}'
         }), 500
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Per-phase timings of recent executions (last timings.WINDOW per endpoint).
+
+    Query parameters:
+        endpoint: only this endpoint ('execute', 'execute_line', 'provide_input')
+
+    Returns JSON:
+        {"timings": {endpoint: {"count": int, "window": int,
+                                "phases": {phase: {"p50", "p95", "p99", "max", "mean" (ms), "samples"}}}}}
+    """
+    try:
+        return wire_format.respond({'timings': execution_timings.summary(request.args.get('endpoint'))})
+    except Exception as e:
+        return wire_format.respond({'error': f'Server error: {str(e)}'}), 500
+
+
 @app.route('/health')
 def health_check():
     """Health check endpoint."""
-    return jsonify({
+    return wire_format.respond({
         'status': 'healthy',
-        'active_sessions': len(interpreters)
+        'active_sessions': len(interpreters),
+        'recovery': global_interpreter.recovery_report,
+        'hibernation': hibernation.status(global_interpreter),
+        'memo': global_interpreter.memo.status() if global_interpreter.memo is not None else None,
+        'persistent_cache': persistent_cache.default_cache().status()
     })
 
 
@@ -556,8 +1128,8 @@ def _spotify_token_is_expired(tok):
     if not exp: return True
     return time.time() > exp - 30
 
-def _spotify_refresh_token():
-    tok = session.get('spotify')
+def _spotify_refresh_token_data(tok):
+    """Refresh `tok` in place without touching the session. Returns True on success."""
     if not tok or not tok.get('refresh_token'):
         return False
     try:
@@ -573,19 +1145,61 @@ def _spotify_refresh_token():
             print('Spotify refresh failed', resp.status_code, resp.text)
             return False
         j = resp.json()
-        # update session token
         tok['access_token'] = j.get('access_token')
         expires_in = j.get('expires_in', 3600)
         tok['expires_at'] = time.time() + int(expires_in)
         # Spotify may return a new refresh_token sometimes
         if j.get('refresh_token'):
             tok['refresh_token'] = j.get('refresh_token')
-        session['spotify'] = tok
         return True
     except Exception as e:
         print('Spotify refresh exception', e)
         return False
 
+def _spotify_refresh_token():
+    tok = session.get('spotify')
+    if not _spotify_refresh_token_data(tok):
+        return False
+    # update session token
+    session['spotify'] = tok
+    return True
+
+def _spotify_fetch_player(tok):
+    """
+    Query current playback for `tok`, refreshing it if expired.
+    Returns (payload, http_status, refreshed_token_or_None). Safe to call
+    outside a request context (used by the status stream poller).
+    """
+    refreshed = None
+    if _spotify_token_is_expired(tok):
+        tok = dict(tok)
+        if not _spotify_refresh_token_data(tok):
+            return {'authenticated': False}, 200, None
+        refreshed = tok
+    headers = {'Authorization': f"Bearer {tok.get('access_token')}"}
+    resp = requests.get('https://api.spotify.com/v1/me/player', headers=headers, timeout=8)
+    if resp.status_code == 204:
+        return {'authenticated': True, 'playing': False, 'device': None}, 200, refreshed
+    if resp.status_code == 200:
+        return {'authenticated': True, 'player': resp.json()}, 200, refreshed
+    return {'authenticated': True, 'error': resp.text}, 200, refreshed
+
+def _spotify_stream_key():
+    """Stable per-user key for the status hub, stored alongside the session token."""
+    tok = session.get('spotify')
+    if not tok:
+        return None
+    if not tok.get('stream_key'):
+        tok['stream_key'] = secrets.token_hex(8)
+        session['spotify'] = tok
+    return tok['stream_key']
+
+def _spotify_hub_fetch(tok):
+    payload, _status, refreshed = _spotify_fetch_player(tok)
+    return payload, refreshed
+
+spotify_hub = SpotifyStatusHub(_spotify_hub_fetch)
+
 
 @app.route('/spotify/login')
 def spotify_login():
@@ -643,23 +1257,38 @@ def spotify_status():
     tok = session.get('spotify')
     if not tok:
         return jsonify({'authenticated': False})
-    if _spotify_token_is_expired(tok):
-        ok = _spotify_refresh_token()
-        if not ok:
-            return jsonify({'authenticated': False})
     # query current playback
     try:
-        headers = _spotify_auth_header()
-        resp = requests.get('https://api.spotify.com/v1/me/player', headers=headers, timeout=8)
-        if resp.status_code == 204:
-            return jsonify({'authenticated': True, 'playing': False, 'device': None})
-        if resp.status_code == 200:
-            return jsonify({'authenticated': True, 'player': resp.json()})
-        return jsonify({'authenticated': True, 'error': resp.text}), 200
+        payload, status, refreshed = _spotify_fetch_player(tok)
+        if refreshed:
+            session['spotify'] = refreshed
+        return jsonify(payload), status
     except Exception as e:
         return jsonify({'authenticated': True, 'error': str(e)}), 500
 
 
+@app.route('/api/spotify/stream', methods=['GET'])
+def spotify_stream():
+    """
+    Server-sent events stream of playback state.
+
+    All tabs of the same user share one server-side poller; an event is only
+    sent when the state changes (track, play/pause, device, or a seek that
+    the client could not have interpolated). Each event carries `server_time`
+    so the client can extrapolate `progress_ms` locally between pushes.
+    """
+    tok = session.get('spotify')
+    if not tok:
+        return jsonify({'authenticated': False}), 401
+    key = _spotify_stream_key()
+    headers = {
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    }
+    return Response(spotify_hub.stream(key, session['spotify']),
+                    mimetype='text/event-stream', headers=headers)
+
+
 @app.route('/api/spotify/search', methods=['GET'])
 def spotify_search():
     q = request.args.get('q', '')
@@ -718,6 +1347,7 @@ def spotify_play():
             payload['context_uri'] = uri
     try:
         resp = requests.put('https://api.spotify.com/v1/me/player/play', headers=headers, params=params, json=payload, timeout=8)
+        spotify_hub.nudge(session.get('spotify', {}).get('stream_key'))
         return jsonify({'status': resp.status_code, 'body': resp.text})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -737,6 +1367,7 @@ def spotify_pause():
     if device_id: params['device_id'] = device_id
     try:
         resp = requests.put('https://api.spotify.com/v1/me/player/pause', headers=headers, params=params, timeout=8)
+        spotify_hub.nudge(session.get('spotify', {}).get('stream_key'))
         return jsonify({'status': resp.status_code, 'body': resp.text})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -761,6 +1392,7 @@ def spotify_transfer():
     payload = {'device_ids': device_ids, 'play': play}
     try:
         resp = requests.put('https://api.spotify.com/v1/me/player', headers=headers, json=payload, timeout=8)
+        spotify_hub.nudge(session.get('spotify', {}).get('stream_key'))
         return jsonify({'status': resp.status_code, 'body': resp.text})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -791,6 +1423,7 @@ def spotify_seek():
         params['device_id'] = device_id
     try:
         resp = requests.put('https://api.spotify.com/v1/me/player/seek', headers=headers, params=params, timeout=8)
+        spotify_hub.nudge(session.get('spotify', {}).get('stream_key'))
         return jsonify({'status': resp.status_code, 'body': resp.text})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -810,6 +1443,7 @@ def spotify_next():
     if device_id: params['device_id'] = device_id
     try:
         resp = requests.post('https://api.spotify.com/v1/me/player/next', headers=headers, params=params, timeout=8)
+        spotify_hub.nudge(session.get('spotify', {}).get('stream_key'))
         return jsonify({'status': resp.status_code, 'body': resp.text})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -828,6 +1462,7 @@ def spotify_previous():
     if device_id: params['device_id'] = device_id
     try:
         resp = requests.post('https://api.spotify.com/v1/me/player/previous', headers=headers, params=params, timeout=8)
+        spotify_hub.nudge(session.get('spotify', {}).get('stream_key'))
         return jsonify({'status': resp.status_code, 'body': resp.text})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,396 @@
+"""
+Static Asset Pipeline
+Builds minified, content-hashed, precompressed copies of static/*.js and static/*.css
+and teaches Flask to serve them with immutable caching.
+
+Build:   python assets.py
+Output:  static/dist/<name>.<hash>.<ext> (+ .gz, + .br when brotli is installed)
+         static/dist/manifest.json
+
+Templates keep using url_for('static', filename='advanced.js'); once init_app(app)
+is called those references are rewritten to the hashed bundle when one is available.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+
+try:
+    import brotli
+except ImportError:
+    # Optional: gzip alone still covers every browser
+    brotli = None
+
+try:
+    import rjsmin
+    import rcssmin
+except ImportError:
+    # Optional: the built-in minifiers below are conservative but dependency-free
+    rjsmin = rcssmin = None
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Assets whose hashed name never changes content can be cached for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+ASSET_EXTENSIONS = ('.js', '.css')
+
+
+# ============================================
+# Minifiers
+# ============================================
+
+_WORD_CHARS = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$\\')
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new',
+                   'delete', 'void', 'throw', 'yield', 'await')
+
+
+class _JSMinifier:
+    """
+    Strips comments and redundant whitespace from JavaScript.
+
+    Line breaks are kept (collapsed to one) so automatic semicolon insertion
+    behaves exactly as in the source; strings, template literals and regex
+    literals are copied verbatim.
+    """
+
+    def __init__(self, src: str):
+        self.src = src
+        self.i = 0
+        self.out = []
+
+    def minify(self) -> str:
+        self._code(in_template=False)
+        return ''.join(self.out).strip() + '\n'
+
+    def _last(self) -> str:
+        for chunk in reversed(self.out):
+            if chunk:
+                return chunk[-1]
+        return ''
+
+    def _last_significant(self):
+        text = ''.join(self.out[-8:]).rstrip()
+        return text
+
+    def _regex_allowed(self) -> bool:
+        text = self._last_significant()
+        if not text:
+            return True
+        if text[-1] in _REGEX_PRECEDERS:
+            return True
+        m = re.search(r'([A-Za-z_$]+)$', text)
+        return bool(m and m.group(1) in _REGEX_KEYWORDS)
+
+    def _emit_space(self, had_newline: bool):
+        src, i = self.src, self.i
+        nxt = src[i] if i < len(src) else ''
+        last = self._last()
+        if not last or not nxt:
+            return
+        if had_newline:
+            if last != '\n':
+                self.out.append('\n')
+            return
+        if (last in _WORD_CHARS and nxt in _WORD_CHARS) or (last in '+-/' and nxt in '+-/'):
+            self.out.append(' ')
+
+    def _copy_quoted(self, quote: str):
+        src, i = self.src, self.i
+        start = i
+        i += 1
+        while i < len(src) and src[i] != quote:
+            if src[i] == '\\':
+                i += 1
+            elif src[i] == '\n':
+                # unterminated string; stop at end of line
+                break
+            i += 1
+        self.out.append(src[start:i + 1])
+        self.i = i + 1
+
+    def _copy_regex(self):
+        src, i = self.src, self.i
+        start = i
+        i += 1
+        in_class = False
+        while i < len(src):
+            c = src[i]
+            if c == '\\':
+                i += 2
+                continue
+            if c == '[':
+                in_class = True
+            elif c == ']':
+                in_class = False
+            elif c == '/' and not in_class:
+                break
+            elif c == '\n':
+                break
+            i += 1
+        i += 1
+        while i < len(src) and src[i].isalpha():
+            i += 1
+        self.out.append(src[start:i])
+        self.i = i
+
+    def _copy_template(self):
+        src = self.src
+        self.out.append('`')
+        self.i += 1
+        start = self.i
+        while self.i < len(src):
+            c = src[self.i]
+            if c == '\\':
+                self.i += 2
+                continue
+            if c == '`':
+                self.out.append(src[start:self.i + 1])
+                self.i += 1
+                return
+            if c == '$' and src[self.i + 1:self.i + 2] == '{':
+                self.out.append(src[start:self.i + 2])
+                self.i += 2
+                self._code(in_template=True)
+                start = self.i
+                continue
+            self.i += 1
+        self.out.append(src[start:])
+
+    def _code(self, in_template: bool):
+        src = self.src
+        depth = 0
+        while self.i < len(src):
+            c = src[self.i]
+            if c in ' \t\r\n':
+                had_newline = False
+                while self.i < len(src) and src[self.i] in ' \t\r\n':
+                    had_newline = had_newline or src[self.i] == '\n'
+                    self.i += 1
+                self._emit_space(had_newline)
+                continue
+            if c == '/' and src[self.i + 1:self.i + 2] == '/':
+                end = src.find('\n', self.i)
+                self.i = len(src) if end == -1 else end
+                continue
+            if c == '/' and src[self.i + 1:self.i + 2] == '*':
+                end = src.find('*/', self.i + 2)
+                end = len(src) if end == -1 else end + 2
+                had_newline = '\n' in src[self.i:end]
+                self.i = end
+                self._emit_space(had_newline)
+                continue
+            if c in '"\'':
+                self._copy_quoted(c)
+                continue
+            if c == '`':
+                self._copy_template()
+                continue
+            if c == '/' and self._regex_allowed():
+                self._copy_regex()
+                continue
+            if in_template:
+                if c == '{':
+                    depth += 1
+                elif c == '}':
+                    if depth == 0:
+                        self.out.append('}')
+                        self.i += 1
+                        return
+                    depth -= 1
+            self.out.append(c)
+            self.i += 1
+
+
+def minify_js(src: str) -> str:
+    """Minify JavaScript source."""
+    if rjsmin is not None:
+        return rjsmin.jsmin(src)
+    return _JSMinifier(src).minify()
+
+
+def minify_css(src: str) -> str:
+    """Minify CSS source (comments, whitespace, and the last semicolon of each block)."""
+    if rcssmin is not None:
+        return rcssmin.cssmin(src)
+    out = []
+    pos = 0
+    # Comments are dropped, string literals kept verbatim, everything else compacted
+    for m in re.finditer(r'/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', src, flags=re.S):
+        out.append(_minify_css_chunk(src[pos:m.start()]))
+        if not m.group(0).startswith('/*'):
+            out.append(m.group(0))
+        pos = m.end()
+    out.append(_minify_css_chunk(src[pos:]))
+    return ''.join(out).strip() + '\n'
+
+
+def _minify_css_chunk(chunk: str) -> str:
+    chunk = re.sub(r'\s+', ' ', chunk)
+    chunk = re.sub(r'\s*([{};,])\s*', r'\1', chunk)
+    return chunk.replace(';}', '}')
+
+
+# ============================================
+# Build
+# ============================================
+
+def _source_files():
+    for name in sorted(os.listdir(STATIC_DIR)):
+        path = os.path.join(STATIC_DIR, name)
+        if os.path.isfile(path) and name.endswith(ASSET_EXTENSIONS):
+            yield name, path
+
+
+def build(verbose: bool = True) -> dict:
+    """Build all assets into static/dist and write the manifest. Returns the manifest."""
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+    keep = {'manifest.json'}
+
+    for name, path in _source_files():
+        with open(path, 'r', encoding='utf-8') as f:
+            src = f.read()
+        stat = os.stat(path)
+
+        minified = minify_js(src) if name.endswith('.js') else minify_css(src)
+        data = minified.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        stem, ext = os.path.splitext(name)
+        hashed = f'{stem}.{digest}{ext}'
+        out_path = os.path.join(DIST_DIR, hashed)
+
+        with open(out_path, 'wb') as f:
+            f.write(data)
+        with open(out_path + '.gz', 'wb') as f:
+            # mtime=0 keeps the .gz byte-identical across rebuilds
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        keep.update({hashed, hashed + '.gz'})
+        sizes = {'source': len(src.encode('utf-8')), 'min': len(data),
+                 'gzip': os.path.getsize(out_path + '.gz')}
+        if brotli is not None:
+            with open(out_path + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+            keep.add(hashed + '.br')
+            sizes['br'] = os.path.getsize(out_path + '.br')
+
+        manifest[name] = {
+            'file': hashed,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'source_size': stat.st_size,
+        }
+        if verbose:
+            print(f"  {name:20} -> {hashed:32} " + '  '.join(f'{k}={v:,}' for k, v in sizes.items()))
+
+    # Drop bundles from previous builds
+    for name in os.listdir(DIST_DIR):
+        if name not in keep:
+            os.remove(os.path.join(DIST_DIR, name))
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+# ============================================
+# Flask integration
+# ============================================
+
+class AssetManifest:
+    """Maps logical static filenames to built bundles, ignoring stale entries."""
+
+    def __init__(self, path: str = MANIFEST_PATH, static_dir: str = STATIC_DIR):
+        self.path = path
+        self.static_dir = static_dir
+        self._mtime = None
+        self._entries = {}
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self._mtime, self._entries = None, {}
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+            self._mtime = mtime
+        except Exception:
+            self._entries = {}
+
+    def lookup(self, filename: str, check_source: bool = False):
+        """Return 'dist/<hashed>' for filename, or None if there is no usable bundle."""
+        self._load()
+        entry = self._entries.get(filename)
+        if not entry:
+            return None
+        if check_source:
+            # Source edited since the last build: serve the original instead
+            try:
+                st = os.stat(os.path.join(self.static_dir, filename))
+            except OSError:
+                return None
+            if st.st_mtime_ns != entry.get('source_mtime_ns') or st.st_size != entry.get('source_size'):
+                return None
+        return 'dist/' + entry['file']
+
+
+def init_app(app, manifest: AssetManifest = None):
+    """
+    Rewrite url_for('static', ...) to hashed bundles and serve them with
+    Content-Encoding negotiation and immutable caching.
+    """
+    from flask import request, send_from_directory
+
+    manifest = manifest or AssetManifest()
+    original_static = app.view_functions['static']
+
+    @app.url_defaults
+    def _rewrite_static(endpoint, values):
+        if endpoint != 'static':
+            return
+        filename = values.get('filename')
+        if not filename or filename.startswith('dist/'):
+            return
+        # In debug mode, check the source on every lookup so edits show up without a rebuild
+        hashed = manifest.lookup(filename, check_source=app.debug)
+        if hashed:
+            values['filename'] = hashed
+
+    def serve_static(filename):
+        if not filename.startswith('dist/') or filename.endswith(('.gz', '.br')):
+            return original_static(filename=filename)
+        name = filename[len('dist/'):]
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        encoding, served = None, name
+        for enc, ext in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[enc] and os.path.isfile(os.path.join(DIST_DIR, name + ext)):
+                encoding, served = enc, name + ext
+                break
+        response = send_from_directory(DIST_DIR, served, mimetype=mimetype,
+                                       max_age=IMMUTABLE_MAX_AGE, conditional=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        return response
+
+    app.view_functions['static'] = serve_static
+    return manifest
+
+
+if __name__ == '__main__':
+    print("Building static assets into", os.path.relpath(DIST_DIR, BASE_DIR))
+    build()
+    if brotli is None:
+        print("(brotli not installed: only .gz variants were written)", file=sys.stderr)
@@ -0,0 +1,312 @@
+"""
+Benchmark Suite
+Times the interpreter and API hot paths on realistic workloads: large
+namespaces, big outputs, many input() calls, 2k-line documents for
+/api/validate_lines and multi-figure cells.
+
+    python benchmark.py                              # run, write bench_results.json
+    python benchmark.py --save-baseline              # ... and store it as the baseline
+    python benchmark.py --baseline bench_baseline.json --threshold 0.2
+
+With a baseline, a benchmark regresses when its median is more than
+`threshold` slower (and at least NOISE_FLOOR_MS in absolute terms); the
+exit status is 1 if any did, so the command can gate CI.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Keep the app from journaling or memoizing benchmark runs
+os.environ.setdefault('INTERPRETER_JOURNAL', '0')
+
+import capture
+from bounded_output import BoundedBuffer
+from python_interpreter import PythonInterpreter
+from workspace import Workspace
+
+try:
+    import matplotlib
+except ImportError:
+    # Optional: the figure capture benchmark is skipped without it
+    matplotlib = None
+
+RESULTS_FILE = 'bench_results.json'
+BASELINE_FILE = 'bench_baseline.json'
+DEFAULT_THRESHOLD = 0.25
+# Differences below this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 0.05
+
+
+class Benchmark:
+    """A named workload: setup() returns the state run(state) is timed on."""
+
+    def __init__(self, name: str, run: Callable[[Any], Any], setup: Callable[[], Any] = lambda: None,
+                 repeat: int = 20, available: Callable[[], bool] = lambda: True):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.repeat = repeat
+        self.available = available
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, setup: Callable[[], Any] = lambda: None, repeat: int = 20,
+              available: Callable[[], bool] = lambda: True):
+    def register(run):
+        BENCHMARKS.append(Benchmark(name, run, setup, repeat, available))
+        return run
+    return register
+
+
+def _interpreter(**variables) -> PythonInterpreter:
+    interp = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp(prefix='bench-')))
+    interp.global_namespace.update(variables)
+    return interp
+
+
+def _document(lines: int = 2000) -> List[str]:
+    """A plausible editor document: imports, functions, loops, a few typos."""
+    block = [
+        'import math',
+        'values = [i * 2 for i in range(100)]',
+        'def scale(x, factor=2):',
+        '    return x * factor',
+        'total = sum(scale(v) for v in values)',
+        'for i, v in enumerate(values):',
+        '    if v > total:',
+        '        print(i, math.sqrt(v))',
+        'result = undefined_name + 1',
+        'print("unterminated',
+        '',
+    ]
+    return [block[i % len(block)] for i in range(lines)]
+
+
+# ============================================
+# Interpreter
+# ============================================
+
+@benchmark('execute.simple', setup=_interpreter, repeat=200)
+def bench_execute_simple(interp):
+    interp.execute('x = 1')
+
+
+@benchmark('execute.large_namespace', repeat=20,
+           setup=lambda: _interpreter(**{f'v{i}': list(range(i % 50)) for i in range(5000)}))
+def bench_execute_large_namespace(interp):
+    # Dominated by serializing 5000 variables into the result
+    interp.execute('y = 1')
+
+
+@benchmark('execute.big_output', setup=_interpreter, repeat=10)
+def bench_execute_big_output(interp):
+    interp.execute('for i in range(100000):\n    print("line", i)')
+
+
+def _capture_state():
+    capture.install_router()
+    return capture.StreamRouter(io.StringIO())
+
+
+@benchmark('capture.print_100k', setup=_capture_state, repeat=10)
+def bench_capture_print_100k(router):
+    # The per-write cost of output routing: print() through the router into a cell's buffer
+    with capture.capture_to(capture.CaptureTarget(BoundedBuffer())):
+        for i in range(100000):
+            print('line', i, file=router)
+
+
+@benchmark('execute.many_inputs', setup=_interpreter, repeat=20)
+def bench_execute_many_inputs(interp):
+    interp.set_input_values([str(i) for i in range(1000)])
+    interp.execute('total = 0\nfor _ in range(1000):\n    total += int(input("n? "))')
+
+
+@benchmark('execute.compute', setup=_interpreter, repeat=10)
+def bench_execute_compute(interp):
+    interp.execute('acc = 0\nfor i in range(300000):\n    acc += i * i')
+
+
+@benchmark('execute_line.expression', setup=_interpreter, repeat=200)
+def bench_execute_line_expression(interp):
+    interp.execute_line('sum(range(1000))')
+
+
+@benchmark('validate_syntax.2k_lines', setup=lambda: (_interpreter(), '\n'.join(
+    line for line in _document() if not line.startswith('print("'))), repeat=50)
+def bench_validate_syntax_2k_lines(state):
+    interp, code = state
+    interp.validate_syntax(code)
+
+
+@benchmark('serialize_value.mixed', repeat=50, setup=lambda: (_interpreter(), [
+    list(range(100000)), {str(i): list(range(10)) for i in range(10000)},
+    [[i] * 20 for i in range(5000)], 'x' * 1000000, 3.14, len]))
+def bench_serialize_value_mixed(state):
+    interp, values = state
+    for value in values:
+        interp._serialize_value(value)
+
+
+@benchmark('format_table.100k_rows', repeat=20, setup=lambda: (_interpreter(), [
+    {'id': i, 'name': f'n{i}', 'score': i * 0.5} for i in range(100000)]))
+def bench_format_table_100k_rows(state):
+    interp, rows = state
+    interp._format_table(rows)
+
+
+@benchmark('figures.four_per_cell', setup=_interpreter, repeat=5, available=lambda: matplotlib is not None)
+def bench_figures_four_per_cell(interp):
+    interp.execute(
+        'import matplotlib.pyplot as plt\n'
+        'for k in range(4):\n'
+        '    plt.figure()\n'
+        '    plt.plot(range(1000), [i * k for i in range(1000)])\n'
+        'plt.show()')
+
+
+# ============================================
+# API (Flask test client, no network)
+# ============================================
+
+def _client():
+    from app import app
+    return app.test_client()
+
+
+@benchmark('api.validate_lines.2k_lines', setup=lambda: (_client(), {'lines': _document()}), repeat=20)
+def bench_api_validate_lines_2k_lines(state):
+    client, payload = state
+    client.post('/api/validate_lines', json=payload)
+
+
+@benchmark('api.execute', setup=_client, repeat=100)
+def bench_api_execute(client):
+    client.post('/api/execute', json={'code': 'z = [i for i in range(100)]'})
+
+
+@benchmark('api.variables', repeat=100,
+           setup=lambda: (_client(), _client().post('/api/execute', json={
+               'code': 'bench_vars = {f"k{i}": i for i in range(1000)}'})))
+def bench_api_variables(state):
+    client, _ = state
+    client.get('/api/variables')
+
+
+# ============================================
+# Running and comparing
+# ============================================
+
+def run_benchmark(bench: Benchmark, repeat: Optional[int] = None) -> Dict[str, Any]:
+    state = bench.setup()
+    bench.run(state)  # warm-up
+    samples = []
+    for _ in range(repeat or bench.repeat):
+        started = time.perf_counter_ns()
+        bench.run(state)
+        samples.append(time.perf_counter_ns() - started)
+    samples.sort()
+    ms = [s / 1e6 for s in samples]
+    return {
+        'repeat': len(ms),
+        'min_ms': round(ms[0], 4),
+        'median_ms': round(statistics.median(ms), 4),
+        'mean_ms': round(statistics.fmean(ms), 4),
+        'p95_ms': round(ms[min(len(ms) - 1, int(0.95 * len(ms)))], 4),
+        'max_ms': round(ms[-1], 4),
+    }
+
+
+def run_all(only: Optional[str] = None, repeat: Optional[int] = None) -> Dict[str, Any]:
+    results = {}
+    for bench in BENCHMARKS:
+        if only and only not in bench.name:
+            continue
+        if not bench.available():
+            results[bench.name] = {'skipped': True}
+            print(f'  {bench.name:<32} skipped', file=sys.stderr)
+            continue
+        # The interpreter and the app print debug output; keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[bench.name] = run_benchmark(bench, repeat)
+        print(f"  {bench.name:<32} {results[bench.name]['median_ms']:>10.3f} ms", file=sys.stderr)
+    return {
+        'created': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'benchmarks': results,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Per-benchmark median change against the baseline; 'regressed' marks the failures."""
+    rows = []
+    for name, current in results['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if current.get('skipped') or not before or before.get('skipped'):
+            continue
+        old, new = before['median_ms'], current['median_ms']
+        change = (new - old) / old if old else 0.0
+        rows.append({
+            'name': name,
+            'baseline_ms': old,
+            'median_ms': new,
+            'change': round(change, 4),
+            'regressed': change > threshold and new - old > NOISE_FLOOR_MS,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-o', '--output', default=RESULTS_FILE, help='where to write the JSON results')
+    parser.add_argument('--baseline', help=f'compare against this results file (default: {BASELINE_FILE} if present)')
+    parser.add_argument('--save-baseline', action='store_true', help='also store the results as the baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown of a median before it counts as a regression (0.25 = 25%%)')
+    parser.add_argument('-k', '--filter', help='only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, help='override the number of timed runs per benchmark')
+    args = parser.parse_args(argv)
+
+    baseline_path = args.baseline or (BASELINE_FILE if os.path.exists(BASELINE_FILE) else None)
+    print('Running benchmarks...', file=sys.stderr)
+    results = run_all(args.filter, args.repeat)
+
+    regressions = []
+    if baseline_path and not args.save_baseline:
+        with open(baseline_path) as f:
+            rows = compare(results, json.load(f), args.threshold)
+        results['comparison'] = {'baseline': baseline_path, 'threshold': args.threshold, 'rows': rows}
+        regressions = [r for r in rows if r['regressed']]
+        print(f'\nAgainst {baseline_path} (threshold {args.threshold:.0%}):', file=sys.stderr)
+        for r in rows:
+            flag = '  REGRESSED' if r['regressed'] else ''
+            print(f"  {r['name']:<32} {r['baseline_ms']:>10.3f} -> {r['median_ms']:>10.3f} ms "
+                  f"({r['change']:+.1%}){flag}", file=sys.stderr)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline or BASELINE_FILE, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f'\nResults written to {args.output}', file=sys.stderr)
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) regressed', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
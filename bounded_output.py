@@ -0,0 +1,382 @@
+"""
+Bounded Output
+A capture buffer whose memory stays flat however much a cell prints. The
+first HEAD_BYTES and last TAIL_BYTES of the stream are kept in memory. Once
+the stream outgrows them, all of it is spilled to a file in the session
+workspace (OutputSpool), and /api/output/<id> pages through that file. The
+result text holds the head and tail joined by a marker and reports how many
+bytes were left out.
+"""
+
+import io
+import os
+import re
+import reprlib
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+HEAD_BYTES = int(os.environ.get('INTERPRETER_OUTPUT_HEAD', 64 * 1024))
+TAIL_BYTES = int(os.environ.get('INTERPRETER_OUTPUT_TAIL', 64 * 1024))
+# Spill files are capped too; past this only the in-memory tail keeps up
+SPILL_MAX_BYTES = int(os.environ.get('INTERPRETER_OUTPUT_SPILL_MAX', 256 * 1024 ** 2))
+# Spilled outputs kept per session (the oldest are deleted first)
+KEEP_SPILLS = 20
+PAGE_BYTES = 64 * 1024
+MAX_PAGE_BYTES = 1024 ** 2
+# Containers longer than this are rendered with reprlib for execute_line results
+RESULT_ITEMS = 1000
+
+_OUTPUT_ID = re.compile(r'^[0-9a-f]{8,32}$')
+
+
+def _nbytes(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode('utf-8', 'surrogatepass'))
+
+
+def _cut_head(text: str, nbytes: int) -> str:
+    """The longest prefix of text that fits in nbytes of UTF-8."""
+    if text.isascii():
+        return text[:nbytes]
+    return text.encode('utf-8', 'surrogatepass')[:nbytes].decode('utf-8', 'ignore')
+
+
+def _cut_tail(text: str, nbytes: int) -> str:
+    """The longest suffix of text that fits in nbytes of UTF-8."""
+    if nbytes <= 0:
+        return ''
+    if text.isascii():
+        return text[-nbytes:]
+    return text.encode('utf-8', 'surrogatepass')[-nbytes:].decode('utf-8', 'ignore')
+
+
+class OutputSpool:
+    """
+    Spilled outputs of one session: <workspace>/.output/<id>.txt. The
+    directory is hidden (not listed as a user file, but counted against the
+    workspace quota); only the last KEEP_SPILLS are kept.
+    """
+
+    def __init__(self, directory: str, keep: int = KEEP_SPILLS):
+        self.directory = directory
+        self.keep = keep
+        self._writing = set()
+        self._lock = threading.Lock()
+
+    def path(self, output_id: str) -> Optional[str]:
+        if not _OUTPUT_ID.match(output_id or ''):
+            return None
+        return os.path.join(self.directory, f'{output_id}.txt')
+
+    def create(self) -> Tuple[str, Any]:
+        """A new spill file: (output_id, binary file open for writing)."""
+        os.makedirs(self.directory, exist_ok=True)
+        # Time-ordered so pruning keeps the newest
+        output_id = f'{time.time_ns() // 1000:x}{secrets.token_hex(2)}'
+        f = open(self.path(output_id), 'wb')
+        with self._lock:
+            self._writing.add(output_id)
+        self._prune()
+        return output_id, f
+
+    def finished(self, output_id: str):
+        with self._lock:
+            self._writing.discard(output_id)
+
+    def _prune(self):
+        try:
+            names = sorted(n for n in os.listdir(self.directory) if n.endswith('.txt'))
+        except OSError:
+            return
+        for name in names[:max(0, len(names) - self.keep)]:
+            if name[:-4] in self._writing:
+                continue
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def read(self, output_id: str, offset: int = 0, limit: int = PAGE_BYTES) -> Optional[Dict[str, Any]]:
+        """
+        One page of a spilled output: {'output_id', 'offset', 'next_offset',
+        'size', 'text', 'complete'}. Pages end on a character boundary, so
+        following next_offset never splits a character. None if unknown.
+        """
+        path = self.path(output_id)
+        if path is None or not os.path.isfile(path):
+            return None
+        # At least one whole character per page
+        limit = max(4, min(limit, MAX_PAGE_BYTES))
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            offset = max(0, min(offset, size))
+            f.seek(offset)
+            data = f.read(limit)
+        # Drop a trailing partial UTF-8 sequence; the next page starts with it
+        end = len(data)
+        for back in range(1, min(4, len(data)) + 1):
+            byte = data[-back]
+            if byte < 0x80:
+                break
+            if byte >= 0xC0:
+                length = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+                if back < length:
+                    end = len(data) - back
+                break
+        with self._lock:
+            complete = output_id not in self._writing
+        return {
+            'output_id': output_id,
+            'offset': offset,
+            'next_offset': offset + end,
+            'size': size,
+            'text': data[:end].decode('utf-8', 'replace'),
+            'complete': complete and offset + end >= size,
+        }
+
+
+class BoundedBuffer(io.TextIOBase):
+    """
+    Text stream (write/getvalue, like io.StringIO) that keeps the first
+    head_bytes and last tail_bytes written. With a spool, the full stream is
+    copied to a spill file from the moment anything would be dropped.
+
+    A write only appends to an intake list (atomic, so writers on several
+    threads need no lock); the intake is sorted into head and tail in
+    batches of BATCH_CHARS. Past the head, text is again only collected
+    until it reaches tail_bytes, when the tail is cut and the spill file
+    written, so a print costs an append, not a trim.
+    """
+
+    BATCH_CHARS = 8192
+
+    def __init__(self, spool: Optional[OutputSpool] = None, head_bytes: int = HEAD_BYTES,
+                 tail_bytes: int = TAIL_BYTES, spill_max_bytes: int = SPILL_MAX_BYTES):
+        self.spool = spool
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_max_bytes = spill_max_bytes
+        self.total_bytes = 0
+        # Characters written, for readers that follow the stream by position
+        self.total_chars = 0
+        self.output_id: Optional[str] = None
+        self._head = []
+        self._head_size = 0
+        self._head_full = head_bytes <= 0
+        # The tail so far is _kept (at most tail_bytes) followed by _pending
+        self._kept = ''
+        self._kept_size = 0
+        self._pending = []
+        self._pending_size = 0
+        self._spill = None
+        self._spilled = 0
+        # Written but not yet sorted into head and tail
+        self._incoming = []
+        self._incoming_chars = 0
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            raise TypeError(f'string argument expected, got {type(text).__name__!r}')
+        self._incoming.append(text)
+        # A lost update between threads only moves the next batch a little
+        self._incoming_chars += len(text)
+        if self._incoming_chars >= self.BATCH_CHARS:
+            with self._lock:
+                self._absorb()
+        return len(text)
+
+    def _absorb(self):
+        """Sort the intake into head and tail (lock held); writes may keep arriving meanwhile."""
+        count = len(self._incoming)
+        if not count:
+            return
+        text = ''.join(self._incoming[:count])
+        del self._incoming[:count]
+        self._incoming_chars = 0
+        self._add(text)
+
+    def _add(self, text: str):
+        n = len(text) if text.isascii() else _nbytes(text)
+        self.total_bytes += n
+        self.total_chars += len(text)
+        if not self._head_full:
+            room = self.head_bytes - self._head_size
+            if n < room:
+                self._head.append(text)
+                self._head_size += n
+                return
+            # The head ends inside this write (short of head_bytes if a character straddles it)
+            self._head_full = True
+            part = _cut_head(text, room)
+            self._head.append(part)
+            self._head_size += _nbytes(part)
+            rest = text[len(part):]
+            self._pending.append(rest)
+            self._pending_size += n - _nbytes(part)
+        else:
+            self._pending.append(text)
+            self._pending_size += n
+        if self._pending_size >= self.tail_bytes:
+            self._compact()
+
+    def _compact(self):
+        """Fold the pending text into the tail, spilling whatever the tail drops."""
+        pending = ''.join(self._pending)
+        tail = self._kept + pending
+        tail_size = self._kept_size + self._pending_size
+        self._pending, self._pending_size = [], 0
+        if tail_size > self.tail_bytes and self._spill is None and self.output_id is None \
+                and self.spool is not None:
+            # First drop: everything so far is still in memory
+            self._start_spill(''.join(self._head) + self._kept)
+        if self._spill is not None:
+            self._write_spill(pending)
+        if tail_size <= self.tail_bytes:
+            self._kept, self._kept_size = tail, tail_size
+            return
+        self._kept = _cut_tail(tail, self.tail_bytes)
+        self._kept_size = _nbytes(self._kept)
+
+    def _start_spill(self, written: str):
+        try:
+            self.output_id, self._spill = self.spool.create()
+        except OSError:
+            # No spill (e.g. read-only disk): the head and tail are still kept
+            self.output_id, self._spill, self.spool = None, None, None
+            return
+        self._write_spill(written)
+
+    def _write_spill(self, text: str):
+        room = self.spill_max_bytes - self._spilled
+        if room <= 0:
+            return
+        data = text.encode('utf-8', 'surrogatepass')
+        if len(data) > room:
+            data = _cut_head(text, room).encode('utf-8', 'surrogatepass')
+        self._spill.write(data)
+        self._spilled += len(data)
+
+    def _snapshot(self) -> Tuple[str, str, int, int]:
+        """(head, tail, bytes omitted between them, characters written in all)."""
+        with self._lock:
+            self._absorb()
+            head = ''.join(self._head)
+            tail = self._kept + ''.join(self._pending)
+            tail_size = self._kept_size + self._pending_size
+            total = self.total_bytes
+            chars = self.total_chars
+        if tail_size > self.tail_bytes:
+            tail = _cut_tail(tail, self.tail_bytes)
+            tail_size = _nbytes(tail)
+        return head, tail, total - self._head_size - tail_size, chars
+
+    @property
+    def truncated_bytes(self) -> int:
+        return self._snapshot()[2]
+
+    def _marker(self, omitted: int) -> str:
+        where = f'; full output: /api/output/{self.output_id}' if self.output_id else ''
+        return f'\n... [{omitted:,} bytes omitted{where}] ...\n'
+
+    def getvalue(self) -> str:
+        head, tail, omitted, _ = self._snapshot()
+        if not omitted:
+            return head + tail
+        return f'{head}{self._marker(omitted)}{tail}'
+
+    def read_from(self, offset: int) -> Tuple[str, int]:
+        """
+        (text written from character `offset` on, offset to resume from). A
+        reader that fell behind into the dropped middle gets the omission
+        marker in its place, followed by the tail.
+        """
+        head, tail, omitted, total = self._snapshot()
+        if not omitted:
+            return (head + tail)[offset:], total
+        tail_start = total - len(tail)
+        if offset >= tail_start:
+            return tail[offset - tail_start:], total
+        return head[offset:] + self._marker(omitted) + tail, total
+
+    def finish(self):
+        """Write out the pending text and close the spill file; the output can no longer grow."""
+        with self._lock:
+            self._absorb()
+            if self._pending:
+                self._compact()
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+                self.spool.finished(self.output_id)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            self._absorb()
+        return {
+            'total_bytes': self.total_bytes,
+            'truncated_bytes': self.truncated_bytes,
+            'spilled_bytes': self._spilled,
+            'output_id': self.output_id,
+        }
+
+
+def clip(text: str, head_bytes: int = HEAD_BYTES, tail_bytes: int = TAIL_BYTES) -> Tuple[str, int]:
+    """(text cut to its head and tail with a marker, bytes omitted)."""
+    if len(text) <= (head_bytes + tail_bytes) // 4:
+        return text, 0
+    buffer = BoundedBuffer(head_bytes=head_bytes, tail_bytes=tail_bytes)
+    buffer.write(text)
+    return buffer.getvalue(), buffer.truncated_bytes
+
+
+class _ResultRepr(reprlib.Repr):
+    """reprlib with roomy limits that keeps dict and set order (str() would render all of it)."""
+
+    def __init__(self):
+        super().__init__()
+        self.maxlevel = 6
+        self.maxlist = self.maxtuple = self.maxset = self.maxfrozenset = self.maxdeque = RESULT_ITEMS
+        self.maxdict = RESULT_ITEMS
+        self.maxstring = self.maxother = HEAD_BYTES
+        self.maxlong = 4300
+
+    def repr_dict(self, x, level):
+        if not x:
+            return '{}'
+        if level <= 0:
+            return '{...}'
+        pieces = []
+        for i, (k, v) in enumerate(x.items()):
+            if i == self.maxdict:
+                pieces.append('...')
+                break
+            pieces.append(f'{self.repr1(k, level - 1)}: {self.repr1(v, level - 1)}')
+        return '{' + ', '.join(pieces) + '}'
+
+    def repr_set(self, x, level):
+        return self._repr_iterable(x, level, '{', '}', self.maxset) if x else 'set()'
+
+    def repr_frozenset(self, x, level):
+        return self._repr_iterable(x, level, 'frozenset({', '})', self.maxfrozenset) if x else 'frozenset()'
+
+
+_result_repr = _ResultRepr()
+
+
+def result_text(value: Any) -> Tuple[str, int]:
+    """
+    str(value) for a REPL line, bounded: long containers are rendered with
+    reprlib instead of building their full str(), and the text is clipped.
+    Returns (text, bytes omitted by clipping).
+    """
+    if isinstance(value, (list, tuple, set, frozenset, dict)) and len(value) > RESULT_ITEMS:
+        text = _result_repr.repr(value)
+    else:
+        text = str(value)
+    return clip(text)
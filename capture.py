@@ -0,0 +1,141 @@
+"""
+Output Capture
+Routes writes to sys.stdout/sys.stderr to the right buffer when several
+things run at once: the foreground cell, background jobs and the session
+event loop. A write goes to, in order:
+
+1. the target of the current context for that stream (set with
+   `capture_to`; asyncio tasks inherit it from the cell or job that created
+   them),
+2. the target registered for the current thread (e.g. an event loop thread),
+3. the router's default stream (the foreground cell's buffer while a cell
+   runs, otherwise the real console).
+
+Targets are closed when their cell ends, so tasks that outlive a cell fall
+through to their thread's target instead of writing into a finished result.
+"""
+
+import contextvars
+import io
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class CaptureTarget:
+    """
+    A thread-safe text buffer output can be routed to until it is closed.
+    A buffer passed in must already be safe to write from several threads
+    (BoundedBuffer is) and is written to directly. Otherwise buffers come
+    from `factory` (default io.StringIO), are written through the target's
+    lock and can be swapped out with drain().
+    """
+
+    def __init__(self, buffer=None, factory=None):
+        self.closed = False
+        self._lock = threading.Lock()
+        self._factory = factory or io.StringIO
+        if buffer is None:
+            self.buffer = self._factory()
+        else:
+            self.buffer = buffer
+            self.write = buffer.write
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            return self.buffer.write(text)
+
+    def getvalue(self) -> str:
+        with self._lock:
+            return self.buffer.getvalue()
+
+    def drain(self):
+        """Start a fresh buffer and return the one written so far."""
+        with self._lock:
+            buffer, self.buffer = self.buffer, self._factory()
+        return buffer
+
+    def close(self):
+        self.closed = True
+
+
+# (stdout target, stderr target) of the current context
+_current: contextvars.ContextVar = contextvars.ContextVar('capture_targets', default=(None, None))
+_thread_targets: Dict[int, CaptureTarget] = {}
+
+STDOUT, STDERR = 0, 1
+
+
+def current_target(stream: int = STDOUT) -> Optional[CaptureTarget]:
+    target = _current.get()[stream]
+    if target is None or target.closed:
+        target = _thread_targets.get(threading.get_ident())
+    if target is None or target.closed:
+        return None
+    return target
+
+
+class StreamRouter(io.TextIOBase):
+    """File-like object that sends each write to current_target() or its default."""
+
+    def __init__(self, default, stream: int = STDOUT):
+        self.default = default
+        self.stream = stream
+
+    def write(self, text):
+        # Fast path, once per printed fragment: the context's own open target
+        target = _current.get()[self.stream]
+        if target is None or target.closed:
+            target = current_target(self.stream)
+            if target is None:
+                return self.default.write(text)
+        return target.write(text)
+
+    def flush(self):
+        flush = getattr(self.default, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def writable(self):
+        return True
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+
+def install_router():
+    """
+    Wrap the process streams once. Must be called while no cell has its own
+    stream installed (execute() restores whatever it found).
+    """
+    if not isinstance(sys.stdout, StreamRouter):
+        sys.stdout = StreamRouter(sys.stdout)
+    if not isinstance(sys.stderr, StreamRouter):
+        sys.stderr = StreamRouter(sys.stderr, STDERR)
+
+
+def push(target: CaptureTarget, errors: Optional[CaptureTarget] = None) -> contextvars.Token:
+    """Route this context's output (and that of tasks it starts) to target; stderr to errors or target."""
+    return _current.set((target, errors or target))
+
+
+def pop(token: contextvars.Token):
+    _current.reset(token)
+
+
+@contextmanager
+def capture_to(target: CaptureTarget, errors: Optional[CaptureTarget] = None):
+    token = push(target, errors)
+    try:
+        yield target
+    finally:
+        pop(token)
+
+
+def register_thread(target: CaptureTarget):
+    _thread_targets[threading.get_ident()] = target
+
+
+def unregister_thread():
+    _thread_targets.pop(threading.get_ident(), None)
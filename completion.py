@@ -0,0 +1,416 @@
+"""
+Code Completion
+Ranked completions for a cursor position, drawn from the live session
+namespace, names defined earlier in the document (dataflow.collect_defined),
+builtins and keywords, and the attributes of modules, classes and objects
+for `expr.` positions.
+
+Names are held in burst tries: prefix-trie nodes whose small subtrees are
+kept as sorted suffix buckets and only split ("burst") into child nodes
+once they grow, so a 100k-name namespace costs a few list entries per name
+instead of a node per character. The namespace trie is updated
+incrementally (only the names executed code binds or deletes are
+touched) and attribute tables of modules and classes are cached, so a
+lookup does work proportional to the completions returned, not to the
+namespace size.
+"""
+
+import ast
+import bisect
+import builtins
+import inspect
+import keyword
+import re
+import sys
+import textwrap
+import types
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from dataflow import BUILTIN_NAMES, collect_defined
+
+DEFAULT_LIMIT = 50
+BURST_SIZE = 64
+ATTR_CACHE_SIZE = 256
+
+KEYWORDS = frozenset(keyword.kwlist) | frozenset(getattr(keyword, 'softkwlist', ()))
+
+# Lower sorts first when candidates are ranked
+SOURCE_RANK = {'document': 0, 'namespace': 0, 'attribute': 0, 'keyword': 1, 'builtin': 2}
+
+_ATTRIBUTE_CONTEXT = re.compile(r'([A-Za-z_]\w*(?:\s*\.\s*[A-Za-z_]\w*)*)\s*\.\s*(\w*)$')
+_NAME_CONTEXT = re.compile(r'(\w*)$')
+_STRINGS = re.compile(r'''("""|\'\'\'|"|')(?:\\.|(?!\1).)*(\1|$)''')
+
+
+# ============================================
+# Burst trie
+# ============================================
+
+class _Node:
+    __slots__ = ('children', 'bucket', 'terminal')
+
+    def __init__(self, bucket: Optional[List[str]] = None):
+        self.children: Dict[str, '_Node'] = {}
+        # Sorted suffixes below this node until it bursts; None afterwards
+        self.bucket = bucket if bucket is not None else []
+        self.terminal = False
+
+
+def _child_order(char: str):
+    # Private (underscore-led) names after public ones, case-insensitively
+    return char == '_', char.lower(), char
+
+
+class PrefixTrie:
+    """A set of strings supporting ordered prefix enumeration."""
+
+    def __init__(self, names=()):
+        self.root = _Node()
+        self.size = 0
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return self.size
+
+    def _locate(self, name: str) -> Tuple[_Node, str]:
+        """Deepest node on name's path and the part of name below it."""
+        node, rest = self.root, name
+        while node.bucket is None and rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                break
+            node, rest = child, rest[1:]
+        return node, rest
+
+    def __contains__(self, name: str) -> bool:
+        node, rest = self._locate(name)
+        if node.bucket is None:
+            return not rest and node.terminal
+        i = bisect.bisect_left(node.bucket, rest)
+        return i < len(node.bucket) and node.bucket[i] == rest
+
+    def add(self, name: str) -> bool:
+        node, rest = self._locate(name)
+        if node.bucket is None:
+            if not rest:
+                added = not node.terminal
+                node.terminal = True
+                self.size += added
+                return added
+            node.children[rest[0]] = node = _Node()
+            rest = rest[1:]
+        i = bisect.bisect_left(node.bucket, rest)
+        if i < len(node.bucket) and node.bucket[i] == rest:
+            return False
+        node.bucket.insert(i, rest)
+        self.size += 1
+        if len(node.bucket) > BURST_SIZE:
+            self._burst(node)
+        return True
+
+    def _burst(self, node: _Node):
+        bucket, node.bucket = node.bucket, None
+        for suffix in bucket:
+            if not suffix:
+                node.terminal = True
+                continue
+            child = node.children.get(suffix[0])
+            if child is None:
+                child = node.children[suffix[0]] = _Node()
+            # bucket is sorted, so each child's bucket stays sorted
+            child.bucket.append(suffix[1:])
+        for child in node.children.values():
+            if len(child.bucket) > BURST_SIZE:
+                self._burst(child)
+
+    def discard(self, name: str) -> bool:
+        node, rest = self._locate(name)
+        if node.bucket is None:
+            if rest or not node.terminal:
+                return False
+            node.terminal = False
+        else:
+            i = bisect.bisect_left(node.bucket, rest)
+            if i == len(node.bucket) or node.bucket[i] != rest:
+                return False
+            del node.bucket[i]
+        self.size -= 1
+        return True
+
+    def complete(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[str]:
+        """Up to limit names starting with prefix, public before private."""
+        node, rest = self._locate(prefix)
+        if node.bucket is None and rest:
+            return []
+        base = prefix[:len(prefix) - len(rest)]
+        out = []
+        for name in self._walk(node, base, rest):
+            out.append(name)
+            if len(out) >= limit:
+                break
+        return out
+
+    def _walk(self, node: _Node, path: str, rest: str = '') -> Iterator[str]:
+        if node.bucket is not None:
+            start = bisect.bisect_left(node.bucket, rest)
+            matches = []
+            for suffix in node.bucket[start:]:
+                if not suffix.startswith(rest):
+                    break
+                matches.append(suffix)
+            matches.sort(key=lambda s: (s[:1] == '_', s.lower()))
+            for suffix in matches:
+                yield path + suffix
+            return
+        if node.terminal:
+            yield path
+        for char in sorted(node.children, key=_child_order):
+            yield from self._walk(node.children[char], path + char)
+
+
+# ============================================
+# Completer
+# ============================================
+
+STATIC_NAMES = PrefixTrie(BUILTIN_NAMES | KEYWORDS)
+
+
+def kind_of(value: Any) -> str:
+    if isinstance(value, types.ModuleType):
+        return 'module'
+    if isinstance(value, type):
+        return 'class'
+    if callable(value):
+        return 'function'
+    return 'variable'
+
+
+class Completer:
+    """Completion index of one session."""
+
+    def __init__(self):
+        self.names = PrefixTrie()
+        self._indexed: Set[str] = set()
+        self._synced_version = None
+        # Code executed since the last sync; the names it binds or deletes are re-checked
+        self._pending: List[str] = []
+        self._pending_names: Set[str] = set()
+        # (id, attribute count) -> (object, trie); the object is held so its id can't be reused
+        self._attributes: 'OrderedDict[Tuple[int, int], Tuple[Any, PrefixTrie]]' = OrderedDict()
+
+    def note_code(self, code: str):
+        """Record executed code; its bound and deleted names are re-checked on the next sync."""
+        self._pending.append(code)
+
+    def note_names(self, names):
+        self._pending_names.update(names)
+
+    def sync(self, namespace: Dict[str, Any], version: Any = None):
+        """
+        Bring the namespace trie up to date. Only names the noted code binds
+        or deletes are looked at, unless the namespace size then still
+        disagrees with the index (star imports, globals() writes, %load...),
+        in which case the whole key set is diffed.
+        """
+        if version is not None and version == self._synced_version:
+            return
+        touched = self._pending_names
+        for code in self._pending:
+            touched |= _touched_names(code)
+        self._pending, self._pending_names = [], set()
+        for name in touched:
+            if name in namespace:
+                if name not in self._indexed:
+                    self.names.add(name)
+                    self._indexed.add(name)
+            elif name in self._indexed:
+                self.names.discard(name)
+                self._indexed.discard(name)
+        if len(self._indexed) != len(namespace) - ('__builtins__' in namespace):
+            current = namespace.keys()
+            for name in current - self._indexed:
+                if name != '__builtins__':
+                    self.names.add(name)
+            for name in self._indexed - current:
+                self.names.discard(name)
+            self._indexed = set(current) - {'__builtins__'}
+        self._synced_version = version
+
+    def _attribute_table(self, obj: Any) -> PrefixTrie:
+        if isinstance(obj, (types.ModuleType, type)):
+            key = (id(obj), len(vars(obj)))
+            cached = self._attributes.get(key)
+            if cached is not None and cached[0] is obj:
+                self._attributes.move_to_end(key)
+                return cached[1]
+            table = PrefixTrie(_safe_dir(obj))
+            self._attributes[key] = (obj, table)
+            if len(self._attributes) > ATTR_CACHE_SIZE:
+                self._attributes.popitem(last=False)
+            return table
+        # Instances: their class's cached table plus their own attributes
+        table = self._attribute_table(type(obj))
+        own = getattr(obj, '__dict__', None)
+        if isinstance(own, dict) and own:
+            table = PrefixTrie(list(own) + table.complete('', limit=10 ** 6))
+        return table
+
+    def complete(self, code: str, line: int, ch: int, namespace: Dict[str, Any],
+                 version: Any = None, limit: int = DEFAULT_LIMIT) -> Dict[str, Any]:
+        """
+        Completions at (line, ch) (0-based, CodeMirror-style) of code. Returns
+        {'completions': [{'name', 'kind', 'source', 'type'?}], 'prefix', 'from': {line, ch}, 'to': {line, ch}}.
+        """
+        lines = code.split('\n')
+        line = max(0, min(line, len(lines) - 1))
+        before = lines[line][:max(0, ch)]
+        ch = len(before)
+        reply = {'completions': [], 'prefix': '', 'from': {'line': line, 'ch': ch}, 'to': {'line': line, 'ch': ch}}
+        if in_comment_or_string(before):
+            return reply
+
+        self.sync(namespace, version)
+        document = document_names(lines[:line])
+
+        attribute = _ATTRIBUTE_CONTEXT.search(before)
+        if attribute:
+            prefix = attribute.group(2)
+            base = resolve_expression(attribute.group(1), namespace, document)
+            candidates = []
+            if base is not MISSING:
+                for name in self._attribute_table(base).complete(prefix, limit):
+                    candidates.append((name, 'attribute', _attribute_kind(base, name)))
+        else:
+            prefix = _NAME_CONTEXT.search(before).group(1)
+            if prefix[:1].isdigit():
+                return reply
+            candidates = self._name_candidates(prefix, namespace, document, limit)
+
+        ranked = sorted(candidates, key=lambda c: (c[0][:1] == '_', c[0].startswith('__'),
+                                                   SOURCE_RANK[c[1]], len(c[0]), c[0].lower()))
+        reply['completions'] = [{'name': n, 'source': s, 'kind': k} for n, s, k in ranked[:limit]]
+        reply['prefix'] = prefix
+        reply['from'] = {'line': line, 'ch': ch - len(prefix)}
+        return reply
+
+    def _name_candidates(self, prefix: str, namespace: Dict[str, Any], document: Dict[str, Optional[str]],
+                         limit: int) -> List[Tuple[str, str, str]]:
+        candidates = []
+        seen = set()
+        for name in self.names.complete(prefix, limit):
+            seen.add(name)
+            candidates.append((name, 'namespace', kind_of(namespace.get(name))))
+        for name in sorted(document):
+            if name.startswith(prefix) and name not in seen:
+                seen.add(name)
+                candidates.append((name, 'document', 'module' if document[name] else 'variable'))
+        for name in STATIC_NAMES.complete(prefix, limit):
+            if name not in seen:
+                if name in KEYWORDS:
+                    candidates.append((name, 'keyword', 'keyword'))
+                else:
+                    candidates.append((name, 'builtin', kind_of(getattr(builtins, name, None))))
+        return candidates
+
+
+# ============================================
+# Helpers
+# ============================================
+
+# resolve_expression() result for names that cannot be resolved without running code
+MISSING = object()
+
+
+def _safe_dir(obj: Any) -> List[str]:
+    try:
+        return [name for name in dir(obj) if isinstance(name, str)]
+    except Exception:
+        return list(getattr(obj, '__dict__', {}))
+
+
+def _touched_names(code: str) -> Set[str]:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        # Magics and the like: left to the size check in sync()
+        return set()
+    names = collect_defined(tree)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Delete):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    names.add(target.id)
+    return names
+
+
+def in_comment_or_string(before: str) -> bool:
+    stripped = _STRINGS.sub(lambda m: '""' if m.group(2) else '"', before)
+    if '#' in stripped:
+        return True
+    # An unterminated literal was reduced to a lone quote
+    return stripped.count('"') % 2 == 1
+
+
+def document_names(lines: List[str]) -> Dict[str, Optional[str]]:
+    """Names defined before the cursor line -> imported module name (or None)."""
+    text = '\n'.join(lines)
+    try:
+        trees = [ast.parse(text)]
+    except SyntaxError:
+        # The document is mid-edit: fall back to whatever lines parse alone
+        trees = []
+        for source in lines:
+            try:
+                trees.append(ast.parse(textwrap.dedent(source)))
+            except SyntaxError:
+                continue
+    names: Dict[str, Optional[str]] = {}
+    for tree in trees:
+        for name in collect_defined(tree, nested=True):
+            names.setdefault(name, None)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        names[alias.asname] = alias.name
+                    else:
+                        names[alias.name.split('.')[0]] = alias.name.split('.')[0]
+    return names
+
+
+def resolve_expression(expression: str, namespace: Dict[str, Any], document: Dict[str, Optional[str]]) -> Any:
+    """The object a dotted name refers to, without running properties or calls."""
+    parts = [p.strip() for p in expression.split('.')]
+    head = parts[0]
+    if head in namespace:
+        obj = namespace[head]
+    elif document.get(head) in sys.modules:
+        # Imported in the document but not run yet: only if already loaded
+        obj = sys.modules[document[head]]
+    elif head in BUILTIN_NAMES:
+        obj = getattr(builtins, head)
+    else:
+        return MISSING
+    for part in parts[1:]:
+        try:
+            if isinstance(obj, types.ModuleType):
+                obj = getattr(obj, part)
+            else:
+                obj = inspect.getattr_static(obj, part)
+                if isinstance(obj, (property, staticmethod, classmethod)) or (
+                        hasattr(obj, '__get__') and not callable(obj) and not isinstance(obj, type)):
+                    return MISSING
+        except AttributeError:
+            return MISSING
+    return obj
+
+
+def _attribute_kind(base: Any, name: str) -> str:
+    try:
+        if isinstance(base, types.ModuleType):
+            return kind_of(getattr(base, name))
+        return kind_of(inspect.getattr_static(base, name))
+    except AttributeError:
+        return 'variable'
@@ -0,0 +1,322 @@
+"""
+Data Export
+Streams session values out in bulk formats (CSV, JSON lines, NPY, Parquet)
+chunk by chunk, so large results never have to be built as one string.
+numpy buffers are sent as memoryview slices of the array itself (no copy)
+when the array is contiguous; Parquet output uses pyarrow when installed.
+"""
+
+import csv
+import io
+from typing import Any, Iterator, Tuple
+
+from wire_format import dumps_json
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Optional: Parquet export is unavailable without it
+    pa = pq = None
+
+
+CHUNK_ROWS = 50000
+NPY_CHUNK_BYTES = 1 << 20
+# Both CSV paths (pandas and the csv module) end rows the same way
+CSV_LINE_END = '\n'
+
+FORMATS = {
+    # format: (mimetype, file extension)
+    'csv': ('text/csv', 'csv'),
+    'json-lines': ('application/x-ndjson', 'jsonl'),
+    'npy': ('application/octet-stream', 'npy'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class ExportError(ValueError):
+    """Raised when a value cannot be exported in the requested format."""
+
+
+# ============================================
+# Row sources
+# ============================================
+
+def _is_frame(value):
+    return pd is not None and isinstance(value, (pd.DataFrame, pd.Series))
+
+
+def _is_array(value):
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def _record_rows(value) -> Tuple[list, Any]:
+    """
+    Return (columns, row_chunks) for non-pandas values, where row_chunks yields
+    lists of row tuples/lists. Dict rows are emitted as dicts.
+    """
+    if _is_array(value):
+        if value.ndim == 0:
+            value = value.reshape(1)
+        if value.dtype.names:
+            columns = list(value.dtype.names)
+        elif value.ndim == 1:
+            columns = ['value']
+        else:
+            columns = [str(i) for i in range(value.shape[1])]
+
+        def chunks():
+            for start in range(0, len(value), CHUNK_ROWS):
+                block = value[start:start + CHUNK_ROWS]
+                if value.dtype.names:
+                    yield [tuple(r) for r in block.tolist()]
+                elif value.ndim == 1:
+                    yield [(v,) for v in block.tolist()]
+                else:
+                    yield block.tolist()
+        return columns, chunks()
+
+    if isinstance(value, dict):
+        items = value.items()
+
+        def chunks():
+            it = iter(items)
+            while True:
+                block = [r for _, r in zip(range(CHUNK_ROWS), it)]
+                if not block:
+                    return
+                yield block
+        return ['key', 'value'], chunks()
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        seq = value if isinstance(value, (list, tuple)) else list(value)
+        first = seq[0] if seq else None
+        if isinstance(first, dict):
+            columns = []
+            for row in seq[:CHUNK_ROWS]:
+                for k in row:
+                    if k not in columns:
+                        columns.append(k)
+        elif isinstance(first, (list, tuple)):
+            fields = getattr(first, '_fields', None)
+            columns = list(fields) if fields else [str(i) for i in range(len(first))]
+        else:
+            columns = ['value']
+
+        def chunks():
+            for start in range(0, len(seq), CHUNK_ROWS):
+                block = seq[start:start + CHUNK_ROWS]
+                if columns == ['value'] and not isinstance(first, (dict, list, tuple)):
+                    block = [(v,) for v in block]
+                yield block
+        return columns, chunks()
+
+    raise ExportError(f"Values of type '{type(value).__name__}' cannot be exported")
+
+
+# ============================================
+# Writers
+# ============================================
+
+def _csv_chunks(value) -> Iterator[bytes]:
+    if _is_frame(value):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        for start in range(0, max(len(frame), 1), CHUNK_ROWS):
+            chunk = frame.iloc[start:start + CHUNK_ROWS]
+            yield chunk.to_csv(header=start == 0, lineterminator=CSV_LINE_END).encode('utf-8')
+        return
+
+    columns, chunks = _record_rows(value)
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator=CSV_LINE_END)
+    writer.writerow(columns)
+    for block in chunks:
+        if block and isinstance(block[0], dict):
+            writer.writerows([[row.get(c, '') for c in columns] for row in block])
+        else:
+            writer.writerows(block)
+        yield buf.getvalue().encode('utf-8')
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode('utf-8')
+
+
+def _jsonl_chunks(value) -> Iterator[bytes]:
+    if _is_frame(value):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        for start in range(0, len(frame), CHUNK_ROWS):
+            text = frame.iloc[start:start + CHUNK_ROWS].to_json(orient='records', lines=True)
+            yield text.encode('utf-8') + (b'' if text.endswith('\n') else b'\n')
+        return
+
+    columns, chunks = _record_rows(value)
+    for block in chunks:
+        if block and isinstance(block[0], dict):
+            lines = [dumps_json(row) for row in block]
+        elif columns == ['value']:
+            lines = [dumps_json(row[0]) for row in block]
+        else:
+            lines = [dumps_json(dict(zip(columns, row))) for row in block]
+        yield b'\n'.join(lines) + b'\n'
+
+
+def _npy_chunks(value) -> Iterator[bytes]:
+    if _is_frame(value):
+        value = value.to_numpy()
+    elif not _is_array(value):
+        if np is None:
+            raise ExportError('NPY export requires numpy')
+        value = np.asarray(value)
+    if value.dtype.hasobject:
+        raise ExportError('Arrays with object dtype cannot be exported as NPY')
+
+    header = io.BytesIO()
+    header_data = np.lib.format.header_data_from_array_1_0(value)
+    if _needs_npy_v2(header_data):
+        np.lib.format.write_array_header_2_0(header, header_data)
+    else:
+        np.lib.format.write_array_header_1_0(header, header_data)
+    yield header.getvalue()
+
+    if value.flags.c_contiguous or value.flags.f_contiguous:
+        # Header records the memory order, so the raw buffer can be sent as-is
+        flat = value.T if not value.flags.c_contiguous else value
+        raw = memoryview(flat.reshape(-1).view(np.uint8))
+        for start in range(0, len(raw), NPY_CHUNK_BYTES):
+            yield raw[start:start + NPY_CHUNK_BYTES]
+    else:
+        # Strided views have to be copied, one slab of rows at a time
+        rows_per_chunk = max(1, NPY_CHUNK_BYTES // max(1, value[:1].nbytes))
+        for start in range(0, len(value), rows_per_chunk):
+            yield np.ascontiguousarray(value[start:start + rows_per_chunk]).tobytes()
+
+
+def _needs_npy_v2(header_data) -> bool:
+    # Format 1.0 headers are limited to 65535 bytes (only huge structured dtypes exceed it)
+    return len(repr(header_data)) > 60000
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that collects bytes until they are drained."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_chunks(value) -> Iterator[bytes]:
+    if pa is None:
+        raise ExportError('Parquet export requires pyarrow (pip install pyarrow)')
+
+    if _is_frame(value):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        # Inferred from the whole frame: a chunk that happens to be all None
+        # (or all ints in a float column) must not pick its own column types
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        batches = (pa.Table.from_pandas(frame.iloc[s:s + CHUNK_ROWS], schema=schema, preserve_index=False)
+                   for s in range(0, len(frame), CHUNK_ROWS))
+    else:
+        columns, chunks = _record_rows(value)
+        names = [str(c) for c in columns]
+        # Records carry no types up front: the first chunk's schema is used
+        schema = None
+
+        def tables():
+            for block in chunks:
+                if block and isinstance(block[0], dict):
+                    yield pa.Table.from_pylist([{str(c): row.get(c) for c in columns} for row in block])
+                else:
+                    yield pa.Table.from_arrays([pa.array(list(col)) for col in zip(*block)], names=names)
+        batches = tables()
+
+    sink = _ChunkSink()
+    writer = None
+    try:
+        for table in batches:
+            if writer is None:
+                if schema is None:
+                    schema = table.schema
+                writer = pq.ParquetWriter(sink, schema)
+            elif not table.schema.equals(schema):
+                table = table.cast(schema)
+            writer.write_table(table)
+            # One row group per chunk; send it as soon as it is written
+            data = sink.drain()
+            if data:
+                yield data
+        if writer is None:
+            # No rows: still a valid file, with the columns and no row groups
+            if schema is None:
+                schema = pa.schema([(name, pa.null()) for name in names])
+            writer = pq.ParquetWriter(sink, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+_WRITERS = {
+    'csv': _csv_chunks,
+    'json-lines': _jsonl_chunks,
+    'npy': _npy_chunks,
+    'parquet': _parquet_chunks,
+}
+
+
+def export(value: Any, fmt: str) -> Tuple[Iterator[bytes], str, str]:
+    """
+    Return (chunks, mimetype, extension) for streaming value in format fmt.
+    Raises ExportError before any bytes are produced if the export can't work.
+    """
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    if fmt == 'parquet' and pa is None:
+        raise ExportError('Parquet export requires pyarrow (pip install pyarrow)')
+    if fmt == 'npy' and np is None:
+        raise ExportError('NPY export requires numpy')
+    if not (_is_frame(value) or _is_array(value)):
+        # Validate up front so errors become a 400 instead of a broken stream
+        _record_rows(value)
+
+    chunks = _WRITERS[fmt](value)
+    # Prime the generator: errors raised before the first byte surface here
+    try:
+        first = next(chunks)
+    except StopIteration:
+        first = b''
+
+    def stream():
+        yield first
+        yield from chunks
+
+    mimetype, ext = FORMATS[fmt]
+    return stream(), mimetype, ext
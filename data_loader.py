@@ -0,0 +1,249 @@
+"""
+Data Loader
+Backend for the %read magic: loads CSV / JSON-lines files into pandas (or
+numpy) using every core available. pyarrow's multithreaded readers are used
+when installed; otherwise large CSVs are split at line boundaries and parsed
+by a process pool, and small files or unusual inputs fall back to chunked
+pandas. Progress is reported through a callback as bytes are consumed.
+"""
+
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, List, Optional, Tuple
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.json as pa_json
+except ImportError:
+    # Optional: the process-pool and pandas engines are used instead
+    pa = pa_csv = pa_json = None
+
+
+ENGINES = ('auto', 'pyarrow', 'process', 'pandas')
+OUTPUTS = ('pandas', 'numpy')
+DEFAULT_CHUNKSIZE = 200000            # rows per chunk for the pandas engine
+PROCESS_MIN_BYTES = 32 * 1024 * 1024  # below this a process pool isn't worth starting
+PROCESS_BLOCK_BYTES = 16 * 1024 * 1024
+ARROW_BLOCK_BYTES = 16 * 1024 * 1024
+PROGRESS_INTERVAL = 0.5               # seconds between progress reports
+
+Progress = Callable[[int, int], None]
+
+
+class LoadError(ValueError):
+    """Raised when a file cannot be read with the requested options."""
+
+
+_CODECS = {'.gz': 'gzip', '.bz2': 'bz2', '.zst': 'zstd'}
+
+
+def _codec(path: str) -> Optional[str]:
+    return _CODECS.get(os.path.splitext(path.lower())[1])
+
+
+def detect_format(path: str) -> str:
+    name = path.lower()
+    if _codec(name):
+        name = os.path.splitext(name)[0]
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'json-lines'
+    if name.endswith(('.tsv', '.tab')):
+        return 'tsv'
+    return 'csv'
+
+
+class _CountingReader(io.RawIOBase):
+    """Wraps a binary file and reports bytes read, throttled to PROGRESS_INTERVAL."""
+
+    def __init__(self, f, total: int, progress: Optional[Progress]):
+        super().__init__()
+        self._f = f
+        self._total = total
+        self._progress = progress
+        self._done = 0
+        self._last = 0.0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = self._f.readinto(b)
+        self._report(n or 0)
+        return n
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self._report(len(data))
+        return data
+
+    def _report(self, n: int):
+        self._done += n
+        now = time.monotonic()
+        if self._progress and now - self._last >= PROGRESS_INTERVAL:
+            self._last = now
+            self._progress(self._done, self._total)
+
+
+# ============================================
+# Engines
+# ============================================
+
+def _read_pyarrow(path: str, fmt: str, progress: Optional[Progress]):
+    total = os.path.getsize(path)
+    with open(path, 'rb') as raw:
+        source = _CountingReader(raw, total, progress)
+        if _codec(path):
+            source = pa.CompressedInputStream(pa.PythonFile(source, mode='r'), _codec(path))
+        if fmt == 'json-lines':
+            table = pa_json.read_json(source, read_options=pa_json.ReadOptions(
+                use_threads=True, block_size=ARROW_BLOCK_BYTES))
+        else:
+            parse = pa_csv.ParseOptions(delimiter='\t' if fmt == 'tsv' else ',',
+                                        newlines_in_values=True)
+            table = pa_csv.read_csv(source,
+                                    read_options=pa_csv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_BYTES),
+                                    parse_options=parse)
+    return table.to_pandas(use_threads=True)
+
+
+def _split_offsets(path: str, block: int, has_header: bool) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Header line (if any) plus (start, stop) byte ranges that each end on a newline."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline() if has_header else b''
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(start + block, size))
+            f.readline()
+            stop = min(f.tell(), size)
+            ranges.append((start, stop))
+            start = stop
+    return header, ranges
+
+
+def _parse_range(path: str, fmt: str, header: bytes, start: int, stop: int):
+    """Worker: parse one byte range of a CSV/JSON-lines file with pandas."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    if fmt == 'json-lines':
+        return pd.read_json(io.BytesIO(data), lines=True) if data.strip() else pd.DataFrame()
+    sep = '\t' if fmt == 'tsv' else ','
+    return pd.read_csv(io.BytesIO(header + data), sep=sep)
+
+
+def _read_process_pool(path: str, fmt: str, progress: Optional[Progress], workers: Optional[int] = None):
+    # Splitting on newlines assumes no quoted field contains a line break;
+    # the pyarrow engine handles those files
+    total = os.path.getsize(path)
+    header, ranges = _split_offsets(path, PROCESS_BLOCK_BYTES, has_header=fmt != 'json-lines')
+    if not ranges:
+        return _parse_range(path, fmt, header, 0, 0)
+    parts = [None] * len(ranges)
+    done = 0
+    last = 0.0
+    # The server is multithreaded, so workers must not be plain forks of it
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             mp_context=multiprocessing.get_context(method)) as pool:
+        futures = {pool.submit(_parse_range, path, fmt, header, a, b): i for i, (a, b) in enumerate(ranges)}
+        for future in as_completed(futures):
+            i = futures[future]
+            parts[i] = future.result()
+            done += ranges[i][1] - ranges[i][0]
+            now = time.monotonic()
+            if progress and now - last >= PROGRESS_INTERVAL:
+                last = now
+                progress(done, total)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _read_pandas(path: str, fmt: str, progress: Optional[Progress], chunksize: int):
+    total = os.path.getsize(path)
+    with open(path, 'rb') as raw:
+        source = _CountingReader(raw, total, progress)
+        compression = _codec(path)
+        if fmt == 'json-lines':
+            reader = pd.read_json(source, lines=True, chunksize=chunksize, compression=compression)
+        else:
+            reader = pd.read_csv(source, sep='\t' if fmt == 'tsv' else ',', chunksize=chunksize,
+                                 compression=compression)
+        with reader:
+            chunks = list(reader)
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def choose_engine(path: str, engine: str = 'auto') -> str:
+    """Resolve 'auto' to the fastest engine available for this file."""
+    if engine not in ENGINES:
+        raise LoadError(f"Unknown engine '{engine}'. Use one of: {', '.join(ENGINES)}")
+    if engine == 'pyarrow' and pa is None:
+        raise LoadError("The pyarrow engine requires pyarrow (pip install pyarrow)")
+    if engine == 'process' and _codec(path):
+        raise LoadError("The process engine can't split compressed files; use pyarrow or pandas")
+    if engine != 'auto':
+        return engine
+    if pa is not None:
+        return 'pyarrow'
+    if (not _codec(path) and (os.cpu_count() or 1) > 1
+            and os.path.getsize(path) >= PROCESS_MIN_BYTES):
+        return 'process'
+    return 'pandas'
+
+
+def read_file(path: str, engine: str = 'auto', chunksize: Optional[int] = None,
+              to: str = 'pandas', progress: Optional[Progress] = None) -> Tuple[Any, str]:
+    """
+    Load a CSV/TSV/JSON-lines file. Returns (value, engine_used).
+
+    `chunksize` sets the rows per chunk of the pandas engine (and implies it
+    when engine is 'auto', since only that engine reads in row chunks).
+    """
+    if pd is None:
+        raise LoadError('%read requires pandas')
+    if to not in OUTPUTS:
+        raise LoadError(f"Unknown output '{to}'. Use one of: {', '.join(OUTPUTS)}")
+    if chunksize is not None and chunksize <= 0:
+        raise LoadError('chunksize must be a positive number of rows')
+    if engine == 'auto' and chunksize:
+        engine = 'pandas'
+    engine = choose_engine(path, engine)
+    fmt = detect_format(path)
+
+    if progress:
+        # Engines may report the same position twice (e.g. at EOF); pass each on once
+        user_progress, last = progress, [-1]
+
+        def progress(done, total):
+            if done != last[0]:
+                last[0] = done
+                user_progress(done, total)
+
+    if engine == 'pyarrow':
+        frame = _read_pyarrow(path, fmt, progress)
+    elif engine == 'process':
+        frame = _read_process_pool(path, fmt, progress)
+    else:
+        frame = _read_pandas(path, fmt, progress, chunksize or DEFAULT_CHUNKSIZE)
+
+    if progress:
+        size = os.path.getsize(path)
+        progress(size, size)
+
+    if to == 'numpy':
+        if all(dtype.kind in 'biufc' for dtype in frame.dtypes):
+            return frame.to_numpy(), engine
+        return frame.to_records(index=False), engine
+    return frame, engine
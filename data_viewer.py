@@ -0,0 +1,402 @@
+"""
+Data Viewer
+Serves pages of large session values (DataFrames, Series, numpy arrays, lists,
+dicts, sets) on demand, with server-side sorting and filtering. pandas/numpy
+values are sliced, sorted and filtered with vectorized operations so only the
+requested page is ever converted to Python objects.
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10000
+# Cells that aren't plain scalars are shown as a repr cut to this length
+MAX_CELL_CHARS = 200
+
+# <column><op><value>, e.g. "age>=30", "name==Bob", "city~york" (case-insensitive contains)
+_FILTER_RE = re.compile(r'^\s*(?P<col>[^=!<>~]+?)\s*(?P<op>==|!=|>=|<=|>|<|~)\s*(?P<value>.*?)\s*$')
+
+
+class ViewerError(ValueError):
+    """Raised for a bad page request (unknown column, unsupported value type, bad filter)."""
+
+
+def _cell(value: Any) -> Any:
+    """Convert one cell to something JSON can carry."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value if not isinstance(value, str) or len(value) <= MAX_CELL_CHARS else value[:MAX_CELL_CHARS] + '…'
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else value
+    if np is not None and isinstance(value, np.generic):
+        return _cell(value.item())
+    text = repr(value)
+    return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS] + '…'
+
+
+def _parse_filter(spec: Optional[str]):
+    if not spec:
+        return None
+    m = _FILTER_RE.match(spec)
+    if not m:
+        raise ViewerError(f"Invalid filter '{spec}'. Use <column><op><value> with op one of == != > >= < <= ~")
+    return m.group('col'), m.group('op'), m.group('value')
+
+
+def _coerce(raw: str, sample: Any) -> Any:
+    """Convert the filter's text value to the type of the column it is compared with."""
+    if isinstance(sample, bool) or (np is not None and isinstance(sample, np.bool_)):
+        return raw.lower() in ('1', 'true', 'yes')
+    if isinstance(sample, (int, float)) or (np is not None and isinstance(sample, np.number)):
+        try:
+            return float(raw) if '.' in raw or 'e' in raw.lower() else int(raw)
+        except ValueError:
+            raise ViewerError(f"Filter value '{raw}' is not a number")
+    return raw
+
+
+def _compare(lhs, op: str, rhs):
+    """Apply a comparison operator; works element-wise on numpy/pandas operands too."""
+    if op == '==':
+        return lhs == rhs
+    if op == '!=':
+        return lhs != rhs
+    if op == '>':
+        return lhs > rhs
+    if op == '>=':
+        return lhs >= rhs
+    if op == '<':
+        return lhs < rhs
+    return lhs <= rhs
+
+
+def _page_bounds(offset: int, limit: Optional[int]):
+    offset = max(0, int(offset or 0))
+    limit = DEFAULT_LIMIT if limit is None else max(0, min(int(limit), MAX_LIMIT))
+    return offset, limit
+
+
+def _result(kind: str, total: int, offset: int, limit: int, columns: List[str],
+            rows: List[list], index: Optional[list] = None, dtypes: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    return {
+        'kind': kind,
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'columns': columns,
+        'dtypes': dtypes or {},
+        'index': index,
+        'rows': rows,
+    }
+
+
+# ============================================
+# pandas
+# ============================================
+
+def _page_dataframe(df, offset, limit, columns, sort, ascending, filt):
+    if columns:
+        missing = [c for c in columns if c not in df.columns.astype(str)]
+        if missing:
+            raise ViewerError(f"Unknown column(s): {', '.join(missing)}")
+
+    if filt:
+        col, op, raw = filt
+        series = _frame_column(df, col)
+        if op == '~':
+            mask = series.astype(str).str.contains(raw, case=False, regex=False, na=False)
+        else:
+            sample = series.dropna().iloc[0] if series.notna().any() else raw
+            mask = _compare(series, op, _coerce(raw, sample))
+        df = df[mask.to_numpy()]
+
+    total = len(df)
+    if sort:
+        key = _frame_column(df, sort).reset_index(drop=True)
+        needed = offset + limit
+        positions = None
+        if needed < total // 4 and pd.api.types.is_numeric_dtype(key.dtype) and not pd.api.types.is_bool_dtype(key.dtype):
+            # Top-k selection is O(n) instead of a full O(n log n) sort
+            picked = key.nsmallest(needed) if ascending else key.nlargest(needed)
+            if len(picked) == needed:
+                positions = picked.index.to_numpy()
+        if positions is None:
+            positions = key.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+        df = df.iloc[positions]
+
+    page = df.iloc[offset:offset + limit]
+    if columns:
+        # Filtering/sorting may use any column; only the page is narrowed
+        lookup = {str(c): c for c in page.columns}
+        page = page[[lookup[c] for c in columns]]
+    rows = [[_cell(v) for v in row] for row in page.itertuples(index=False, name=None)]
+    return _result('dataframe', total, offset, limit,
+                   [str(c) for c in page.columns], rows,
+                   index=[_cell(i) for i in page.index.tolist()],
+                   dtypes={str(c): str(t) for c, t in page.dtypes.items()})
+
+
+def _frame_column(df, name: str):
+    for c in df.columns:
+        if str(c) == name:
+            return df[c]
+    raise ViewerError(f"Unknown column: {name}")
+
+
+# ============================================
+# numpy
+# ============================================
+
+def _array_columns(arr):
+    if arr.dtype.names:
+        return list(arr.dtype.names)
+    if arr.ndim == 1:
+        return ['value']
+    return [str(i) for i in range(arr.shape[1])]
+
+
+def _array_column(arr, name: str):
+    if arr.dtype.names:
+        if name not in arr.dtype.names:
+            raise ViewerError(f"Unknown column: {name}")
+        return arr[name]
+    if arr.ndim == 1:
+        if name != 'value':
+            raise ViewerError(f"Unknown column: {name}")
+        return arr
+    try:
+        return arr[:, int(name)]
+    except (ValueError, IndexError):
+        raise ViewerError(f"Unknown column: {name}")
+
+
+def _page_ndarray(arr, offset, limit, columns, sort, ascending, filt):
+    if arr.ndim == 0:
+        arr = arr.reshape(1)
+    all_columns = _array_columns(arr)
+
+    rows_idx = None  # None means "all rows in natural order"
+    if filt:
+        col, op, raw = filt
+        key = _array_column(arr, col)
+        if op == '~':
+            mask = np.char.find(np.char.lower(key.astype(str)), raw.lower()) >= 0
+        else:
+            sample = key.flat[0] if key.size else raw
+            mask = _compare(key, op, _coerce(raw, sample))
+        rows_idx = np.flatnonzero(mask)
+
+    total = len(arr) if rows_idx is None else len(rows_idx)
+    if sort:
+        key = _array_column(arr, sort)
+        if rows_idx is not None:
+            key = key[rows_idx]
+        order = _sort_order(key, min(offset + limit, total), ascending)
+        rows_idx = order if rows_idx is None else rows_idx[order]
+
+    if rows_idx is None:
+        positions = np.arange(offset, min(offset + limit, total))
+    else:
+        positions = rows_idx[offset:offset + limit]
+    page = arr[positions]
+
+    if columns:
+        unknown = [c for c in columns if c not in all_columns]
+        if unknown:
+            raise ViewerError(f"Unknown column(s): {', '.join(unknown)}")
+    shown = columns or all_columns
+
+    if arr.dtype.names:
+        data = [page[c].tolist() for c in shown]
+        rows = [[_cell(v) for v in r] for r in zip(*data)] if data else []
+    elif arr.ndim == 1:
+        rows = [[_cell(v)] for v in page.tolist()]
+    else:
+        sub = page[:, [int(c) for c in shown]] if columns else page
+        if sub.ndim > 2:
+            rows = [[_cell(v) for v in r] for r in sub]
+        else:
+            rows = [[_cell(v) for v in r] for r in sub.tolist()]
+    return _result('ndarray', total, offset, limit, list(shown), rows,
+                   index=positions.tolist(),
+                   dtypes={c: str(arr.dtype[c] if arr.dtype.names else arr.dtype) for c in shown})
+
+
+def _descending(key):
+    """Stable descending argsort: ties keep their original order, as in pandas."""
+    return len(key) - 1 - np.argsort(key[::-1], kind='stable')[::-1]
+
+
+def _sort_order(key, needed: int, ascending: bool):
+    """
+    Positions of key in sort order (at least the first `needed`). Stable,
+    with NaN last in either direction like pandas' na_position='last'.
+    """
+    valid = missing = None
+    if np.issubdtype(key.dtype, np.floating):
+        nan = np.isnan(key)
+        if nan.any():
+            valid, missing = np.flatnonzero(~nan), np.flatnonzero(nan)
+            key = key[valid]
+    total = len(key)
+    numeric = np.issubdtype(key.dtype, np.integer) or np.issubdtype(key.dtype, np.floating)
+    if needed and needed < total // 4 and numeric:
+        # Partial selection of the first `needed` rows, then sort only those.
+        # Ties at the cut go to the earliest rows (pandas' keep='first')
+        if ascending:
+            kth = np.partition(key, needed - 1)[needed - 1]
+            before = np.flatnonzero(key < kth)
+        else:
+            kth = np.partition(key, total - needed)[total - needed]
+            before = np.flatnonzero(key > kth)
+        ties = np.flatnonzero(key == kth)[:needed - len(before)]
+        part = np.sort(np.concatenate([before, ties]))
+        order = part[np.argsort(key[part], kind='stable')] if ascending else part[_descending(key[part])]
+    else:
+        order = np.argsort(key, kind='stable') if ascending else _descending(key)
+    if valid is not None:
+        order = np.concatenate([valid[order], missing])
+    return order
+
+
+# ============================================
+# Plain Python containers
+# ============================================
+
+def _page_records(items: list, kind: str, offset, limit, columns, sort, ascending, filt):
+    """Lists/tuples (of dicts, tuples or scalars) and dict items."""
+    dict_rows = bool(items) and all(isinstance(i, dict) for i in items[:100])
+
+    def getter(name):
+        if dict_rows:
+            return lambda item: item.get(name) if isinstance(item, dict) else None
+        if name == 'value':
+            return lambda item: item
+        try:
+            pos = int(name)
+        except ValueError:
+            raise ViewerError(f"Unknown column: {name}")
+        return lambda item: item[pos] if isinstance(item, (list, tuple)) and pos < len(item) else None
+
+    index = list(range(len(items)))
+    if filt:
+        col, op, raw = filt
+        get = getter(col)
+        sample = next((get(items[i]) for i in index if get(items[i]) is not None), raw)
+        rhs = raw.lower() if op == '~' else _coerce(raw, sample)
+
+        def keep(i):
+            v = get(items[i])
+            if op == '~':
+                return rhs in str(v).lower()
+            try:
+                return bool(_compare(v, op, rhs))
+            except TypeError:
+                return False
+        index = [i for i in index if keep(i)]
+
+    if sort:
+        get = getter(sort)
+        # None/NaN sort last regardless of direction, as in the pandas and numpy paths
+        present, missing = [], []
+        for i in index:
+            (missing if _is_missing(get(items[i])) else present).append(i)
+        present.sort(key=lambda i: _sortable(get(items[i])), reverse=not ascending)
+        index = present + missing
+
+    total = len(index)
+    page_idx = index[offset:offset + limit]
+    page = [items[i] for i in page_idx]
+
+    if dict_rows:
+        shown = list(columns) if columns else []
+        if not shown:
+            for item in page:
+                for k in item:
+                    if str(k) not in shown:
+                        shown.append(str(k))
+        lookup = [{str(k): v for k, v in item.items()} for item in page]
+        rows = [[_cell(r.get(c)) for c in shown] for r in lookup]
+    elif page and all(isinstance(i, (list, tuple)) for i in page):
+        width = max(len(i) for i in page)
+        shown = list(columns) if columns else [str(i) for i in range(width)]
+        rows = [[_cell(item[int(c)]) if int(c) < len(item) else None for c in shown] for item in page]
+    else:
+        shown = ['value']
+        rows = [[_cell(item)] for item in page]
+    return _result(kind, total, offset, limit, shown, rows, index=page_idx)
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _sortable(value):
+    # Mixed types (e.g. int and str) compare by type name first instead of raising
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, '', value)
+    return (1, type(value).__name__, value if isinstance(value, str) else repr(value))
+
+
+def page_value(value: Any, offset: int = 0, limit: Optional[int] = None,
+               columns: Optional[List[str]] = None, sort: Optional[str] = None,
+               ascending: bool = True, filter: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Return one page of `value` as {kind, total, offset, limit, columns, dtypes, index, rows}.
+
+    Args:
+        offset/limit: row window (limit defaults to DEFAULT_LIMIT, capped at MAX_LIMIT)
+        columns: subset of columns to include
+        sort: column to sort by before paging
+        ascending: sort direction
+        filter: "<column><op><value>" row filter (op: == != > >= < <= ~)
+    """
+    offset, limit = _page_bounds(offset, limit)
+    filt = _parse_filter(filter)
+
+    if pd is not None and isinstance(value, pd.DataFrame):
+        return _page_dataframe(value, offset, limit, columns, sort, ascending, filt)
+    if pd is not None and isinstance(value, pd.Series):
+        frame = value.to_frame(name=str(value.name) if value.name is not None else 'value')
+        result = _page_dataframe(frame, offset, limit, columns, sort, ascending, filt)
+        result['kind'] = 'series'
+        return result
+    if np is not None and isinstance(value, np.ndarray):
+        return _page_ndarray(value, offset, limit, columns, sort, ascending, filt)
+    if isinstance(value, dict):
+        items = [(k, v) for k, v in value.items()]
+        result = _page_records(items, 'dict', offset, limit, None,
+                               {'key': '0', 'value': '1'}.get(sort, sort),
+                               ascending,
+                               _rename_filter(filt))
+        result['columns'] = ['key', 'value']
+        if columns:
+            keep = [i for i, c in enumerate(['key', 'value']) if c in columns]
+            result['columns'] = [['key', 'value'][i] for i in keep]
+            result['rows'] = [[row[i] for i in keep] for row in result['rows']]
+        return result
+    if isinstance(value, (list, tuple)):
+        return _page_records(value, type(value).__name__, offset, limit, columns, sort, ascending, filt)
+    if isinstance(value, (set, frozenset)):
+        return _page_records(list(value), 'set', offset, limit, columns, sort, ascending, filt)
+    raise ViewerError(f"Values of type '{type(value).__name__}' cannot be paged")
+
+
+def _rename_filter(filt):
+    """Dict pages expose key/value columns; map them to item positions."""
+    if not filt:
+        return None
+    col, op, raw = filt
+    return {'key': '0', 'value': '1'}.get(col, col), op, raw
@@ -0,0 +1,314 @@
+"""
+Dataflow
+Def-use analysis for code cells and a dependency graph across them. When a
+cell is edited and re-submitted, only that cell and the cells downstream of
+the names it (re)defines are re-run, in dependency order; with reactive runs
+turned off the downstream cells are flagged stale instead. The name helpers
+here are also used by /api/validate_lines.
+"""
+
+import ast
+import builtins
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+BUILTIN_NAMES = frozenset(dir(builtins))
+
+
+# ============================================
+# Name analysis
+# ============================================
+
+def extract_target_names(target) -> List[str]:
+    """Names bound by an assignment target (handles tuples, names, attributes)."""
+    out = []
+    if isinstance(target, ast.Name):
+        out.append(target.id)
+    elif isinstance(target, (ast.Tuple, ast.List)):
+        for elt in target.elts:
+            out.extend(extract_target_names(elt))
+    elif isinstance(target, ast.Starred):
+        out.extend(extract_target_names(target.value))
+    elif isinstance(target, ast.Attribute):
+        # attribute assignment (obj.attr) - don't introduce a plain name
+        pass
+    return out
+
+
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+def _scope_walk(node):
+    """ast.walk that skips the bodies of functions, lambdas and classes (their own scopes)."""
+    todo = [node]
+    while todo:
+        n = todo.pop()
+        yield n
+        if isinstance(n, _SCOPES) and n is not node:
+            # Decorators, defaults, annotations and bases still run in this scope
+            body = [n.body] if isinstance(n, ast.Lambda) else n.body
+            todo.extend(c for c in ast.iter_child_nodes(n) if not any(c is b for b in body))
+        else:
+            todo.extend(ast.iter_child_nodes(n))
+
+
+def collect_defined(node, nested: bool = False) -> Set[str]:
+    """
+    Names (re)bound in node's own scope: assignments, defs, imports,
+    loop/with targets. Locals of functions, lambdas and classes defined in
+    node are left out, unless nested is True (completion wants them too).
+    """
+    names = set()
+    for n in (ast.walk(node) if nested else _scope_walk(node)):
+        if isinstance(n, ast.Assign):
+            for t in n.targets:
+                names.update(extract_target_names(t))
+        elif isinstance(n, (ast.AnnAssign, ast.AugAssign)):
+            names.update(extract_target_names(n.target))
+        elif isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(n.name)
+        elif isinstance(n, ast.Import):
+            for alias in n.names:
+                names.add(alias.asname or alias.name.split('.')[0])
+        elif isinstance(n, ast.ImportFrom):
+            for alias in n.names:
+                names.add(alias.asname or alias.name)
+        elif isinstance(n, (ast.For, ast.AsyncFor)):
+            names.update(extract_target_names(n.target))
+        elif isinstance(n, (ast.With, ast.AsyncWith)):
+            for item in n.items:
+                if item.optional_vars is not None:
+                    names.update(extract_target_names(item.optional_vars))
+        elif isinstance(n, ast.NamedExpr):
+            names.add(n.target.id)
+    return names
+
+
+def collect_used(node) -> Set[str]:
+    """Names read anywhere in node."""
+    used = set()
+
+    class NameCollector(ast.NodeVisitor):
+        def visit_Name(self, n):
+            if isinstance(n.ctx, ast.Load):
+                used.add(n.id)
+
+    NameCollector().visit(node)
+    return used
+
+
+def collect_free(tree) -> Set[str]:
+    """
+    Names a module reads before binding them itself, statement by statement:
+    in `x = f(a)\nprint(x)` only `f` and `a` are free (builtins included).
+    """
+    if not isinstance(tree, ast.Module):
+        return collect_used(tree)
+    free, bound = set(), set()
+    for stmt in tree.body:
+        free |= collect_used(stmt) - bound
+        bound |= collect_defined(stmt)
+    return free
+
+
+def _root_name(node) -> Optional[str]:
+    while isinstance(node, (ast.Attribute, ast.Subscript)):
+        node = node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def collect_mutated(tree) -> Set[str]:
+    """
+    Names whose objects a cell may change in place: `x.a = ...`, `x[i] = ...`,
+    `del x[i]`, and statement-level method calls such as `x.append(1)`.
+    """
+    names = set()
+    for n in ast.walk(tree):
+        targets = []
+        if isinstance(n, (ast.Assign, ast.Delete)):
+            targets = n.targets
+        elif isinstance(n, (ast.AugAssign, ast.AnnAssign)):
+            targets = [n.target]
+        for t in targets:
+            if isinstance(t, (ast.Attribute, ast.Subscript)):
+                root = _root_name(t)
+                if root:
+                    names.add(root)
+            elif isinstance(t, ast.Name) and isinstance(n, ast.Delete):
+                names.add(t.id)
+        if isinstance(n, ast.Expr) and isinstance(n.value, ast.Call) and isinstance(n.value.func, ast.Attribute):
+            root = _root_name(n.value.func.value)
+            if root:
+                names.add(root)
+    return names
+
+
+def analyze(code: str) -> Tuple[Set[str], Set[str], Set[str]]:
+    """Return (binds, mutates, uses) for a cell; magics and invalid code use nothing."""
+    if code.strip().startswith('%'):
+        return set(), set(), set()
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return set(), set(), set()
+    return collect_defined(tree), collect_mutated(tree), collect_used(tree) - BUILTIN_NAMES
+
+
+# ============================================
+# Cell graph
+# ============================================
+
+class Cell:
+    """One submitted cell and what it binds, mutates and reads."""
+
+    __slots__ = ('id', 'code', 'binds', 'mutates', 'uses', 'stale', 'success', 'runs')
+
+    def __init__(self, cell_id: str, code: str):
+        self.id = cell_id
+        self.stale = False
+        self.success = None
+        self.runs = 0
+        self.set_code(code)
+
+    def set_code(self, code: str):
+        self.code = code
+        self.binds, self.mutates, self.uses = analyze(code)
+
+    @property
+    def defines(self) -> Set[str]:
+        return self.binds | self.mutates
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'cell_id': self.id,
+            'defines': sorted(self.defines),
+            'uses': sorted(self.uses),
+            'stale': self.stale,
+            'success': self.success,
+            'runs': self.runs,
+        }
+
+
+class CellGraph:
+    """
+    Cells in document order. A cell depends on the nearest earlier cell that
+    defines a name it reads, so document order is a topological order of the
+    def-use graph and one forward pass finds every affected cell.
+    """
+
+    def __init__(self):
+        self._cells: Dict[str, Cell] = {}
+
+    def __contains__(self, cell_id: str) -> bool:
+        return cell_id in self._cells
+
+    def order(self) -> List[str]:
+        return list(self._cells)
+
+    def set_order(self, cell_ids: List[str]):
+        """Reorder known cells; unknown ids are ignored, unlisted cells keep their relative order at the end."""
+        ordered = [c for c in cell_ids if c in self._cells]
+        rest = [c for c in self._cells if c not in set(ordered)]
+        self._cells = {c: self._cells[c] for c in ordered + rest}
+
+    def _insert(self, cell: Cell, position: Optional[int]):
+        ids = list(self._cells)
+        if position is None or position >= len(ids):
+            ids.append(cell.id)
+        else:
+            ids.insert(max(0, position), cell.id)
+        self._cells[cell.id] = cell
+        self._cells = {c: self._cells[c] for c in ids}
+
+    def dependencies(self) -> Dict[str, List[str]]:
+        """cell_id -> ids of the cells it reads names from."""
+        last_definer: Dict[str, str] = {}
+        deps = {}
+        for cell in self._cells.values():
+            deps[cell.id] = sorted({last_definer[n] for n in cell.uses if n in last_definer})
+            for name in cell.defines:
+                last_definer[name] = cell.id
+        return deps
+
+    def affected(self, cell_id: str, changed: Set[str]) -> List[str]:
+        """Cells after cell_id that (transitively) read any of `changed`, in run order."""
+        ids = list(self._cells)
+        live = set(changed)
+        out = []
+        for other in ids[ids.index(cell_id) + 1:]:
+            cell = self._cells[other]
+            if cell.uses & live:
+                out.append(other)
+                live |= cell.defines
+            else:
+                # A plain rebinding hides the changed value from later cells
+                live -= cell.binds
+        return out
+
+    def remove(self, cell_id: str) -> List[str]:
+        """Remove a cell; cells that read its names become stale. Returns their ids."""
+        cell = self._cells.get(cell_id)
+        if cell is None:
+            return []
+        downstream = self.affected(cell_id, cell.defines)
+        del self._cells[cell_id]
+        for other in downstream:
+            self._cells[other].stale = True
+        return downstream
+
+    def run(self, cell_id: str, code: str, execute: Callable[[str, str], Dict[str, Any]],
+            reactive: bool = True, position: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Submit (or edit) a cell and execute it. With reactive=True the
+        downstream cells re-run in order; cells downstream of a failure are
+        not run and are flagged stale. With reactive=False they are only
+        flagged stale. execute is called as execute(code, cell_id).
+        """
+        cell = self._cells.get(cell_id)
+        if cell is None:
+            cell = Cell(cell_id, code)
+            self._insert(cell, position)
+            old_defines = set()
+        else:
+            old_defines = cell.defines
+            cell.set_code(code)
+            if position is not None:
+                ids = [c for c in self._cells if c != cell_id]
+                ids.insert(max(0, min(position, len(ids))), cell_id)
+                self.set_order(ids)
+
+        downstream = self.affected(cell_id, old_defines | cell.defines)
+        results = [self._execute(cell, execute)]
+        broken = set() if cell.success else set(cell.defines)
+
+        for other_id in downstream:
+            other = self._cells[other_id]
+            if not reactive or other.uses & broken:
+                other.stale = True
+                broken |= other.defines
+                continue
+            results.append(self._execute(other, execute))
+            if not other.success:
+                broken |= other.defines
+
+        return {
+            'results': results,
+            'rerun': [r['cell_id'] for r in results[1:]],
+            'stale': [c.id for c in self._cells.values() if c.stale],
+        }
+
+    @staticmethod
+    def _execute(cell: Cell, execute: Callable[[str, str], Dict[str, Any]]) -> Dict[str, Any]:
+        result = execute(cell.code, cell.id)
+        cell.success = bool(result.get('success'))
+        cell.stale = False
+        cell.runs += 1
+        return dict(result, cell_id=cell.id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        deps = self.dependencies()
+        cells = []
+        for cell in self._cells.values():
+            info = cell.to_dict()
+            info['depends_on'] = deps[cell.id]
+            cells.append(info)
+        return {'cells': cells, 'stale': [c.id for c in self._cells.values() if c.stale]}
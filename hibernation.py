@@ -0,0 +1,226 @@
+"""
+Session Hibernation
+Moves idle sessions out of memory. After `idle_seconds` without a request (or
+sooner, least recently used first, when the process RSS is above
+`memory_limit`), a session's namespace and history are written to its
+workspace with the snapshot module and dropped from memory. The next request
+for the session rehydrates it transparently; arrays come back memory-mapped,
+so waking a session with gigabytes of arrays is still fast.
+
+Values that can't be pickled (open files, generators, locks, ...) stay in
+memory and are listed in the session's status so users know which ones a
+restart would lose.
+"""
+
+import gc
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import snapshot
+
+try:
+    import psutil
+except ImportError:
+    # Optional: /proc/self/statm is read instead (Linux only)
+    psutil = None
+
+
+IDLE_SECONDS = int(os.environ.get('INTERPRETER_IDLE_HIBERNATE', 30 * 60))
+MEMORY_LIMIT = int(os.environ.get('INTERPRETER_MEMORY_LIMIT', 0))  # bytes; 0 disables
+MIN_IDLE_UNDER_PRESSURE = 60   # never hibernate a session used within this many seconds
+CHECK_INTERVAL = 30
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or None if unknown."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Session:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        self.lock = threading.Lock()
+        self.hibernated = False
+        self.directory = os.path.join(interpreter.workspace.path, '.hibernate')
+        self.report: Dict[str, Any] = {}
+
+
+class HibernationManager:
+    """Tracks interpreters, hibernates idle ones and wakes them on demand."""
+
+    def __init__(self, idle_seconds: int = IDLE_SECONDS, memory_limit: int = MEMORY_LIMIT,
+                 check_interval: int = CHECK_INTERVAL):
+        self.idle_seconds = idle_seconds
+        self.memory_limit = memory_limit
+        self.check_interval = check_interval
+        self._sessions: Dict[int, _Session] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, interpreter):
+        with self._lock:
+            self._sessions.setdefault(id(interpreter), _Session(interpreter))
+
+    def unregister(self, interpreter):
+        with self._lock:
+            session = self._sessions.pop(id(interpreter), None)
+        if session is not None:
+            shutil.rmtree(session.directory, ignore_errors=True)
+
+    def _session(self, interpreter) -> Optional[_Session]:
+        return self._sessions.get(id(interpreter))
+
+    # ----------------------------------------
+    # Request hooks
+    # ----------------------------------------
+
+    def acquire(self, interpreter):
+        """
+        Mark the session busy (waking it if hibernated); pair with release().
+        If waking fails the error propagates and the session is not marked
+        busy, so there is nothing to release; it stays hibernated and the
+        next acquire() tries again.
+        """
+        session = self._session(interpreter)
+        if session is None:
+            return
+        with session.lock:
+            session.last_used = time.monotonic()
+            if session.hibernated:
+                try:
+                    self._rehydrate(session)
+                except Exception as e:
+                    session.report = dict(session.report, rehydrate_error=f'{type(e).__name__}: {e}')
+                    raise
+            session.in_use += 1
+
+    def release(self, interpreter):
+        session = self._session(interpreter)
+        if session is None:
+            return
+        with session.lock:
+            session.in_use = max(0, session.in_use - 1)
+            session.last_used = time.monotonic()
+
+    # ----------------------------------------
+    # Hibernate / rehydrate
+    # ----------------------------------------
+
+    def hibernate(self, interpreter) -> bool:
+        """Hibernate now if the session isn't in use. Returns True if it was hibernated."""
+        session = self._session(interpreter)
+        if session is None:
+            return False
+        with session.lock:
+            # Background jobs and loop tasks keep using the namespace after their request ended
+            if session.hibernated or session.in_use or interpreter.has_background_work():
+                return False
+            self._hibernate(session)
+            return True
+
+    def _hibernate(self, session: _Session):
+        interp = session.interpreter
+        variables = interp.get_all_variables()
+        started = time.perf_counter()
+
+        # Write a fresh generation, then swap it in; the previous one may
+        # still back copy-on-write arrays until the namespace is cleared
+        staging = session.directory + '.new'
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            result = snapshot.save_namespace(staging, variables)
+            history = interp.execution_history
+            try:
+                blob = snapshot.dumps(history)
+            except Exception:
+                # A result that can't be pickled (a generator, a socket...) costs
+                # the history its results, not the whole hibernation
+                blob = snapshot.dumps(snapshot.history_for_pickle(history))
+            with open(os.path.join(staging, 'history.pkl'), 'wb') as f:
+                f.write(blob)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        shutil.rmtree(session.directory, ignore_errors=True)
+        os.replace(staging, session.directory)
+
+        kept = set(result['unpicklable'])
+        for name in variables:
+            if name not in kept:
+                del interp.global_namespace[name]
+        interp.execution_history = []
+        session.hibernated = True
+        session.report = {
+            'hibernated_at': time.time(),
+            'bytes_on_disk': result['bytes'],
+            'variables': len(result['saved']),
+            # Still in memory: a restart would lose them, so they must be recomputed
+            'unpicklable': sorted(kept),
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        gc.collect()
+
+    def _rehydrate(self, session: _Session):
+        interp = session.interpreter
+        started = time.perf_counter()
+        namespace, failed = snapshot.load_namespace(session.directory)
+        with open(os.path.join(session.directory, 'history.pkl'), 'rb') as f:
+            history = snapshot.loads(f.read())
+        interp.global_namespace.update(namespace)
+        interp.execution_history = history + interp.execution_history
+        session.hibernated = False
+        session.report.pop('rehydrate_error', None)
+        session.report = dict(session.report, rehydrated_at=time.time(), failed=failed,
+                              rehydrate_seconds=round(time.perf_counter() - started, 3))
+
+    def status(self, interpreter) -> Optional[Dict[str, Any]]:
+        session = self._session(interpreter)
+        if session is None:
+            return None
+        return {'hibernated': session.hibernated, **session.report}
+
+    # ----------------------------------------
+    # Background sweeps
+    # ----------------------------------------
+
+    def sweep(self):
+        """Hibernate sessions idle past idle_seconds, then LRU sessions while RSS is over the limit."""
+        now = time.monotonic()
+        with self._lock:
+            sessions = sorted(self._sessions.values(), key=lambda s: s.last_used)
+        for session in sessions:
+            if not session.hibernated and not session.in_use and now - session.last_used >= self.idle_seconds:
+                self.hibernate(session.interpreter)
+
+        if self.memory_limit:
+            for session in sessions:
+                rss = current_rss()
+                if rss is None or rss <= self.memory_limit:
+                    break
+                if now - session.last_used >= MIN_IDLE_UNDER_PRESSURE:
+                    self.hibernate(session.interpreter)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='hibernation', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[HIBERNATE] sweep failed: {e}")
@@ -0,0 +1,145 @@
+"""
+HTTP Response Middleware
+Compression (gzip/brotli) for large responses and conditional GET helpers
+(ETag / Last-Modified / 304) for pages and versioned API reads.
+"""
+
+import functools
+import gzip
+import os
+import zlib
+
+from flask import current_app, make_response, request
+
+try:
+    import brotli
+except ImportError:
+    # Optional: fall back to gzip only
+    brotli = None
+
+
+# Responses smaller than this are not worth the CPU (and often grow when compressed)
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+# Quality 5 is a good speed/ratio trade-off for on-the-fly compression
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/json', 'application/javascript', 'image/svg+xml',
+}
+
+
+def _choose_encoding():
+    accept = request.accept_encodings
+    if brotli is not None and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress_stream(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _compress_response(response):
+    if (request.method == 'HEAD'
+            or response.status_code != 200
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    # Even when we end up not compressing, caches must key on Accept-Encoding
+    response.vary.add('Accept-Encoding')
+
+    if response.is_streamed:
+        # Generator responses (e.g. streamed history pages) are gzipped on the fly
+        if not request.accept_encodings['gzip']:
+            return response
+        response.response = _compress_stream(response.response)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config.get('COMPRESS_MIN_SIZE', MIN_COMPRESS_SIZE):
+        return response
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        body = gzip.compress(data, compresslevel=GZIP_LEVEL)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed bytes are a different representation; a weak tag still
+    # lets If-None-Match revalidate against the uncompressed one
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Register response compression on `app` (threshold: COMPRESS_MIN_SIZE config)."""
+    app.config.setdefault('COMPRESS_MIN_SIZE', MIN_COMPRESS_SIZE)
+    app.after_request(_compress_response)
+
+
+def conditional_page(template_name: str):
+    """
+    Add ETag and Last-Modified to a page route and answer 304 when the client's
+    copy is current. Last-Modified follows the template file's mtime.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            response = make_response(view(*args, **kwargs))
+            if request.method != 'GET' or response.status_code != 200:
+                return response
+            path = os.path.join(current_app.root_path, current_app.template_folder, template_name)
+            try:
+                response.last_modified = int(os.path.getmtime(path))
+            except OSError:
+                pass
+            response.add_etag()
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def versioned(get_tag):
+    """
+    Conditional GET for API reads whose content is fully described by a version tag.
+
+    `get_tag()` is called before the view; if the client already holds that tag the
+    view is skipped entirely and a 304 is returned, so nothing gets serialized.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            tag = get_tag()
+            if tag and request.if_none_match.contains_weak(tag):
+                response = make_response('', 304)
+                response.set_etag(tag)
+                response.cache_control.no_cache = True
+                response.cache_control.private = True
+                return response
+            response = make_response(view(*args, **kwargs))
+            if tag and response.status_code == 200:
+                response.set_etag(tag)
+                response.cache_control.no_cache = True
+                response.cache_control.private = True
+            return response
+        return wrapper
+    return decorator
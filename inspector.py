@@ -0,0 +1,315 @@
+"""
+Object Inspector
+Lazily explores session values one level at a time. A path such as
+`a.b[3].c` or `df["price"].iloc[10]` is resolved without eval (it is parsed
+with ast and only attribute/subscript steps with literal keys are allowed),
+and only the requested window of children is touched, so inspecting a huge
+nested structure costs work proportional to what is actually expanded.
+"""
+
+import ast
+import itertools
+import reprlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+DEFAULT_CHILD_LIMIT = 50
+MAX_CHILD_LIMIT = 1000
+PREVIEW_CHARS = 120
+CACHE_SIZE = 512
+
+
+class InspectError(ValueError):
+    """Raised for an invalid or unresolvable inspection path."""
+
+
+class _BoundedRepr(reprlib.Repr):
+    """reprlib with roomier limits that keeps dict insertion order."""
+
+    def __init__(self, limit: int):
+        super().__init__()
+        self.maxlevel = 4
+        self.maxlist = self.maxtuple = self.maxset = self.maxfrozenset = self.maxdeque = 50
+        self.maxdict = 30
+        self.maxstring = self.maxother = limit
+        self.maxlong = 100
+        self.limit = limit
+
+    def repr_dict(self, x, level):
+        n = len(x)
+        if n == 0:
+            return '{}'
+        if level <= 0:
+            return '{...}'
+        pieces = [f'{self.repr1(k, level - 1)}: {self.repr1(v, level - 1)}'
+                  for k, v in itertools.islice(x.items(), self.maxdict)]
+        if n > self.maxdict:
+            pieces.append('...')
+        return '{' + ', '.join(pieces) + '}'
+
+    def repr_instance(self, x, level):
+        # Objects with their own __repr__ (numpy, pandas...) already bound their output
+        try:
+            s = repr(x)
+        except Exception:
+            return f'<{type(x).__name__} object>'
+        if len(s) > self.limit:
+            s = s[:self.limit - 3] + '...'
+        return s
+
+
+_preview_repr = _BoundedRepr(PREVIEW_CHARS)
+
+
+def bounded_repr(value: Any, limit: int = PREVIEW_CHARS) -> str:
+    """repr() whose cost and length stay bounded for huge or deeply nested values."""
+    r = _preview_repr if limit == PREVIEW_CHARS else _BoundedRepr(limit)
+    try:
+        text = r.repr(value)
+    except Exception:
+        return f'<{type(value).__name__} object>'
+    return text if len(text) <= limit * 4 else text[:limit * 4 - 3] + '...'
+
+
+# ============================================
+# Paths
+# ============================================
+
+def parse_path(path: str) -> Tuple[str, List[Tuple[str, Any]]]:
+    """
+    Split `a.b[3].c` into the root name and a list of ('attr', name) / ('item', key) steps.
+    Keys must be literals (numbers, strings, booleans, None or tuples of those).
+    """
+    try:
+        node = ast.parse(path.strip(), mode='eval').body
+    except SyntaxError as e:
+        raise InspectError(f"Invalid path '{path}': {e.msg}")
+
+    steps = []
+    while True:
+        if isinstance(node, ast.Attribute):
+            steps.append(('attr', node.attr))
+            node = node.value
+        elif isinstance(node, ast.Subscript):
+            try:
+                key = ast.literal_eval(node.slice)
+            except ValueError:
+                raise InspectError(f"Invalid path '{path}': subscripts must be literals")
+            steps.append(('item', key))
+            node = node.value
+        elif isinstance(node, ast.Name):
+            return node.id, list(reversed(steps))
+        else:
+            raise InspectError(f"Invalid path '{path}': only names, attributes and [literal] subscripts are allowed")
+
+
+def _resolve_step(obj: Any, kind: str, key: Any) -> Any:
+    if kind == 'attr':
+        return getattr(obj, key)
+    if isinstance(obj, (set, frozenset)) and isinstance(key, int):
+        # Sets have no indexing; children are addressed by iteration position
+        return next(itertools.islice(obj, key, None))
+    return obj[key]
+
+
+def resolve(namespace: Dict[str, Any], path: str) -> Any:
+    root, steps = parse_path(path)
+    if root not in namespace:
+        raise KeyError(root)
+    obj = namespace[root]
+    for kind, key in steps:
+        try:
+            obj = _resolve_step(obj, kind, key)
+        except Exception as e:
+            raise InspectError(f"Cannot resolve '{path}': {type(e).__name__}: {e}")
+    return obj
+
+
+def _child_path(parent: str, kind: str, key: Any) -> Optional[str]:
+    if kind == 'attr':
+        return f'{parent}.{key}' if parent else key
+    try:
+        # Only keys that round-trip through literal_eval can be addressed
+        text = repr(key)
+        if ast.literal_eval(text) != key:
+            return None
+    except Exception:
+        return None
+    return f'{parent}[{text}]'
+
+
+# ============================================
+# Describing objects
+# ============================================
+
+def _safe_len(obj: Any) -> Optional[int]:
+    try:
+        return len(obj)
+    except Exception:
+        return None
+
+
+def _is_expandable(obj: Any) -> bool:
+    if obj is None or isinstance(obj, (str, bytes, bytearray, int, float, complex, bool)):
+        return False
+    if np is not None and isinstance(obj, np.generic):
+        return False
+    if isinstance(obj, (dict, list, tuple, set, frozenset)):
+        return len(obj) > 0
+    if np is not None and isinstance(obj, np.ndarray):
+        return obj.ndim > 0 and obj.size > 0
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj.columns if isinstance(obj, pd.DataFrame) else obj) > 0
+    if callable(obj) and not hasattr(obj, '__dict__'):
+        return False
+    return bool(getattr(obj, '__dict__', None)) or bool(getattr(type(obj), '__slots__', None))
+
+
+def _summary(obj: Any) -> Dict[str, Any]:
+    info = {
+        'type': type(obj).__name__,
+        'module': type(obj).__module__,
+        'preview': bounded_repr(obj),
+        'expandable': _is_expandable(obj),
+    }
+    length = _safe_len(obj)
+    if length is not None:
+        info['length'] = length
+    shape = getattr(obj, 'shape', None)
+    if isinstance(shape, tuple):
+        info['shape'] = list(shape)
+    dtype = getattr(obj, 'dtype', None)
+    if dtype is not None and not callable(dtype):
+        info['dtype'] = str(dtype)
+    return info
+
+
+def _children_window(obj: Any, offset: int, limit: int):
+    """Return [(kind, key, label, value)] for children offset..offset+limit of obj.
+
+    Sequences are sliced directly; only unordered/iterable containers pay for
+    skipping `offset` items.
+    """
+    stop = offset + limit
+    if isinstance(obj, dict):
+        return [('item', k, repr(k), v) for k, v in itertools.islice(obj.items(), offset, stop)]
+    if isinstance(obj, (list, tuple)):
+        return [('item', i, str(i), obj[i]) for i in range(offset, min(stop, len(obj)))]
+    if isinstance(obj, (set, frozenset)):
+        return [('item', i, str(i), v) for i, v in enumerate(itertools.islice(obj, offset, stop), offset)]
+    if pd is not None and isinstance(obj, pd.DataFrame):
+        return [('item', c, str(c), obj[c]) for c in obj.columns[offset:stop]]
+    if pd is not None and isinstance(obj, pd.Series):
+        window = obj.iloc[offset:stop]
+        return [('iloc', i, str(label), value)
+                for i, (label, value) in enumerate(zip(window.index, window.tolist()), offset)]
+    if np is not None and isinstance(obj, np.ndarray):
+        if obj.ndim == 0:
+            return []
+        return [('item', i, str(i), obj[i]) for i in range(offset, min(stop, obj.shape[0]))]
+
+    attrs = dict(getattr(obj, '__dict__', None) or {})
+    for cls in type(obj).__mro__:
+        for k in getattr(cls, '__slots__', ()) or ():
+            if k not in attrs and k not in ('__dict__', '__weakref__') and hasattr(obj, k):
+                attrs[k] = getattr(obj, k)
+    return [('attr', k, k, v) for k, v in itertools.islice(attrs.items(), offset, stop)]
+
+
+def _children_count(obj: Any) -> Optional[int]:
+    if pd is not None and isinstance(obj, pd.DataFrame):
+        return len(obj.columns)
+    if np is not None and isinstance(obj, np.ndarray):
+        return obj.shape[0] if obj.ndim else 0
+    if isinstance(obj, (dict, list, tuple, set, frozenset)) or (pd is not None and isinstance(obj, pd.Series)):
+        return len(obj)
+    return None
+
+
+def describe(obj: Any, path: str, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Describe obj and one window of its children."""
+    offset = max(0, int(offset or 0))
+    limit = DEFAULT_CHILD_LIMIT if limit is None else max(0, min(int(limit), MAX_CHILD_LIMIT))
+
+    info = _summary(obj)
+    info['path'] = path
+    children = []
+    if info['expandable']:
+        for kind, key, label, value in _children_window(obj, offset, limit):
+            if kind == 'iloc':
+                child_path = f'{path}.iloc[{key}]'
+            else:
+                child_path = _child_path(path, kind, key)
+            child = _summary(value)
+            child['name'] = label
+            child['path'] = child_path
+            if child_path is None:
+                child['expandable'] = False
+            children.append(child)
+    info['children'] = children
+    info['offset'] = offset
+    info['limit'] = limit
+    total = _children_count(obj)
+    if total is not None:
+        info['total_children'] = total
+    return info
+
+
+def describe_namespace(variables: Dict[str, Any], offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Top level of the inspector: the session variables themselves."""
+    offset = max(0, int(offset or 0))
+    limit = DEFAULT_CHILD_LIMIT if limit is None else max(0, min(int(limit), MAX_CHILD_LIMIT))
+    children = []
+    for name, value in itertools.islice(variables.items(), offset, offset + limit):
+        child = _summary(value)
+        child['name'] = name
+        child['path'] = name
+        children.append(child)
+    return {
+        'path': '',
+        'type': 'namespace',
+        'expandable': bool(variables),
+        'children': children,
+        'offset': offset,
+        'limit': limit,
+        'total_children': len(variables),
+    }
+
+
+class Inspector:
+    """
+    Inspects a namespace with results cached per state version: callers pass a
+    tag that changes whenever the namespace may have changed (see
+    PythonInterpreter.state_tag), so cached results never go stale.
+    """
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def inspect(self, variables: Dict[str, Any], path: str, tag: str,
+                offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        key = (tag, path, offset, limit)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        if path.strip():
+            result = describe(resolve(variables, path), path.strip(), offset, limit)
+        else:
+            result = describe_namespace(variables, offset, limit)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
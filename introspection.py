@@ -0,0 +1,376 @@
+"""
+Signature Help, Hover and Go-to-Definition
+Describes the symbol under the cursor using the live session namespace:
+inspect.signature, docstrings and types for signature help and hover, and
+the cell and line where a name was last defined for go-to-definition.
+
+Symbols are resolved statically (completion.resolve_expression: no calls,
+no properties). What inspect reports about an object is cached per object
+identity, because inspect.signature, getdoc and getsourcelines on large
+libraries take milliseconds and hover requests arrive on every mouse move.
+Entries reached through a name are dropped when that name is redefined.
+"""
+
+import ast
+import inspect
+import re
+import types
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from completion import MISSING, document_names, in_comment_or_string, kind_of, resolve_expression
+from dataflow import extract_target_names
+from inspector import bounded_repr
+
+CACHE_SIZE = 512
+DOC_CHARS = 4000
+# How much text before the cursor signature help scans for the open call
+CALL_SCAN_CHARS = 4000
+
+_EXPRESSION_BEFORE = re.compile(r'(?:[A-Za-z_]\w*\s*\.\s*)*\w*$')
+_WORD_AFTER = re.compile(r'^\w*')
+_CALLEE = re.compile(r'([A-Za-z_]\w*(?:\s*\.\s*[A-Za-z_]\w*)*)\s*$')
+_KEYWORD_ARGUMENT = re.compile(r'^\s*([A-Za-z_]\w*)\s*=(?!=)')
+
+
+class DefinitionIndex:
+    """Where each session name was last bound: {name: {'cell', 'run', 'line', 'ch'}}."""
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(name)
+
+    def record(self, code: str, cell: Optional[str] = None, run: Optional[int] = None) -> Set[str]:
+        """Index the module-level bindings of executed code; returns the names it (re)bound or deleted."""
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return set()
+        touched = set()
+        for name, line, ch in _bindings(tree.body):
+            touched.add(name)
+            if line is None:
+                self._entries.pop(name, None)
+            else:
+                self._entries[name] = {'cell': cell, 'run': run, 'line': line, 'ch': ch}
+        return touched
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self._entries)
+
+
+class Introspector:
+    """Signature help, hover and definitions for one session."""
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.cache_size = cache_size
+        self.definitions = DefinitionIndex()
+        # id -> (object, info); the object is held so its id can't be reused
+        self._cache: 'OrderedDict[int, Tuple[Any, Dict[str, Any]]]' = OrderedDict()
+        # name -> ids of the cache entries reached through it
+        self._reached: Dict[str, Set[int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, code: str, cell: Optional[str] = None, run: Optional[int] = None):
+        """Index executed code and drop cached entries for the names it redefines."""
+        for name in self.definitions.record(code, cell, run):
+            for key in self._reached.pop(name, ()):
+                self._cache.pop(key, None)
+
+    def describe(self, obj: Any, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        {'kind', 'type', 'signature', 'doc', 'file', 'file_line'} for obj,
+        cached per identity. Plain values are described by their type, so a
+        million distinct ints share one entry.
+        """
+        target = obj if _describes_itself(obj) else type(obj)
+        key = id(target)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] is target:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            info = cached[1]
+        else:
+            self.misses += 1
+            info = _introspect(target)
+            self._cache[key] = (target, info)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        if name is not None:
+            self._reached.setdefault(name, set()).add(key)
+        if target is obj:
+            return dict(info)
+        # An instance: the type's docs, but its own kind and type name
+        return dict(info, kind=kind_of(obj), type=_type_name(type(obj)), signature=None, parameters=[],
+                    file=None, file_line=None)
+
+    def _lookup(self, expression: str, namespace: Dict[str, Any], lines: List[str]) -> Any:
+        obj = resolve_expression(expression, namespace, {})
+        if obj is MISSING and expression.split('.')[0].strip() not in namespace:
+            # Only parse the document when the name isn't live (imports not run yet)
+            obj = resolve_expression(expression, namespace, document_names(lines))
+        return obj
+
+    def hover(self, code: str, line: int, ch: int, namespace: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The symbol under (line, ch) (0-based): {'found', 'name', 'kind',
+        'type', 'signature', 'doc', 'value' (plain values only), 'from', 'to'}.
+        """
+        lines, line, before, after = _split(code, line, ch)
+        expression, start, end = _expression_at(before, after)
+        reply = {'found': False, 'name': expression,
+                 'from': {'line': line, 'ch': start}, 'to': {'line': line, 'ch': end}}
+        if not expression or in_comment_or_string(before):
+            return reply
+        obj = self._lookup(expression, namespace, lines[:line])
+        if obj is MISSING:
+            return reply
+        info = self.describe(obj, expression.split('.')[0])
+        reply.update(info, found=True)
+        if not _describes_itself(obj):
+            reply['value'] = bounded_repr(obj)
+        return reply
+
+    def signature(self, code: str, line: int, ch: int, namespace: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Signature help for the innermost open call at (line, ch):
+        {'found', 'name', 'signature', 'parameters': [{'name', 'kind', 'label'}],
+        'active' (parameter index or None), 'doc'}.
+        """
+        lines, line, before, _ = _split(code, line, ch)
+        text = '\n'.join(lines[:line] + [before])
+        call = _open_call(text[-CALL_SCAN_CHARS:])
+        reply = {'found': False, 'name': None, 'signature': None, 'parameters': [], 'active': None, 'doc': ''}
+        if call is None:
+            return reply
+        callee, position, keyword = call
+        reply['name'] = callee
+        obj = self._lookup(callee, namespace, lines[:line])
+        if obj is MISSING or not callable(obj):
+            return reply
+        info = self.describe(obj, callee.split('.')[0])
+        reply.update(found=True, signature=info['signature'], doc=info['doc'],
+                     parameters=info['parameters'], active=_active_parameter(info['parameters'], position, keyword))
+        return reply
+
+    def definition(self, code: str, line: int, ch: int, namespace: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Where the symbol under (line, ch) is defined. Session names resolve
+        to the run that last bound them ({'source': 'session', 'cell',
+        'run', 'line', 'ch'}; cell is the /api/cells id, if any); library
+        objects to their source file ({'source': 'file', 'file', 'line'});
+        names only the document defines so far to the document line
+        ({'source': 'document', 'line', 'ch'}). Lines are 0-based.
+        """
+        lines, line, before, after = _split(code, line, ch)
+        expression, _, _ = _expression_at(before, after)
+        reply = {'found': False, 'name': expression}
+        if not expression or in_comment_or_string(before):
+            return reply
+        head = expression.split('.')[0].strip()
+        if '.' not in expression and head in namespace and head in self.definitions:
+            reply.update(self.definitions.get(head), found=True, source='session')
+            return reply
+        obj = self._lookup(expression, namespace, lines[:line])
+        if obj is not MISSING:
+            info = self.describe(obj, head)
+            if info['file'] is not None:
+                reply.update(found=True, source='file', file=info['file'], line=info['file_line'])
+                return reply
+        if '.' not in expression:
+            for name, def_line, def_ch in reversed(list(_bindings(_parse_lines(lines[:line + 1])))):
+                if name == head and def_line is not None:
+                    reply.update(found=True, source='document', line=def_line, ch=def_ch)
+                    break
+        return reply
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+# ============================================
+# Helpers
+# ============================================
+
+def _describes_itself(obj: Any) -> bool:
+    """Whether obj has docs and a signature of its own rather than its type's."""
+    return isinstance(obj, (types.ModuleType, type)) or callable(obj)
+
+
+def _type_name(cls: type) -> str:
+    module = getattr(cls, '__module__', None)
+    name = getattr(cls, '__qualname__', cls.__name__)
+    return name if module in (None, 'builtins', '__main__') else f'{module}.{name}'
+
+
+def _introspect(obj: Any) -> Dict[str, Any]:
+    """The slow part: inspect calls on obj, done once per object."""
+    signature, parameters = None, []
+    if callable(obj):
+        try:
+            sig = inspect.signature(obj)
+        except (TypeError, ValueError):
+            sig = None
+        if sig is not None:
+            signature = str(sig)
+            parameters = [{'name': p.name, 'kind': p.kind.name.lower(), 'label': str(p)}
+                          for p in sig.parameters.values()]
+    try:
+        doc = inspect.getdoc(obj) or ''
+    except Exception:
+        doc = ''
+    if len(doc) > DOC_CHARS:
+        doc = doc[:DOC_CHARS - 3] + '...'
+    file, file_line = None, None
+    if isinstance(obj, (types.ModuleType, type, types.FunctionType, types.MethodType)):
+        try:
+            file = inspect.getsourcefile(obj)
+            file_line = 0 if isinstance(obj, types.ModuleType) else inspect.getsourcelines(obj)[1] - 1
+        except (TypeError, OSError):
+            file, file_line = None, None
+    return {
+        'kind': kind_of(obj),
+        'type': _type_name(obj if isinstance(obj, type) else type(obj)),
+        'signature': signature,
+        'parameters': parameters,
+        'doc': doc,
+        'file': file,
+        'file_line': file_line,
+    }
+
+
+def _split(code: str, line: int, ch: int) -> Tuple[List[str], int, str, str]:
+    lines = code.split('\n')
+    line = max(0, min(line, len(lines) - 1))
+    ch = max(0, min(ch, len(lines[line])))
+    return lines, line, lines[line][:ch], lines[line][ch:]
+
+
+def _expression_at(before: str, after: str) -> Tuple[str, int, int]:
+    """The dotted expression ending with the word under the cursor, and that word's span."""
+    left = _EXPRESSION_BEFORE.search(before).group(0)
+    word_after = _WORD_AFTER.match(after).group(0)
+    expression = re.sub(r'\s+', '', left + word_after)
+    word_start = len(before) - len(re.search(r'\w*$', before).group(0))
+    if not expression or expression[0].isdigit() or expression.endswith('.'):
+        return '', len(before), len(before)
+    return expression, word_start, len(before) + len(word_after)
+
+
+def _open_call(text: str) -> Optional[Tuple[str, int, Optional[str]]]:
+    """
+    (callee, argument position, keyword being typed) for the innermost
+    unclosed `name(` in text, skipping strings and comments.
+    """
+    stack: List[List[Any]] = []  # [bracket, index, last top-level comma index, commas]
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c == '#':
+            newline = text.find('\n', i)
+            i = n if newline < 0 else newline
+            continue
+        if c in '\'"':
+            quote = text[i:i + 3] if text[i:i + 3] in ('"""', "'''") else c
+            end = i + len(quote)
+            while end < n and not text.startswith(quote, end):
+                end += 2 if text[end] == '\\' else 1
+            i = end + len(quote)
+            continue
+        if c in '([{':
+            stack.append([c, i, i, 0])
+        elif c in ')]}':
+            if stack:
+                stack.pop()
+        elif c == ',' and stack:
+            stack[-1][2] = i
+            stack[-1][3] += 1
+        i += 1
+    for bracket, index, last_comma, commas in reversed(stack):
+        if bracket != '(':
+            continue
+        callee = _CALLEE.search(text[:index])
+        if callee is None:
+            return None
+        keyword = _KEYWORD_ARGUMENT.match(text[last_comma + 1:])
+        return re.sub(r'\s+', '', callee.group(1)), commas, keyword.group(1) if keyword else None
+    return None
+
+
+def _active_parameter(parameters: List[Dict[str, str]], position: int, keyword: Optional[str]) -> Optional[int]:
+    if keyword is not None:
+        for i, p in enumerate(parameters):
+            if p['name'] == keyword and p['kind'] != 'positional_only':
+                return i
+        for i, p in enumerate(parameters):
+            if p['kind'] == 'var_keyword':
+                return i
+        return None
+    for i, p in enumerate(parameters):
+        if p['kind'] in ('keyword_only', 'var_keyword'):
+            break
+        if p['kind'] == 'var_positional' or i == position:
+            return i
+    return None
+
+
+def _parse_lines(lines: List[str]) -> List[ast.stmt]:
+    """Module-level statements of a document that may be mid-edit."""
+    try:
+        return ast.parse('\n'.join(lines)).body
+    except SyntaxError:
+        pass
+    body = []
+    for i, source in enumerate(lines):
+        if not source or source[0].isspace():
+            continue
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if hasattr(node, 'lineno'):
+                node.lineno += i
+        body.extend(tree.body)
+    return body
+
+
+def _bindings(body: List[ast.stmt]):
+    """(name, line, ch) per module-level binding in source order; line None for `del`."""
+    for stmt in body:
+        yield from _statement_bindings(stmt)
+
+
+def _statement_bindings(node: ast.AST):
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        # The name's own column, after any `async def`/`def`/`class`
+        prefix = {'ClassDef': 6, 'FunctionDef': 4, 'AsyncFunctionDef': 10}[type(node).__name__]
+        yield node.name, node.lineno - 1, node.col_offset + prefix
+        return
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        for alias in node.names:
+            if alias.name == '*':
+                continue
+            name = alias.asname or (alias.name.split('.')[0] if isinstance(node, ast.Import) else alias.name)
+            yield name, getattr(alias, 'lineno', node.lineno) - 1, getattr(alias, 'col_offset', node.col_offset)
+        return
+    if isinstance(node, ast.Delete):
+        for target in node.targets:
+            for name in extract_target_names(target):
+                yield name, None, None
+        return
+    if isinstance(node, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+        return
+    if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+        yield node.id, node.lineno - 1, node.col_offset
+        return
+    if isinstance(node, ast.NamedExpr):
+        yield node.target.id, node.lineno - 1, node.col_offset
+    for child in ast.iter_child_nodes(node):
+        yield from _statement_bindings(child)
@@ -0,0 +1,222 @@
+"""
+Background Jobs
+Runs cells in worker threads so long computations don't hold an HTTP request
+(or the session) hostage. Each job gets an id at once; its status, the output
+printed so far and its final result can be polled or streamed while the user
+keeps running other cells in the same namespace.
+
+Jobs are bounded per session: at most `max_running` run at a time, up to
+`max_queued` more wait their turn, and anything beyond that is refused.
+Cancelling a running job raises KeyboardInterrupt inside it (delivered at the
+next Python bytecode, so a job blocked in a long C call stops when the call
+returns); coroutine jobs are cancelled on the event loop.
+"""
+
+import builtins
+import contextvars
+import ctypes
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import capture
+from bounded_output import BoundedBuffer, OutputSpool
+
+MAX_RUNNING = int(os.environ.get('INTERPRETER_MAX_JOBS', 2))
+MAX_QUEUED = int(os.environ.get('INTERPRETER_MAX_QUEUED_JOBS', 8))
+KEEP_FINISHED = 50
+
+ACTIVE_STATES = ('queued', 'running', 'cancelling')
+
+# Set inside job threads; input() can't be answered there
+_current_job: contextvars.ContextVar = contextvars.ContextVar('current_job', default=None)
+
+
+class JobLimitExceeded(RuntimeError):
+    """Raised when a session already has the maximum number of active jobs."""
+
+
+def current_job() -> Optional['Job']:
+    return _current_job.get()
+
+
+def raise_in_thread(ident: int, exc_type=KeyboardInterrupt) -> bool:
+    """Asynchronously raise exc_type in the thread `ident`. Returns False if no such thread."""
+    done = ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident), ctypes.py_object(exc_type))
+    if done > 1:
+        # More than one thread state matched: undo
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident), None)
+        return False
+    return done == 1
+
+
+def cancel_raise(ident: int):
+    """Drop an exception raise_in_thread scheduled for `ident` if it hasn't been raised yet."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident), None)
+
+
+_real_input = None
+
+
+def _install_input_guard():
+    """Make input() fail fast in job threads instead of blocking on the server's stdin."""
+    global _real_input
+    if _real_input is not None:
+        return
+    _real_input = builtins.input
+
+    def guarded_input(prompt=''):
+        if current_job() is not None:
+            raise RuntimeError('input() is not available in background jobs')
+        return _real_input(prompt)
+
+    builtins.input = guarded_input
+
+
+class Job:
+    """One background cell."""
+
+    def __init__(self, code: str, mode: str = 'exec', outputs: Optional[OutputSpool] = None):
+        self.id = secrets.token_hex(6)
+        self.code = code
+        self.mode = mode
+        self.status = 'queued'
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        # Bounded like cell output; the full text spills to `outputs`
+        self.output = capture.CaptureTarget(BoundedBuffer(outputs))
+        self.result: Any = None
+        self.error = ''
+        self.thread_ident: Optional[int] = None
+        self.future = None  # concurrent future while a coroutine job awaits on the session loop
+        self.cancel_requested = False
+        self.done = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    def to_dict(self, offset: int = 0, serialize=repr) -> Dict[str, Any]:
+        """
+        Status plus output from character `offset` on; `offset` in the reply
+        is where to resume. Output dropped from the middle of a long stream
+        is replaced by a marker (see BoundedBuffer.read_from).
+        """
+        text, end = self.output.buffer.read_from(offset)
+        info = {
+            'job_id': self.id,
+            'status': self.status,
+            'code': self.code,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'seconds': round((self.finished or time.time()) - self.started, 3) if self.started else None,
+            'output': text,
+            'offset': end,
+            'result': serialize(self.result) if self.status == 'done' and self.result is not None else None,
+            'error': self.error,
+        }
+        if self.output.buffer.truncated_bytes:
+            info['output_truncated'] = self.output.buffer.summary()
+        return info
+
+
+class JobManager:
+    """Background jobs of one interpreter."""
+
+    def __init__(self, interpreter, max_running: int = MAX_RUNNING, max_queued: int = MAX_QUEUED):
+        self.interpreter = interpreter
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self._slots = threading.BoundedSemaphore(max_running)
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, code: str, mode: str = 'exec') -> Job:
+        # Job output is routed by context, which needs the stream routers in place
+        capture.install_router()
+        _install_input_guard()
+        job = Job(code, mode, self.interpreter.outputs)
+        with self._lock:
+            if sum(1 for j in self._jobs.values() if j.active) >= self.max_running + self.max_queued:
+                raise JobLimitExceeded(
+                    f'Too many background jobs ({self.max_running} running + {self.max_queued} queued)')
+            self._jobs[job.id] = job
+            self._trim()
+        threading.Thread(target=self._run, args=(job,), name=f'job-{job.id}', daemon=True).start()
+        return job
+
+    def _trim(self):
+        finished = [j.id for j in self._jobs.values() if not j.active]
+        for job_id in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job):
+        # Wait for a slot, giving up if cancelled while queued
+        while not self._slots.acquire(timeout=0.1):
+            if job.cancel_requested:
+                self._finish(job, 'cancelled')
+                return
+        try:
+            if job.cancel_requested:
+                self._finish(job, 'cancelled')
+                return
+            job.thread_ident = threading.get_ident()
+            job.started = time.time()
+            job.status = 'running'
+            token = _current_job.set(job)
+            try:
+                with capture.capture_to(job.output):
+                    job.result = self.interpreter.run_job(job)
+                self._finish(job, 'done')
+            except KeyboardInterrupt:
+                job.output.write('\nKeyboardInterrupt\n')
+                self._finish(job, 'cancelled')
+            except BaseException as e:
+                if job.cancel_requested:
+                    self._finish(job, 'cancelled')
+                else:
+                    job.error = self.interpreter._format_exception(e)
+                    self._finish(job, 'failed')
+            finally:
+                _current_job.reset(token)
+        finally:
+            self._slots.release()
+
+    def _finish(self, job: Job, status: str):
+        job.output.buffer.finish()
+        job.status = status
+        job.finished = time.time()
+        job.thread_ident = None
+        job.future = None
+        job.done.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def running(self) -> bool:
+        return any(j.active for j in self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or not job.active:
+            return job
+        job.cancel_requested = True
+        if job.status == 'running':
+            job.status = 'cancelling'
+            if job.future is not None:
+                job.future.cancel()
+            elif job.thread_ident is not None:
+                raise_in_thread(job.thread_ident)
+        return job
+
+    def cancel_all(self):
+        for job in self.list():
+            self.cancel(job.id)
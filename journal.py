@@ -0,0 +1,365 @@
+"""
+Session Journal
+Append-only log of the cells a session executes so its state survives a
+server restart. Records are JSON lines written as each cell finishes and
+fsynced in batches; every CHECKPOINT_EVERY cells the picklable namespace is
+written to a checkpoint file and older journal segments are dropped, so
+recovery only loads the newest checkpoint and replays the cells after it.
+Replay skips cells that only display things, and the history is rebuilt from
+the recorded outputs rather than from re-execution.
+"""
+
+import ast
+import json
+import os
+import pickle
+import re
+import threading
+import time
+import types
+from datetime import datetime
+from typing import Any, Dict, List
+
+import snapshot
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+FSYNC_INTERVAL = 0.2         # seconds; records written within this window share one fsync
+CHECKPOINT_EVERY = 25        # cells between checkpoints (bounds replay work on restart)
+MAX_CHECKPOINT_BACKOFF = 8   # after failed checkpoints the interval doubles, up to this factor
+MAX_RECORDED_OUTPUT = 10000  # chars of output/error kept per record for the rebuilt history
+
+_SEGMENT = re.compile(r'^journal-(\d+)\.jsonl$')
+_CHECKPOINT = re.compile(r'^checkpoint-(\d+)\.pkl$')
+
+# Magics that only display, time or save things; replay skips them
+_DISPLAY_MAGICS = {'%clear', '%vars', '%help', '%history', '%who', '%whos',
+                   '%pprint', '%json', '%table', '%save', '%reset'}
+# Calls that can't change session state, for recognising display-only cells
+_PURE_FUNCTIONS = {'print', 'len', 'repr', 'str', 'type', 'sorted', 'sum', 'min', 'max',
+                   'abs', 'round', 'isinstance', 'id', 'dir', 'vars', 'format'}
+_PURE_METHODS = {'head', 'tail', 'describe', 'info', 'keys', 'values', 'items'}
+
+
+def _clip(text: str) -> str:
+    text = text or ''
+    return text if len(text) <= MAX_RECORDED_OUTPUT else text[:MAX_RECORDED_OUTPUT] + '\n... (truncated)'
+
+
+def is_display_only(code: str) -> bool:
+    """True if running `code` cannot change the namespace (so replay may skip it)."""
+    stripped = code.strip()
+    if stripped.startswith('%'):
+        return stripped.split()[0] in _DISPLAY_MAGICS
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return True  # never ran
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Pass):
+            continue
+        if not isinstance(stmt, ast.Expr):
+            return False
+        for node in ast.walk(stmt.value):
+            if isinstance(node, (ast.NamedExpr, ast.Await, ast.Yield, ast.YieldFrom, ast.Lambda)):
+                return False
+            if isinstance(node, ast.Call):
+                func = node.func
+                if isinstance(func, ast.Name) and func.id in _PURE_FUNCTIONS:
+                    continue
+                if isinstance(func, ast.Attribute) and func.attr in _PURE_METHODS:
+                    continue
+                return False
+    return True
+
+
+def _needs_rebuild(value: Any) -> bool:
+    """Values whose pickle would not be a faithful copy (memory maps pickle as full arrays)."""
+    return np is not None and isinstance(value, np.memmap)
+
+
+class SessionJournal:
+    """
+    Journal and checkpoints for one session, stored in `directory`.
+
+    Files:
+        journal-<first seq>.jsonl   cell records, one JSON object per line
+        checkpoint-<seq>.pkl        namespace + history as of record <seq>
+    """
+
+    def __init__(self, directory: str, checkpoint_every: int = CHECKPOINT_EVERY,
+                 fsync_interval: float = FSYNC_INTERVAL):
+        self.directory = directory
+        self.checkpoint_every = checkpoint_every
+        self.fsync_interval = fsync_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._dirty = threading.Event()
+        self._closed = False
+        self.seq = self._last_seq()
+        self._since_checkpoint = 0
+        # Doubles after each failed checkpoint so a session that can't be
+        # checkpointed isn't re-serialized after every cell
+        self._backoff = 1
+        # name -> record of the cell that last (re)bound it; used to rebuild
+        # values that can't be pickled into a checkpoint
+        self._definers: Dict[str, Dict[str, Any]] = {}
+
+        self._syncer = threading.Thread(target=self._sync_loop, name='journal-fsync', daemon=True)
+        self._syncer.start()
+
+    # ----------------------------------------
+    # Files
+    # ----------------------------------------
+
+    def _list(self, pattern) -> List[tuple]:
+        found = []
+        for fn in os.listdir(self.directory):
+            m = pattern.match(fn)
+            if m:
+                found.append((int(m.group(1)), os.path.join(self.directory, fn)))
+        return sorted(found)
+
+    def _last_seq(self) -> int:
+        last = 0
+        checkpoints = self._list(_CHECKPOINT)
+        if checkpoints:
+            last = checkpoints[-1][0]
+        for record in self._read_records(last):
+            last = max(last, record['seq'])
+        return last
+
+    def _read_records(self, after: int) -> List[Dict[str, Any]]:
+        """Records with seq > after. A torn final line (crash mid-write) is ignored."""
+        records = []
+        for _, path in self._list(_SEGMENT):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record.get('seq', 0) > after:
+                        records.append(record)
+        return records
+
+    def _open_segment(self):
+        if self._file is None:
+            path = os.path.join(self.directory, f'journal-{self.seq + 1:012d}.jsonl')
+            self._file = open(path, 'a', encoding='utf-8')
+        return self._file
+
+    def _sync_loop(self):
+        # Group commit: appends are flushed to the OS at once, fsync runs at
+        # most every fsync_interval so a burst of cells costs one disk sync
+        while not self._closed:
+            self._dirty.wait()
+            time.sleep(self.fsync_interval)
+            self._dirty.clear()
+            self.sync()
+
+    def sync(self):
+        with self._lock:
+            if self._file is None or self._file.closed:
+                return
+            # fsync a duplicate descriptor so appends aren't blocked meanwhile
+            fd = os.dup(self._file.fileno())
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self._closed = True
+        self._dirty.set()
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    # ----------------------------------------
+    # Recording
+    # ----------------------------------------
+
+    def record_cell(self, code: str, mode: str, result: Dict[str, Any],
+                    inputs: List[Any], changed: List[str]) -> int:
+        """Append one executed cell. Returns its sequence number."""
+        with self._lock:
+            f = self._open_segment()
+            self.seq += 1
+            record = {
+                'seq': self.seq,
+                'ts': time.time(),
+                'code': code,
+                'mode': mode,
+                'success': bool(result.get('success')),
+                'inputs': [str(v) for v in inputs],
+                'changed': changed,
+                'output': _clip(result.get('output', '')),
+                'error': _clip(result.get('error', '')),
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            self._since_checkpoint += 1
+            for name in changed:
+                self._definers[name] = record
+        self._dirty.set()
+        return record['seq']
+
+    def checkpoint_due(self) -> bool:
+        return self._since_checkpoint >= self.checkpoint_every * self._backoff
+
+    def checkpoint(self, interpreter) -> Dict[str, Any]:
+        """
+        Write namespace + history as of the latest record, then drop the
+        journal segments and checkpoints it supersedes.
+        """
+        variables = interpreter.get_all_variables()
+        modules, values, rebuild_names = {}, {}, []
+        for name, value in variables.items():
+            if isinstance(value, types.ModuleType):
+                modules[name] = value.__name__
+            elif _needs_rebuild(value):
+                rebuild_names.append(name)
+            else:
+                values[name] = value
+
+        blob, unpicklable = snapshot.dumps_values(values)
+        rebuild_names.extend(unpicklable)
+
+        with self._lock:
+            seq = self.seq
+            rebuild = sorted({self._definers[n]['seq']: self._definers[n] for n in rebuild_names
+                              if n in self._definers}.values(), key=lambda r: r['seq'])
+            state = {
+                'seq': seq,
+                'created': time.time(),
+                'namespace': blob,
+                'modules': modules,
+                'rebuild': rebuild,
+                'unrecoverable': [n for n in rebuild_names if n not in self._definers],
+                'history': snapshot.history_for_pickle(interpreter.execution_history),
+            }
+            path = os.path.join(self.directory, f'checkpoint-{seq:012d}.pkl')
+            tmp = path + '.tmp'
+            try:
+                with open(tmp, 'wb') as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                # Retry after more cells rather than after the next one
+                self._since_checkpoint = 0
+                self._backoff = min(self._backoff * 2, MAX_CHECKPOINT_BACKOFF)
+                raise
+            self._fsync_dir()
+
+            # Everything up to seq is now covered by the checkpoint
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for s, old in self._list(_CHECKPOINT):
+                if s < seq:
+                    os.unlink(old)
+            for s, old in self._list(_SEGMENT):
+                os.unlink(old)
+            self._since_checkpoint = 0
+            self._backoff = 1
+            self._definers = {n: r for n, r in self._definers.items() if n in variables}
+        return {'seq': seq, 'variables': len(values) - len(unpicklable), 'rebuild': len(rebuild)}
+
+    def _fsync_dir(self):
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    # ----------------------------------------
+    # Recovery
+    # ----------------------------------------
+
+    def has_state(self) -> bool:
+        return bool(self._list(_CHECKPOINT) or self._list(_SEGMENT))
+
+    def recover(self, interpreter) -> Dict[str, Any]:
+        """
+        Restore `interpreter` from the newest checkpoint plus the journal tail.
+        The interpreter must not be journaling while this runs.
+        """
+        started = time.perf_counter()
+        report = {'checkpoint': None, 'replayed': 0, 'skipped': 0, 'failed': [], 'unrecoverable': []}
+        history = []
+
+        checkpoints = self._list(_CHECKPOINT)
+        after = 0
+        if checkpoints:
+            after, path = checkpoints[-1]
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            report['checkpoint'] = after
+            history = state['history']
+            namespace = snapshot.loads_values(state['namespace'])
+            for name, module_name in state['modules'].items():
+                try:
+                    namespace[name] = __import__(module_name, fromlist=['_'])
+                except Exception:
+                    report['unrecoverable'].append(name)
+            interpreter.global_namespace.update(namespace)
+            report['unrecoverable'].extend(state['unrecoverable'])
+
+            for record in state['rebuild']:
+                self._replay(interpreter, record, report)
+                for name in record['changed']:
+                    self._definers[name] = record
+
+        tail = self._read_records(after)
+        for record in tail:
+            if not record['code'].strip().startswith('%'):
+                history.append({
+                    'success': record['success'],
+                    'output': record['output'],
+                    'error': record['error'],
+                    'result': None,
+                    'variables': {},
+                    'code': record['code'],
+                    'timestamp': datetime.fromtimestamp(record['ts']).isoformat(),
+                })
+            if is_display_only(record['code']):
+                report['skipped'] += 1
+                continue
+            self._replay(interpreter, record, report)
+            for name in record['changed']:
+                self._definers[name] = record
+
+        interpreter.execution_history = history
+        self._since_checkpoint = len(tail)
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        return report
+
+    @staticmethod
+    def _replay(interpreter, record: Dict[str, Any], report: Dict[str, Any]):
+        interpreter.set_input_values(record.get('inputs', []))
+        result = interpreter.execute(record['code'], mode=record.get('mode', 'exec'))
+        report['replayed'] += 1
+        # Cells that failed originally are expected to fail again
+        if not result.get('success') and record.get('success'):
+            report['failed'].append(record['seq'])
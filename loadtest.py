@@ -0,0 +1,357 @@
+"""
+Load Test Harness
+Drives the Flask app with concurrent virtual users following mixed
+scenarios, and reports throughput plus p50/p95/p99 latency and error rate
+per endpoint. No external services are needed:
+
+    python loadtest.py --users 20 --duration 30            # in-process Flask test client
+    python loadtest.py --users 20 --serve                  # local threaded HTTP server
+    python loadtest.py --users 20 --url http://127.0.0.1:5000
+
+Scenarios (weights set with --mix typing=4,run=3,input=1,poll=2):
+    typing  types a document line by line; /api/validate_lines is sent once per
+            line after a debounce pause, like the editor does
+    run     runs a cell with /api/execute
+    input   runs a cell that calls input() and answers its prompts through
+            /api/provide_input; counted as a failed scenario unless the cell
+            ends with success true before the answers run out
+    poll    reads /api/variables (with If-None-Match) and /api/history
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Keep load-test sessions out of the crash-recovery journal
+os.environ.setdefault('INTERPRETER_JOURNAL', '0')
+
+DEFAULT_MIX = {'typing': 4, 'run': 3, 'input': 1, 'poll': 2}
+# Seconds the editor waits after the last keystroke before validating
+DEBOUNCE = 0.3
+KEYSTROKE = 0.05
+
+
+# ============================================
+# Transports
+# ============================================
+
+class TestClientTransport:
+    """Requests through the Flask test client (in-process, no sockets)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, payload: Any = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any, Dict[str, str]]:
+        response = self.client.open(path, method=method, json=payload, headers=headers or {})
+        body = response.get_json(silent=True)
+        return response.status_code, body, dict(response.headers)
+
+
+class HTTPTransport:
+    """Requests over HTTP to a running server (urllib, one connection per request)."""
+
+    def __init__(self, base_url: str, timeout: float = 60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, payload: Any = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any, Dict[str, str]]:
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json', **(headers or {})})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                status, raw, response_headers = response.status, response.read(), dict(response.headers)
+        except urllib.error.HTTPError as e:
+            status, raw, response_headers = e.code, e.read(), dict(e.headers)
+        try:
+            body = json.loads(raw) if raw else None
+        except ValueError:
+            body = None
+        return status, body, response_headers
+
+
+def serve_locally(app) -> Tuple[str, Callable[[], None]]:
+    """Start the app on a threaded local server on a free port; returns (url, stop)."""
+    from werkzeug.serving import make_server
+    # One access-log line per request would drown the report
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True)
+    thread.start()
+    return f'http://127.0.0.1:{server.server_port}', server.shutdown
+
+
+# ============================================
+# Recording
+# ============================================
+
+class Recorder:
+    """Latencies and errors per endpoint, shared by all virtual users."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.error_samples: Dict[str, str] = {}
+        # Scenario name -> [runs, failures]: requests can all succeed while the flow still fails
+        self.scenarios: Dict[str, List[int]] = {}
+        self.scenario_samples: Dict[str, str] = {}
+
+    def call(self, transport, method: str, path: str, payload: Any = None,
+             headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any, Dict[str, str]]:
+        endpoint = f"{method} {path.split('?')[0]}"
+        started = time.perf_counter()
+        try:
+            status, body, response_headers = transport.request(method, path, payload, headers)
+            error = None
+            if status >= 400:
+                error = f'HTTP {status}'
+            elif isinstance(body, dict) and body.get('success') is False and not body.get('input_required'):
+                error = str(body.get('error') or 'success: false')[:200]
+        except Exception as e:
+            status, body, response_headers, error = 0, None, {}, f'{type(e).__name__}: {e}'
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(elapsed)
+            if error is not None:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+                self.error_samples.setdefault(endpoint, error)
+        return status, body, response_headers
+
+    def scenario(self, name: str, error: Optional[str] = None):
+        """Count one finished scenario, failed if error is given."""
+        with self._lock:
+            counts = self.scenarios.setdefault(name, [0, 0])
+            counts[0] += 1
+            if error is not None:
+                counts[1] += 1
+                self.scenario_samples.setdefault(name, error)
+
+    def report(self, seconds: float) -> Dict[str, Any]:
+        with self._lock:
+            latencies = {k: sorted(v) for k, v in self.latencies.items()}
+            errors = dict(self.errors)
+            scenarios = {k: list(v) for k, v in self.scenarios.items()}
+        endpoints = {}
+        for endpoint, values in sorted(latencies.items()):
+            endpoints[endpoint] = {
+                'requests': len(values),
+                'throughput_rps': round(len(values) / seconds, 2),
+                'errors': errors.get(endpoint, 0),
+                'error_rate': round(errors.get(endpoint, 0) / len(values), 4),
+                'p50_ms': round(_percentile(values, 0.50), 2),
+                'p95_ms': round(_percentile(values, 0.95), 2),
+                'p99_ms': round(_percentile(values, 0.99), 2),
+                'max_ms': round(values[-1], 2),
+                'first_error': self.error_samples.get(endpoint),
+            }
+        total = sum(len(v) for v in latencies.values())
+        scenario_rows = {
+            name: {
+                'runs': runs,
+                'errors': failed,
+                'error_rate': round(failed / runs, 4),
+                'first_error': self.scenario_samples.get(name),
+            }
+            for name, (runs, failed) in sorted(scenarios.items())
+        }
+        return {
+            'seconds': round(seconds, 2),
+            'requests': total,
+            'throughput_rps': round(total / seconds, 2) if seconds else 0,
+            'errors': sum(errors.values()),
+            'error_rate': round(sum(errors.values()) / total, 4) if total else 0,
+            'endpoints': endpoints,
+            'scenario_errors': sum(row['errors'] for row in scenario_rows.values()),
+            'scenarios': scenario_rows,
+        }
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# ============================================
+# Scenarios
+# ============================================
+
+DOCUMENT = [
+    'import math',
+    'data = [i * 3 for i in range(200)]',
+    'def norm(v):',
+    '    return math.sqrt(sum(x * x for x in v))',
+    'length = norm(data)',
+    'scaled = [x / length for x in data]',
+    'print(len(scaled), max(scaled))',
+]
+
+
+class VirtualUser:
+    """One simulated editor tab."""
+
+    def __init__(self, number: int, transport, recorder: Recorder, think: float, rng: random.Random):
+        self.number = number
+        self.transport = transport
+        self.recorder = recorder
+        self.think = think
+        self.rng = rng
+        self.etag = None
+
+    def call(self, method: str, path: str, payload: Any = None, headers: Optional[Dict[str, str]] = None):
+        return self.recorder.call(self.transport, method, path, payload, headers)
+
+    def pause(self, seconds: float):
+        if self.think:
+            time.sleep(seconds * self.think * self.rng.uniform(0.5, 1.5))
+
+    def typing(self):
+        lines = []
+        for line in DOCUMENT:
+            lines.append('')
+            for i in range(1, len(line) + 1):
+                lines[-1] = line[:i]
+                self.pause(KEYSTROKE)
+            # Only the pause after the last keystroke of a burst triggers validation
+            self.pause(DEBOUNCE)
+            self.call('POST', '/api/validate_lines', {'lines': lines})
+
+    def run(self):
+        n = self.rng.randint(100, 5000)
+        self.call('POST', '/api/execute', {
+            'code': f'user{self.number} = sum(i * i for i in range({n}))\nprint(user{self.number})'})
+
+    def input(self) -> Optional[str]:
+        code = 'name = input("Name? ")\nage = int(input("Age? "))\nprint(name, age)'
+        status, body, _ = self.call('POST', '/api/execute', {'code': code})
+        answers = [f'user{self.number}', str(self.rng.randint(18, 90))]
+        while isinstance(body, dict) and body.get('input_required') and answers:
+            self.pause(1.0)
+            status, body, _ = self.call('POST', '/api/provide_input', {'value': answers.pop(0)})
+        if isinstance(body, dict) and body.get('success') is True:
+            return None
+        if isinstance(body, dict) and body.get('input_required'):
+            return f"ran out of answers at prompt {body.get('input_prompt')!r}"
+        error = body.get('error') if isinstance(body, dict) else None
+        return str(error or f'no successful result (HTTP {status})')[:200]
+
+    def poll(self):
+        headers = {'If-None-Match': self.etag} if self.etag else None
+        status, _, response_headers = self.call('GET', '/api/variables', headers=headers)
+        self.etag = response_headers.get('ETag', self.etag)
+        self.call('GET', '/api/history')
+
+    def loop(self, mix: Dict[str, int], deadline: float):
+        names = [name for name, weight in mix.items() if weight > 0]
+        weights = [mix[name] for name in names]
+        while time.monotonic() < deadline:
+            name = self.rng.choices(names, weights)[0]
+            # Scenarios return an error message when the flow as a whole failed
+            self.recorder.scenario(name, getattr(self, name)())
+            self.pause(1.0)
+
+
+def run_load(transport_factory: Callable[[], Any], users: int = 10, duration: float = 30,
+             mix: Optional[Dict[str, int]] = None, think: float = 1.0, seed: int = 0,
+             ramp_up: float = 0.0) -> Dict[str, Any]:
+    """Run `users` virtual users for `duration` seconds and return the report."""
+    recorder = Recorder()
+    mix = mix or DEFAULT_MIX
+    started = time.monotonic()
+    deadline = started + duration
+    threads = []
+    for number in range(users):
+        user = VirtualUser(number, transport_factory(), recorder, think, random.Random(seed + number))
+        thread = threading.Thread(target=user.loop, args=(mix, deadline), name=f'vu-{number}', daemon=True)
+        thread.start()
+        threads.append(thread)
+        if ramp_up:
+            time.sleep(ramp_up / users)
+    for thread in threads:
+        # A user finishes its current scenario after the deadline
+        thread.join()
+    report = recorder.report(time.monotonic() - started)
+    report.update({'users': users, 'mix': mix, 'think': think})
+    return report
+
+
+def print_report(report: Dict[str, Any], out=sys.stderr):
+    print(f"\n{report['users']} users, {report['seconds']}s: {report['requests']} requests, "
+          f"{report['throughput_rps']} req/s, error rate {report['error_rate']:.2%}", file=out)
+    print(f"  {'endpoint':<28} {'reqs':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'errors':>8}",
+          file=out)
+    for endpoint, row in report['endpoints'].items():
+        print(f"  {endpoint:<28} {row['requests']:>7} {row['throughput_rps']:>8} {row['p50_ms']:>7}ms "
+              f"{row['p95_ms']:>7}ms {row['p99_ms']:>7}ms {row['max_ms']:>7}ms {row['error_rate']:>8.2%}", file=out)
+    for endpoint, row in report['endpoints'].items():
+        if row['first_error']:
+            print(f"  first error on {endpoint}: {row['first_error']}", file=out)
+    for name, row in report['scenarios'].items():
+        if row['errors']:
+            print(f"  scenario {name}: {row['errors']} of {row['runs']} failed, first: {row['first_error']}",
+                  file=out)
+
+
+def _parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'unknown scenario {name!r} (choose from {", ".join(DEFAULT_MIX)})')
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-u', '--users', type=int, default=10, help='concurrent virtual users')
+    parser.add_argument('-d', '--duration', type=float, default=30, help='seconds to run')
+    parser.add_argument('--mix', type=_parse_mix, default=DEFAULT_MIX, help='scenario weights, e.g. typing=4,run=3')
+    parser.add_argument('--think', type=float, default=1.0,
+                        help='scale for keystroke/debounce/think pauses (0 = no pauses)')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='seconds over which users are started')
+    parser.add_argument('--seed', type=int, default=0)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help='load a running server instead of the in-process app')
+    target.add_argument('--serve', action='store_true', help='serve the app on a local threaded HTTP server')
+    parser.add_argument('-o', '--output', help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    stop = None
+    if args.url:
+        factory = lambda: HTTPTransport(args.url)
+    else:
+        from app import app
+        if args.serve:
+            url, stop = serve_locally(app)
+            factory = lambda: HTTPTransport(url)
+        else:
+            factory = lambda: TestClientTransport(app)
+
+    # The app logs every execution to stdout; keep the report readable
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        report = run_load(factory, args.users, args.duration, args.mix, args.think, args.seed, args.ramp_up)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+        if stop is not None:
+            stop()
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
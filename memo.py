@@ -0,0 +1,400 @@
+"""
+Cell Memoization
+Opt-in cache of cell results. A cell is keyed by a digest of its code plus
+content hashes of the names it reads (numpy buffers, pandas hash_pandas_object,
+pickles of plain containers, code objects of user functions). On a hit the
+values the cell binds, its stdout, figures and eval result are restored and
+the cell is not executed.
+
+Only cells that are plausibly pure are considered: cells that call input(),
+open files, use randomness or the clock, import, define functions/classes or
+visibly mutate objects in place (x.append(...), x[i] = ..., x += ... on a
+name the cell reads) are always executed. Mutations the syntax can't show,
+such as a helper function appending to a global list, are not detected; such
+cells should opt out with a `# no-memo` comment. Cells faster than
+`min_seconds` are never stored.
+
+Keys are always computed from the inputs before the cell runs. A cell is
+fingerprinted only once it has been seen running slowly, so the first slow
+run of a cell is not stored; the next run hashes its inputs up front.
+
+Entries live in a byte-bounded LRU in memory; with a directory configured,
+entries evicted from memory spill to disk (with their own LRU budget).
+"""
+
+import ast
+import hashlib
+import os
+import pickle
+import threading
+import time
+import types
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+import dataflow
+import snapshot
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+MEMORY_BYTES = int(os.environ.get('INTERPRETER_MEMO_MEMORY', 256 * 1024 ** 2))
+DISK_BYTES = int(os.environ.get('INTERPRETER_MEMO_DISK', 2 * 1024 ** 3))
+MIN_SECONDS = float(os.environ.get('INTERPRETER_MEMO_MIN_SECONDS', 0.1))
+OPT_OUT = '# no-memo'
+
+# Names whose use makes a cell impure (I/O, randomness, time, introspection)
+_IMPURE_NAMES = {'input', 'open', 'exec', 'eval', 'compile', 'globals', 'locals', 'setattr',
+                 'delattr', '__import__', 'breakpoint', 'exit', 'quit',
+                 'random', 'time', 'datetime', 'os', 'sys', 'subprocess', 'socket', 'requests',
+                 'urllib', 'uuid', 'secrets', 'shutil', 'pathlib', 'Path', 'threading', 'asyncio'}
+_IMPURE_ATTRS = {'random', 'rand', 'randn', 'randint', 'choice', 'shuffle', 'permutation', 'sample',
+                 'default_rng', 'seed', 'now', 'today', 'utcnow', 'time', 'perf_counter',
+                 'read_csv', 'read_json', 'read_parquet', 'read_excel', 'read_sql', 'load', 'loadtxt',
+                 'genfromtxt', 'fromfile', 'to_csv', 'to_json', 'to_parquet', 'save', 'savetxt',
+                 'tofile', 'savefig', 'urandom', 'system'}
+_IMPURE_NODES = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef,
+                 ast.Lambda, ast.Global, ast.Nonlocal, ast.Delete, ast.Await, ast.Yield, ast.YieldFrom)
+
+_MISSING = b'<missing>'
+
+
+class Uncacheable(Exception):
+    """Raised while fingerprinting a value that has no stable content hash."""
+
+
+# ============================================
+# Static checks
+# ============================================
+
+def _is_pure(tree: ast.AST) -> bool:
+    for node in ast.walk(tree):
+        if isinstance(node, _IMPURE_NODES):
+            return False
+        if isinstance(node, ast.Name) and node.id in _IMPURE_NAMES:
+            return False
+        if isinstance(node, ast.Attribute) and node.attr in _IMPURE_ATTRS:
+            return False
+    return True
+
+
+class _Analysis:
+    __slots__ = ('digest', 'cacheable', 'binds', 'mutates', 'uses')
+
+    def __init__(self, code: str, mode: str):
+        self.digest = hashlib.blake2b(f'{mode}\0{code}'.encode('utf-8'), digest_size=16).digest()
+        self.binds: Set[str] = set()
+        self.mutates: Set[str] = set()
+        self.uses: Set[str] = set()
+        self.cacheable = False
+        if OPT_OUT in code:
+            return
+        try:
+            tree = ast.parse(code, mode='eval' if mode == 'eval' else 'exec')
+        except SyntaxError:
+            return
+        if not _is_pure(tree):
+            return
+        self.binds = dataflow.collect_defined(tree)
+        self.uses = dataflow.collect_free(tree) - dataflow.BUILTIN_NAMES
+        self.mutates = dataflow.collect_mutated(tree)
+        self.cacheable = True
+
+
+# ============================================
+# Content hashing
+# ============================================
+
+def _code_fingerprint(code: types.CodeType, h) -> Set[str]:
+    """Feed a code object (and nested ones) into h; return the global names it reads."""
+    h.update(code.co_code)
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_fingerprint(const, h)
+        else:
+            h.update(repr(const).encode('utf-8', 'backslashreplace'))
+    return names
+
+
+def fingerprint(value: Any, namespace: Dict[str, Any], h=None, seen: Optional[Set[int]] = None) -> bytes:
+    """
+    Content hash of value. User functions hash their code, defaults and the
+    globals they read (recursively), so redefining a helper changes the hash
+    of every cell that calls it. Raises Uncacheable for anything else that
+    can't be pickled.
+    """
+    top = h is None
+    if top:
+        h = hashlib.blake2b(digest_size=16)
+    seen = seen if seen is not None else set()
+    h.update(type(value).__qualname__.encode())
+
+    if isinstance(value, types.ModuleType):
+        h.update(value.__name__.encode())
+    elif np is not None and isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        h.update(f'{value.dtype.str}{value.shape}'.encode())
+        h.update(memoryview(np.ascontiguousarray(value)).cast('B'))
+    elif pd is not None and isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(repr(getattr(value, 'columns', value.name)).encode())
+        h.update(repr(list(getattr(value, 'dtypes', [value.dtype]))).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        except TypeError as e:
+            raise Uncacheable(str(e))
+    elif isinstance(value, types.FunctionType):
+        if id(value) not in seen:
+            seen.add(id(value))
+            h.update(f'{value.__module__}.{value.__qualname__}'.encode())
+            if value.__globals__ is namespace:
+                for name in sorted(_code_fingerprint(value.__code__, h)):
+                    if name in namespace:
+                        h.update(name.encode())
+                        fingerprint(namespace[name], namespace, h, seen)
+                fingerprint(value.__defaults__, namespace, h, seen)
+            fingerprint(value.__kwdefaults__, namespace, h, seen)
+            for cell in value.__closure__ or ():
+                try:
+                    contents = cell.cell_contents
+                except ValueError:
+                    # Not yet bound in the enclosing scope
+                    h.update(_MISSING)
+                    continue
+                fingerprint(contents, namespace, h, seen)
+            wrapped = getattr(value, '__wrapped__', None)
+            if wrapped is not None:
+                # Decorated helpers (e.g. @persist_cache) hash the function they wrap
+                fingerprint(wrapped, getattr(wrapped, '__globals__', namespace), h, seen)
+    elif isinstance(value, (type, types.BuiltinFunctionType)):
+        if getattr(value, '__module__', None) == '__main__':
+            raise Uncacheable(f'{value!r} is defined in the session')
+        h.update(f'{value.__module__}.{value.__qualname__}'.encode())
+    else:
+        try:
+            h.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            raise Uncacheable(str(e))
+    return h.digest() if top else b''
+
+
+# ============================================
+# Cache
+# ============================================
+
+class _Pending:
+    """State carried from CellMemo.begin() to CellMemo.store() for one execution."""
+    __slots__ = ('analysis', 'key')
+
+    def __init__(self, analysis: _Analysis, key: Optional[bytes]):
+        self.analysis = analysis
+        self.key = key
+
+
+class CellMemo:
+    """Per-session memo of cell results with hit/miss and time-saved accounting."""
+
+    def __init__(self, directory: Optional[str] = None, memory_bytes: int = MEMORY_BYTES,
+                 disk_bytes: int = DISK_BYTES, min_seconds: float = MIN_SECONDS):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.min_seconds = min_seconds
+        self._entries: 'OrderedDict[bytes, bytes]' = OrderedDict()
+        self._memory_used = 0
+        self._analyses: 'OrderedDict[str, _Analysis]' = OrderedDict()
+        # Code digests of cells slow enough to be worth fingerprinting up front
+        self._slow: Set[bytes] = set()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'uncacheable': 0,
+                      'seconds_saved': 0.0, 'fingerprint_seconds': 0.0}
+
+    # ----------------------------------------
+    # Execution hooks
+    # ----------------------------------------
+
+    def _analyze(self, code: str, mode: str) -> _Analysis:
+        cache_key = f'{mode}\0{code}'
+        analysis = self._analyses.get(cache_key)
+        if analysis is None:
+            analysis = _Analysis(code, mode)
+            self._analyses[cache_key] = analysis
+            if len(self._analyses) > 1024:
+                self._analyses.popitem(last=False)
+        return analysis
+
+    def _key(self, analysis: _Analysis, namespace: Dict[str, Any]) -> Optional[bytes]:
+        started = time.perf_counter()
+        h = hashlib.blake2b(analysis.digest, digest_size=20)
+        try:
+            for name in sorted(analysis.uses):
+                h.update(name.encode() + b'\0')
+                h.update(fingerprint(namespace[name], namespace) if name in namespace else _MISSING)
+        except Uncacheable:
+            return None
+        finally:
+            self.stats['fingerprint_seconds'] += time.perf_counter() - started
+        return h.digest()
+
+    def begin(self, code: str, mode: str, namespace: Dict[str, Any]) -> Tuple[Optional[_Pending], Optional[Dict[str, Any]]]:
+        """
+        Look a cell up before it runs. Returns (pending, entry): entry is the
+        cached result on a hit; pending (None for impure cells) is passed to
+        store() after a miss.
+        """
+        analysis = self._analyze(code, mode)
+        mutated = {n for n in analysis.mutates if not isinstance(namespace.get(n), types.ModuleType)}
+        if not analysis.cacheable or mutated:
+            self.stats['uncacheable'] += 1
+            return None, None
+        if analysis.digest not in self._slow:
+            # Never seen running slowly: don't pay for hashing the inputs yet
+            return _Pending(analysis, None), None
+
+        key = self._key(analysis, namespace)
+        if key is None:
+            self.stats['uncacheable'] += 1
+            return None, None
+        blob = self._get(key)
+        if blob is not None:
+            try:
+                entry = snapshot.loads(blob)
+            except Exception:
+                entry = None
+            if entry is not None:
+                self.stats['hits'] += 1
+                self.stats['seconds_saved'] += entry['seconds']
+                return None, entry
+        self.stats['misses'] += 1
+        return _Pending(analysis, key), None
+
+    def store(self, pending: _Pending, namespace: Dict[str, Any], seconds: float, result: Dict[str, Any]):
+        """Cache a successful execution if it was slow enough to be worth it."""
+        if seconds < self.min_seconds:
+            return
+        analysis = pending.analysis
+        self._slow.add(analysis.digest)
+        key = pending.key
+        if key is None:
+            # Inputs weren't hashed before this run, and hashing them now could
+            # see values the cell changed; the next run hashes them first
+            return
+        entry = {
+            'values': {n: namespace[n] for n in analysis.binds if n in namespace},
+            'output': result.get('output', ''),
+            'result': result.get('result'),
+            'figures': result.get('figures'),
+            'seconds': seconds,
+        }
+        try:
+            blob = snapshot.dumps(entry)
+        except Exception:
+            self.stats['uncacheable'] += 1
+            return
+        self._put(key, blob)
+        self.stats['stored'] += 1
+
+    # ----------------------------------------
+    # Storage
+    # ----------------------------------------
+
+    def _path(self, key: bytes) -> str:
+        return os.path.join(self.directory, key.hex() + '.pkl')
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                return blob
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                blob = f.read()
+        except OSError:
+            return None
+        os.utime(self._path(key))
+        return blob
+
+    def _put(self, key: bytes, blob: bytes):
+        if len(blob) > self.memory_bytes:
+            self._spill(key, blob)
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._memory_used -= len(old)
+            self._entries[key] = blob
+            self._memory_used += len(blob)
+            evicted = []
+            while self._memory_used > self.memory_bytes:
+                old_key, old_blob = self._entries.popitem(last=False)
+                self._memory_used -= len(old_blob)
+                evicted.append((old_key, old_blob))
+        for old_key, old_blob in evicted:
+            self._spill(old_key, old_blob)
+
+    def _spill(self, key: bytes, blob: bytes):
+        if self.directory is None or len(blob) > self.disk_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(blob)
+        os.replace(path + '.tmp', path)
+        self._prune_disk()
+
+    def _disk_files(self):
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+        files = []
+        for fn in os.listdir(self.directory):
+            if fn.endswith('.pkl'):
+                st = os.stat(os.path.join(self.directory, fn))
+                files.append((st.st_mtime, st.st_size, os.path.join(self.directory, fn)))
+        return sorted(files)
+
+    def _prune_disk(self):
+        files = self._disk_files()
+        used = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if used <= self.disk_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            used -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._memory_used = 0
+        self._slow.clear()
+        for _, _, path in self._disk_files():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        disk = self._disk_files()
+        return {
+            **self.stats,
+            'seconds_saved': round(self.stats['seconds_saved'], 3),
+            'fingerprint_seconds': round(self.stats['fingerprint_seconds'], 3),
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else None,
+            'entries': len(self._entries),
+            'memory_bytes': self._memory_used,
+            'disk_entries': len(disk),
+            'disk_bytes': sum(size for _, size, _ in disk),
+        }
@@ -0,0 +1,189 @@
+"""
+Session Modules and Parallel Map
+Each interpreter's namespace is the __dict__ of a real module registered in
+sys.modules. multiprocessing's pickler is taught to ship functions and
+classes defined in cells to worker processes: by value with cloudpickle when
+it is installed, otherwise by reference into the session module (which
+forked workers inherit). multiprocessing.Pool, ProcessPoolExecutor and the
+`parallel_map` helper behind `%%parallel` therefore all work with code
+written in cells.
+"""
+
+import io
+import multiprocessing
+import os
+import pickle
+import secrets
+import sys
+import types
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import redirect_stdout
+from multiprocessing.reduction import ForkingPickler
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+try:
+    import cloudpickle
+except ImportError:
+    # Optional: without it cell code is pickled by reference, which only
+    # forked workers can resolve
+    cloudpickle = None
+
+
+SESSION_MODULE_PREFIX = '_interpreter_session_'
+START_METHOD = os.environ.get('INTERPRETER_PARALLEL_START_METHOD', '')
+
+# id(namespace dict) -> sys.modules key of the session module that owns it
+_namespaces: Dict[int, str] = {}
+
+
+# ============================================
+# Session modules
+# ============================================
+
+def create_session_module(namespace: Dict[str, Any]) -> types.ModuleType:
+    """
+    Register a new module whose __dict__ starts as `namespace`. Its __name__
+    stays whatever namespace says (normally '__main__', so `if __name__ ==
+    "__main__":` guards keep working); sys.modules uses a unique key.
+    """
+    key = SESSION_MODULE_PREFIX + secrets.token_hex(6)
+    module = types.ModuleType(key)
+    module.__dict__.update(namespace)
+    sys.modules[key] = module
+    _namespaces[id(module.__dict__)] = key
+    return module
+
+
+def release_session_module(module: types.ModuleType):
+    key = _namespaces.pop(id(module.__dict__), None)
+    if key is not None:
+        sys.modules.pop(key, None)
+
+
+def _owning_session(obj) -> Optional[str]:
+    """sys.modules key of the session that defined obj (a function or class), if any."""
+    if isinstance(obj, types.FunctionType):
+        return _namespaces.get(id(obj.__globals__))
+    if isinstance(obj, type) and obj.__module__ == '__main__':
+        for attr in vars(obj).values():
+            attr = getattr(attr, '__func__', getattr(attr, 'fget', attr))
+            if isinstance(attr, types.FunctionType) and id(attr.__globals__) in _namespaces:
+                return _namespaces[id(attr.__globals__)]
+        main = sys.modules.get('__main__')
+        if getattr(main, obj.__qualname__.split('.')[0], None) is not obj:
+            for key in _namespaces.values():
+                if vars(sys.modules[key]).get(obj.__qualname__.split('.')[0]) is obj:
+                    return key
+    return None
+
+
+def _lookup(key: str, qualname: str):
+    """Unpickle helper for by-reference cell objects (forked workers only)."""
+    obj = sys.modules[key]
+    for part in qualname.split('.'):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _reducer_override(self, obj):
+    if isinstance(obj, (types.FunctionType, type)):
+        key = _owning_session(obj)
+        if key is not None:
+            if cloudpickle is not None:
+                return pickle.loads, (cloudpickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL),)
+            return _lookup, (key, obj.__qualname__)
+    return NotImplemented
+
+
+# Every multiprocessing queue/pipe (Pool, ProcessPoolExecutor, Process args)
+# pickles through ForkingPickler
+ForkingPickler.reducer_override = _reducer_override
+
+
+# ============================================
+# Parallel map
+# ============================================
+
+def start_method() -> str:
+    """
+    forkserver (or spawn) when cell code can travel by value; a multithreaded
+    server should not fork. Without cloudpickle only fork can resolve it.
+    """
+    if START_METHOD:
+        return START_METHOD
+    methods = multiprocessing.get_all_start_methods()
+    if cloudpickle is None and 'fork' in methods:
+        return 'fork'
+    return 'forkserver' if 'forkserver' in methods else 'spawn'
+
+
+_worker_function: Optional[Callable] = None
+
+
+def _init_worker(payload: bytes):
+    global _worker_function
+    _worker_function = pickle.loads(payload)
+
+
+def _run_chunk(items: list):
+    """Worker: apply the mapped function to a chunk; returns (results, printed text)."""
+    func = _worker_function
+    out = io.StringIO()
+    with redirect_stdout(out):
+        results = [func(item) for item in items]
+    return results, out.getvalue()
+
+
+def parallel_map(func: Callable, iterable: Iterable, workers: Optional[int] = None,
+                 chunksize: int = 1, ordered: bool = True,
+                 on_output: Optional[Callable[[str], None]] = None) -> Iterator[Any]:
+    """
+    Yield func(item) for every item, computed in a process pool, as soon as
+    results are available (in input order unless ordered=False). Items are
+    consumed lazily with a bounded number of chunks in flight. Text the
+    workers print is passed to on_output (default: this process's stdout).
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, int(chunksize))
+    # Pickled once and unpickled once per worker, not once per chunk
+    payload = bytes(ForkingPickler.dumps(func))
+    on_output = on_output or (lambda text: print(text, end=''))
+    items = iter(iterable)
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method()),
+                               initializer=_init_worker, initargs=(payload,))
+    try:
+        pending = {}
+        ready = {}
+        next_submit = next_yield = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < 2 * workers:
+                chunk = []
+                for item in items:
+                    chunk.append(item)
+                    if len(chunk) >= chunksize:
+                        break
+                if not chunk:
+                    exhausted = True
+                    break
+                pending[pool.submit(_run_chunk, chunk)] = next_submit
+                next_submit += 1
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                results, printed = future.result()
+                if printed:
+                    on_output(printed)
+                if ordered:
+                    ready[index] = results
+                else:
+                    yield from results
+            while next_yield in ready:
+                yield from ready.pop(next_yield)
+                next_yield += 1
+    finally:
+        # Also reached when the consumer stops early: drop queued chunks
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,255 @@
+"""
+Persistent Function Cache
+The `@persist_cache` decorator available in every session namespace. Results
+of decorated functions are pickled to a cache directory shared by all
+sessions, so they survive %reset, new sessions and server restarts.
+
+Keys hash the function (its code, defaults, closure variables and the
+globals it reads, see memo.fingerprint) together with the arguments; numpy
+arrays and pandas objects are hashed by content. Entries may expire (ttl)
+and can be compressed; the directory is kept under a byte budget by
+evicting the least recently used entries.
+"""
+
+import functools
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+import snapshot
+from memo import Uncacheable, fingerprint
+
+try:
+    import zstandard
+except ImportError:
+    # Optional: zlib is used for compressed entries instead
+    zstandard = None
+
+
+CACHE_DIR = os.environ.get(
+    'INTERPRETER_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), 'python-interpreter-cache'))
+MAX_BYTES = int(os.environ.get('INTERPRETER_CACHE_MAX', 5 * 1024 ** 3))
+
+# One-byte codec tag at the start of every entry file
+_RAW, _ZLIB, _ZSTD = b'0', b'1', b'2'
+_UNSAFE = re.compile(r'[^\w.]+')
+
+
+class PersistentCache:
+    """
+    A directory of cached results. Files are named
+    `<function>-<function hash>-<argument hash>.pkl` so one function's entries
+    can be listed and cleared; file mtimes drive LRU eviction.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._usage = None
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stored': 0, 'evicted': 0,
+                      'uncacheable': 0, 'seconds_saved': 0.0}
+
+    # ----------------------------------------
+    # Entries
+    # ----------------------------------------
+
+    def _files(self) -> List[os.DirEntry]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [e for e in os.scandir(self.directory) if e.name.endswith('.pkl')]
+
+    def usage(self) -> int:
+        if self._usage is None:
+            self._usage = sum(e.stat().st_size for e in self._files())
+        return self._usage
+
+    def get(self, filename: str):
+        """Return (True, value) for a live entry, (False, None) otherwise."""
+        path = os.path.join(self.directory, filename)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.stats['misses'] += 1
+            return False, None
+        try:
+            entry = snapshot.loads(_decompress(data))
+        except Exception:
+            self._remove(path)
+            self.stats['misses'] += 1
+            return False, None
+        if entry['expires'] is not None and entry['expires'] < time.time():
+            self._remove(path)
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return False, None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.stats['hits'] += 1
+        self.stats['seconds_saved'] += entry['seconds']
+        return True, entry['value']
+
+    def put(self, filename: str, value: Any, seconds: float, ttl: Optional[float] = None,
+            compress: bool = False):
+        entry = {'value': value, 'seconds': seconds, 'created': time.time(),
+                 'expires': time.time() + ttl if ttl else None}
+        try:
+            data = _compress(snapshot.dumps(entry), compress)
+        except Exception:
+            self.stats['uncacheable'] += 1
+            return
+        if len(data) > self.max_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, filename)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            replacing = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            self._usage = self.usage() - replacing + len(data)
+        self.stats['stored'] += 1
+        if self._usage > self.max_bytes:
+            self.prune()
+
+    def _remove(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.unlink(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._usage is not None:
+                self._usage -= size
+
+    def prune(self):
+        """Evict least recently used entries until the directory fits max_bytes."""
+        with self._lock:
+            files = sorted(self._files(), key=lambda e: e.stat().st_mtime)
+            used = sum(e.stat().st_size for e in files)
+            for e in files:
+                if used <= self.max_bytes:
+                    break
+                size = e.stat().st_size
+                try:
+                    os.unlink(e.path)
+                except OSError:
+                    continue
+                used -= size
+                self.stats['evicted'] += 1
+            self._usage = used
+
+    def entries(self, function: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Cached entries (optionally of one function), most recently used first."""
+        out = []
+        prefix = _safe(function) + '-' if function else ''
+        for e in self._files():
+            if e.name.startswith(prefix):
+                st = e.stat()
+                out.append({'file': e.name, 'function': e.name.split('-')[0],
+                            'size': st.st_size, 'last_used': st.st_mtime})
+        return sorted(out, key=lambda x: -x['last_used'])
+
+    def clear(self, function: Optional[str] = None) -> int:
+        removed = 0
+        for entry in self.entries(function):
+            self._remove(os.path.join(self.directory, entry['file']))
+            removed += 1
+        return removed
+
+    def status(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'seconds_saved': round(self.stats['seconds_saved'], 3),
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else None,
+            'entries': len(self._files()),
+            'bytes': self.usage(),
+            'max_bytes': self.max_bytes,
+            'directory': self.directory,
+        }
+
+
+def _safe(name: str) -> str:
+    return _UNSAFE.sub('_', name)[:80] or 'function'
+
+
+def _compress(data: bytes, compress: bool) -> bytes:
+    if not compress:
+        return _RAW + data
+    if zstandard is not None:
+        return _ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+    return _ZLIB + zlib.compress(data, 6)
+
+
+def _decompress(data: bytes) -> bytes:
+    tag, body = data[:1], data[1:]
+    if tag == _ZLIB:
+        return zlib.decompress(body)
+    if tag == _ZSTD:
+        if zstandard is None:
+            raise ValueError('entry is zstd-compressed but zstandard is not installed')
+        return zstandard.ZstdDecompressor().decompress(body)
+    return body
+
+
+_default_cache = None
+
+
+def default_cache() -> PersistentCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PersistentCache()
+    return _default_cache
+
+
+def persist_cache(func: Optional[Callable] = None, *, ttl: Optional[float] = None,
+                  compress: bool = False, cache: Optional[PersistentCache] = None):
+    """
+    Cache a function's results on disk.
+
+        @persist_cache
+        def features(df): ...
+
+        @persist_cache(ttl=3600, compress=True)
+        def embed(texts): ...
+
+    Calls with arguments that can't be hashed run uncached. The wrapper has
+    `.cache_clear()` and `.cache_entries()`.
+    """
+    def decorate(fn: Callable) -> Callable:
+        name = _safe(getattr(fn, '__qualname__', getattr(fn, '__name__', 'function')))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            store = cache or default_cache()
+            try:
+                namespace = getattr(fn, '__globals__', {})
+                fn_hash = fingerprint(fn, namespace).hex()[:16]
+                arg_hash = fingerprint((args, sorted(kwargs.items())), namespace).hex()
+            except Uncacheable:
+                store.stats['uncacheable'] += 1
+                return fn(*args, **kwargs)
+            filename = f'{name}-{fn_hash}-{arg_hash}.pkl'
+            found, value = store.get(filename)
+            if found:
+                return value
+            started = time.perf_counter()
+            value = fn(*args, **kwargs)
+            store.put(filename, value, time.perf_counter() - started, ttl=ttl, compress=compress)
+            return value
+
+        wrapper.cache_clear = lambda: (cache or default_cache()).clear(name)
+        wrapper.cache_entries = lambda: (cache or default_cache()).entries(name)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
@@ -4,6 +4,7 @@ Supports variables, functions, classes, control flow, and more
 """
 
 import ast
+import inspect
 import sys
 import io
 import traceback
@@ -14,19 +15,124 @@ import json
 from datetime import datetime
 import pprint
 import re
+import secrets
+import shlex
+import os
+import threading
+import itertools
+import concurrent.futures
+
+from inspector import bounded_repr
+from table_format import format_table, to_columns
+from workspace import Workspace, WorkspaceError
+import data_loader
+from dataflow import CellGraph
+from memo import CellMemo
+from persistent_cache import persist_cache, default_cache
+import parallel
+from session_loop import SessionLoop
+from jobs import JobManager, cancel_raise, current_job, raise_in_thread
+import capture
+from bounded_output import BoundedBuffer, OutputSpool, result_text
+from timings import PhaseTimer
+from completion import Completer
+from introspection import Introspector
+
+# Longest repr sent for a variable in execution results / the variables panel
+VARIABLE_REPR_CHARS = 1000
+
+# Console display of DataFrames is bounded (head/tail) so printing a huge frame
+# stays cheap; the full data is available through the paged variable viewer.
+DISPLAY_MAX_ROWS = 60
+DISPLAY_MIN_ROWS = 20
+DISPLAY_MAX_COLUMNS = 50
+DISPLAY_MAX_COLWIDTH = 200
 
-# Ensure pandas console display shows full DataFrame content (no truncation)
 try:
     import pandas as pd
-    pd.set_option('display.max_columns', None)
+    pd.set_option('display.max_columns', DISPLAY_MAX_COLUMNS)
     pd.set_option('display.width', None)
-    pd.set_option('display.max_colwidth', None)
-    pd.set_option('display.max_rows', None)
+    pd.set_option('display.max_colwidth', DISPLAY_MAX_COLWIDTH)
+    pd.set_option('display.max_rows', DISPLAY_MAX_ROWS)
+    pd.set_option('display.min_rows', DISPLAY_MIN_ROWS)
     pd.set_option('display.expand_frame_repr', False)
 except Exception:
     # pandas may not be installed or needed; ignore if import fails
     pd = None
 
+# Calls that need a running event loop even in cells that don't await
+LOOP_CALLS = ('create_task', 'ensure_future', 'get_running_loop')
+# Calls that start (and block on) a loop of their own
+LOOP_RUNNERS = ('run', 'run_until_complete')
+
+# Traceback frames hidden from users besides this module's own
+HANDOFF_FRAMES = ('session_loop.py', 'concurrent/futures', 'jobs.py')
+
+# Helpers every session namespace starts with; hidden from variable listings
+# unless the user rebinds the name
+SESSION_HELPERS = {
+    'persist_cache': persist_cache,
+    'parallel_map': parallel.parallel_map,
+}
+
+
+def _loop_usage(code: str, mode: str) -> tuple:
+    """
+    (awaits, calls_loop_api) for a cell, from its AST: whether it uses
+    await/async for/async with anywhere, and whether it calls one of LOOP_CALLS
+    without also running its own loop through asyncio.run() or
+    run_until_complete() (which fail inside the session loop's thread).
+    Names imported from asyncio under an alias are resolved.
+    """
+    try:
+        tree = ast.parse(code, mode='eval' if mode == 'eval' else 'exec')
+    except SyntaxError:
+        return False, False
+    modules, imported = {'asyncio'}, {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(a.asname for a in node.names if a.name == 'asyncio' and a.asname)
+        elif isinstance(node, ast.ImportFrom) and node.module == 'asyncio':
+            imported.update((a.asname or a.name, a.name) for a in node.names)
+    awaits = loop_api = runs_loop = False
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Await, ast.AsyncFor, ast.AsyncWith)):
+            awaits = True
+        elif isinstance(node, ast.comprehension) and node.is_async:
+            awaits = True
+        elif isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Attribute):
+                name = func.attr
+                if name == 'run' and not (isinstance(func.value, ast.Name) and func.value.id in modules):
+                    # Only asyncio.run(); other .run() methods are unrelated
+                    continue
+            elif isinstance(func, ast.Name):
+                name = imported.get(func.id, func.id)
+                if name in LOOP_RUNNERS and func.id not in imported:
+                    # A bare run() that wasn't imported from asyncio here
+                    continue
+            else:
+                continue
+            loop_api = loop_api or name in LOOP_CALLS
+            runs_loop = runs_loop or name in LOOP_RUNNERS
+    return awaits, loop_api and not runs_loop
+
+
+class _Execution:
+    """A top-level execute() call, from queueing to its result."""
+
+    def __init__(self, ticket: int):
+        self.ticket = ticket
+        self.thread = threading.get_ident()
+        self.started = time.time()
+        self.interruptible = False  # True only while user code runs
+        self.interrupted = False
+        self.future = None  # set while the cell awaits on the session loop
+        self.loop_thread = None  # set while the cell runs inside the session loop's thread
+        self.result = None
+        self.done = threading.Event()
+
 
 class PythonInterpreter:
     """
@@ -34,32 +140,140 @@ class PythonInterpreter:
     error handling, and output capturing.
     """
     
-    def __init__(self):
+    def __init__(self, workspace: Optional[Workspace] = None):
         """Initialize the interpreter with a clean global namespace."""
-        self.global_namespace = {
+        # The namespace is a real module's __dict__ (registered in sys.modules)
+        # so cell-defined functions can be sent to worker processes
+        self.module = parallel.create_session_module({
             '__builtins__': builtins,
             '__name__': '__main__',
             '__doc__': None,
-        }
+            **SESSION_HELPERS,
+        })
+        self.global_namespace = self.module.__dict__
         self.local_namespace = {}
-        self.output_buffer = io.StringIO()
-        self.error_buffer = io.StringIO()
+        # Keeps the head and tail of what a cell prints (see _new_output_buffer)
+        self.output_buffer = BoundedBuffer()
+        # stderr of a cell isn't part of its result: bounded, never spilled
+        self.error_buffer = BoundedBuffer()
         self.execution_history = []
         self.input_values = []  # Queue of input values to use
         self.input_prompts = []  # Track prompts asked
         self.waiting_for_input = False  # Track if execution is waiting for input
         self.current_input_prompt = ""  # Current input prompt text
         self.pending_code = ""  # Code that's waiting for input to continue
+        # Answers the current run has read, replayed when pending_code is retried
+        self._run_answers = []
+        self._pending_answers = []
         self.magic_commands = self._init_magic_commands()  # Magic command registry
         # Buffer where plt.show() captured figures will be stored as dicts
         self._show_capture_buffer = []
         # Flags and holders for wrapping plt.show()
         self._plt_show_installed = False
         self._orig_plt_show = None
+        # Bumped whenever variables or history may have changed; the epoch makes
+        # tags from before a reset distinct from tags after it
+        self._state_epoch = secrets.token_hex(4)
+        self.state_version = 0
+        self._volatile_tags = itertools.count()
+        # Private directory for uploads, %save and %mmap (kept across resets)
+        self.workspace = workspace or Workspace()
+        # Full output of cells that printed more than the buffer keeps (/api/output)
+        self.outputs = OutputSpool(os.path.join(self.workspace.path, '.output'))
+        # Crash-recovery journal (see attach_journal); kept across resets
+        self.journal = None
+        self.recovery_report = None
+        self._pending_journal = None
+        self._recovery_lock = threading.Lock()
+        self._in_magic = False
+        self._consumed_inputs = []
+        self._input_calls = 0
+        # Opt-in cache of pure cells' results (see enable_memo); kept across resets
+        self.memo = None
+        # Event loop for cells using top-level await (created on first use)
+        self._loop = None
+        # Def-use graph of cells submitted through run_cell()
+        self.cells = CellGraph()
+        # Cells running in background threads (%bg, /api/jobs)
+        self.jobs = JobManager(self)
+        # Symbol index behind complete(), synced lazily after executions
+        self.completer = Completer()
+        # Signature/hover cache and the index of where each name was last defined
+        self.introspector = Introspector()
+        # Foreground runs queue on _run_lock; tickets below _cancel_before
+        # were superseded or interrupted while waiting
+        self._run_lock = threading.RLock()
+        self._state_lock = threading.Lock()
+        self._tickets = itertools.count()
+        self._cancel_before = 0
+        self._queued = 0
+        self._current_run: Optional[_Execution] = None
         
     def reset(self):
         """Reset the interpreter to initial state."""
-        self.__init__()
+        journal, report, memo = self.journal, self.recovery_report, self.memo
+        self.jobs.cancel_all()
+        parallel.release_session_module(self.module)
+        if self._loop is not None:
+            self._loop.close()
+        self.__init__(workspace=self.workspace)
+        self.recovery_report = report
+        # Memo keys hash the inputs' contents, so entries stay valid after a reset
+        self.memo = memo
+        if journal is not None:
+            # An empty checkpoint supersedes everything journaled so far
+            self.journal = journal
+            journal.checkpoint(self)
+
+    def attach_journal(self, journal):
+        """
+        Record executed cells in `journal`. State already on disk is restored
+        lazily, by the first ensure_recovered() call, not here.
+        """
+        self._pending_journal = journal
+
+    def ensure_recovered(self):
+        """Restore state from the attached journal once; later calls are no-ops."""
+        if self._pending_journal is None:
+            return self.recovery_report
+        with self._recovery_lock:
+            journal = self._pending_journal
+            if journal is None:
+                return self.recovery_report
+            if journal.has_state():
+                self.recovery_report = journal.recover(self)
+            self.journal = journal
+            self._pending_journal = None
+        return self.recovery_report
+
+    def enable_memo(self, enabled: bool = True):
+        """Turn result memoization on (spilling to the workspace) or off."""
+        if not enabled:
+            self.memo = None
+        elif self.memo is None:
+            self.memo = CellMemo(directory=os.path.join(self.workspace.path, '.memo'))
+        return self.memo
+
+    def session_loop(self) -> SessionLoop:
+        """The session's event loop; must first be called while no cell output is redirected."""
+        if self._loop is None:
+            self._loop = SessionLoop(name=f'session-loop-{self.workspace.session_id}', outputs=self.outputs)
+        return self._loop
+
+    def _namespace_ids(self) -> Dict[str, int]:
+        return {k: id(v) for k, v in self.get_all_variables().items()}
+
+    def _journal_cell(self, code: str, mode: str, result: Dict[str, Any], ids_before: Dict[str, int]):
+        """Append a finished cell to the journal (and checkpoint when one is due)."""
+        try:
+            ids_after = self._namespace_ids()
+            changed = [k for k, v in ids_after.items() if ids_before.get(k) != v]
+            self.journal.record_cell(code, mode, result, self._consumed_inputs, changed)
+            if self.journal.checkpoint_due():
+                self.journal.checkpoint(self)
+        except Exception as e:
+            # Journaling must never break execution
+            print(f"[JOURNAL] failed to record cell: {e}", file=sys.__stderr__)
     
     def _init_magic_commands(self):
         """Initialize magic command registry."""
@@ -79,6 +293,14 @@ class PythonInterpreter:
             '%pprint': self._magic_pprint,
             '%json': self._magic_json,
             '%table': self._magic_table,
+            '%mmap': self._magic_mmap,
+            '%read': self._magic_read,
+            '%memo': self._magic_memo,
+            '%cache': self._magic_cache,
+            '%%parallel': self._magic_parallel,
+            '%tasks': self._magic_tasks,
+            '%bg': self._magic_bg,
+            '%jobs': self._magic_jobs,
         }
     
     def _is_magic_command(self, code: str) -> bool:
@@ -236,13 +458,28 @@ class PythonInterpreter:
 🎨 Output Formatting:
   %pprint <expr>    - Pretty print any Python object
   %json <expr>      - Format as JSON with syntax highlighting
-  %table <list>     - Format list of dicts as a table
+  %table <data>     - Format list of dicts/tuples, DataFrame or array as a table
 
 🗂️ Session Management:
   %history          - Show execution history
-  %save <file>      - Save session to file
-  %load <file>      - Load and execute Python file
+  %save <file>      - Save session to a file in the session workspace
+  %load <file>      - Load and execute Python file (workspace first)
+  %mmap <file> [as name] [--dtype D] [--shape a,b] [--offset N] [--mode r|r+|c]
+                    - Memory-map an uploaded .npy/binary file as an array
+  %read <file> [as name] [--engine auto|pyarrow|process|pandas] [--chunksize N] [--to pandas|numpy]
+                    - Load a CSV/TSV/JSON-lines file in parallel, with progress
   %reset            - Reset interpreter (clear all variables)
+  %cache <function> [--ttl S] [--compress] | list | clear [function]
+                    - Cache a function's results on disk across sessions (or use @persist_cache)
+  %%parallel for x in items [-> results] [--workers N] [--chunksize K] [--unordered]
+                    - Map the cell body over items in a process pool
+  %tasks [cancel [name]]
+                    - List (or cancel) asyncio tasks started by cells using await
+  %bg <code>        - Run code as a background job and return at once
+  %jobs [<id> | cancel <id>]
+                    - List background jobs, show one's output, or cancel it
+  %memo [on|off|clear]
+                    - Cache results of slow, pure cells; shows hit rate and time saved
 
 🧹 Utility:
   %clear            - Clear output screen
@@ -292,12 +529,14 @@ class PythonInterpreter:
         filename = args.strip() or f'session_{datetime.now().strftime("%Y%m%d_%H%M%S")}.py'
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(f"# Python Interpreter Session\n")
-                f.write(f"# Saved: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                for item in self.execution_history:
-                    if item.get('success') and item.get('code'):
-                        f.write(f"{item['code']}\n\n")
+            lines = [
+                "# Python Interpreter Session\n",
+                f"# Saved: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+            ]
+            for item in self.execution_history:
+                if item.get('success') and item.get('code'):
+                    lines.append(f"{item['code']}\n\n")
+            self.workspace.write_text(filename, ''.join(lines))
             
             return {
                 'success': True,
@@ -331,7 +570,9 @@ class PythonInterpreter:
             }
         
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
+            # Workspace files take precedence over paths on the server
+            path = self.workspace.resolve(filename) if self.workspace.exists(filename) else filename
+            with open(path, 'r', encoding='utf-8') as f:
                 code = f.read()
             
             result = self.execute(code)
@@ -357,6 +598,393 @@ class PythonInterpreter:
                 'is_magic': True
             }
     
+    def _parse_file_magic(self, args: str, flags: tuple):
+        """
+        Parse `<file> [as name] [--flag value ...]` for file-loading magics.
+        Returns (filename, variable name, {flag: value}); raises ValueError.
+        The variable name defaults to the file's stem.
+        """
+        tokens = shlex.split(args)
+        if not tokens:
+            raise ValueError('No file given')
+        filename, options, name = tokens[0], {}, None
+        rest = tokens[1:]
+        while rest:
+            token = rest.pop(0)
+            if token != 'as' and token[2:] not in flags:
+                raise ValueError(f'Unexpected argument: {token}')
+            if not rest:
+                raise ValueError(f'Missing value after {token}')
+            if token == 'as':
+                name = rest.pop(0)
+            else:
+                options[token[2:]] = rest.pop(0)
+
+        if name is None:
+            stem = os.path.basename(filename).split('.')[0]
+            name = re.sub(r'\W', '_', stem)
+            if not name or name[0].isdigit():
+                name = f'_{name}'
+        if not name.isidentifier():
+            raise ValueError(f"'{name}' is not a valid variable name")
+        return filename, name, options
+
+    def _magic_mmap(self, args: str) -> Dict[str, Any]:
+        """Memory-map a workspace file into a variable."""
+        usage = 'Usage: %mmap <file> [as name] [--dtype D] [--shape a,b] [--offset N] [--mode r|r+|c]'
+        try:
+            filename, name, options = self._parse_file_magic(args, ('dtype', 'shape', 'offset', 'mode'))
+            shape = options.get('shape')
+            if shape is not None:
+                shape = tuple(int(s) for s in shape.strip('()').split(',') if s.strip())
+            offset = int(options.get('offset', 0))
+        except ValueError as e:
+            return {
+                'success': False,
+                'output': '',
+                'error': f'{e}\n{usage}',
+                'result': None,
+                'variables': {},
+                'is_magic': True
+            }
+
+        try:
+            array = self.workspace.memmap(filename, dtype=options.get('dtype'), shape=shape,
+                                          offset=offset, mode=options.get('mode', 'r'))
+        except FileNotFoundError:
+            return {
+                'success': False,
+                'output': '',
+                'error': f'File not found in workspace: {filename}',
+                'result': None,
+                'variables': {},
+                'is_magic': True
+            }
+        except (WorkspaceError, ValueError, TypeError) as e:
+            return {
+                'success': False,
+                'output': '',
+                'error': f'Cannot map {filename}: {str(e)}',
+                'result': None,
+                'variables': {},
+                'is_magic': True
+            }
+
+        self.set_variable(name, array)
+        return {
+            'success': True,
+            'output': f'🗺️ {name} = memory-mapped {filename}: shape {array.shape}, dtype {array.dtype} '
+                      f'({array.nbytes:,} bytes, read on access)',
+            'error': '',
+            'result': None,
+            # Serialized: the raw map would be paged in and sent in full
+            'variables': self._serialized_variables(),
+            'is_magic': True
+        }
+    
+    def _magic_read(self, args: str) -> Dict[str, Any]:
+        """Load a CSV/TSV/JSON-lines file into a DataFrame (or array)."""
+        usage = ('Usage: %read <file> [as name] [--engine auto|pyarrow|process|pandas] '
+                 '[--chunksize N] [--to pandas|numpy]')
+        try:
+            filename, name, options = self._parse_file_magic(args, ('engine', 'chunksize', 'to'))
+            chunksize = int(options['chunksize']) if 'chunksize' in options else None
+        except ValueError as e:
+            return {
+                'success': False,
+                'output': '',
+                'error': f'{e}\n{usage}',
+                'result': None,
+                'variables': {},
+                'is_magic': True
+            }
+
+        # Workspace files take precedence over paths on the server
+        path = self.workspace.resolve(filename) if self.workspace.exists(filename) else filename
+        if not os.path.isfile(path):
+            return {
+                'success': False,
+                'output': '',
+                'error': f'File not found: {filename}',
+                'result': None,
+                'variables': {},
+                'is_magic': True
+            }
+
+        # Progress goes to the output buffer as it happens, so anything
+        # watching the running cell sees it before the load finishes
+        self.output_buffer = self._new_output_buffer()
+
+        def progress(done, total):
+            percent = 100 * done / total if total else 100
+            self.output_buffer.write(f'⏳ {filename}: {percent:5.1f}% '
+                                     f'({done / 1e6:,.1f} / {total / 1e6:,.1f} MB)\n')
+
+        started = time.perf_counter()
+        try:
+            value, engine = data_loader.read_file(path, engine=options.get('engine', 'auto'),
+                                                  chunksize=chunksize, to=options.get('to', 'pandas'),
+                                                  progress=progress)
+        except Exception as e:
+            return {
+                'success': False,
+                'output': self.output_buffer.getvalue(),
+                'error': f'Failed to read {filename}: {str(e)}',
+                'result': None,
+                'variables': {},
+                'is_magic': True
+            }
+        elapsed = time.perf_counter() - started
+
+        self.set_variable(name, value)
+        shape = ' x '.join(f'{n:,}' for n in getattr(value, 'shape', (len(value),)))
+        self.output_buffer.write(f'📥 {name} = {type(value).__name__} ({shape}) from {filename} '
+                                 f'in {elapsed:.2f}s using the {engine} engine\n')
+        return {
+            'success': True,
+            'output': self.output_buffer.getvalue(),
+            'error': '',
+            'result': None,
+            'variables': self._serialized_variables(),
+            'is_magic': True
+        }
+    
+    def _magic_memo(self, args: str) -> Dict[str, Any]:
+        """Turn cell memoization on/off, clear it, or show hit rate and time saved."""
+        action = args.strip().lower() or 'stats'
+        if action not in ('on', 'off', 'clear', 'stats'):
+            raise ValueError('Usage: %memo [on|off|clear|stats]')
+        if action == 'on':
+            self.enable_memo(True)
+        elif action == 'off':
+            self.enable_memo(False)
+        elif action == 'clear' and self.memo is not None:
+            self.memo.clear()
+
+        if self.memo is None:
+            output = 'Memoization is off. Use %memo on to cache results of slow, pure cells.'
+        else:
+            st = self.memo.status()
+            hit_rate = f"{st['hit_rate']:.0%}" if st['hit_rate'] is not None else 'n/a'
+            output = (f"Memoization is on (cells slower than {self.memo.min_seconds}s are cached)\n"
+                      f"  hits: {st['hits']}  misses: {st['misses']}  hit rate: {hit_rate}\n"
+                      f"  time saved: {st['seconds_saved']:.3f}s  (hashing inputs took {st['fingerprint_seconds']:.3f}s)\n"
+                      f"  entries: {st['entries']} in memory ({st['memory_bytes']:,} bytes), "
+                      f"{st['disk_entries']} on disk ({st['disk_bytes']:,} bytes)\n"
+                      f"  not cacheable: {st['uncacheable']}")
+        return {
+            'success': True,
+            'output': output,
+            'error': '',
+            'result': self.memo.status() if self.memo is not None else None,
+            'variables': {},
+            'is_magic': True
+        }
+    
+    def _magic_cache(self, args: str) -> Dict[str, Any]:
+        """Wrap a function with @persist_cache, or list/clear the persistent cache."""
+        parts = shlex.split(args)
+        action = parts[0] if parts else 'stats'
+        cache = default_cache()
+
+        if action == 'clear':
+            removed = cache.clear(parts[1] if len(parts) > 1 else None)
+            output = f'Removed {removed} cached result(s)'
+        elif action == 'list':
+            entries = cache.entries(parts[1] if len(parts) > 1 else None)
+            lines = [f"  {e['function']:<30} {e['size']:>12,} bytes  "
+                     f"{datetime.fromtimestamp(e['last_used']).strftime('%Y-%m-%d %H:%M:%S')}"
+                     for e in entries[:100]]
+            output = f'{len(entries)} cached result(s)' + ('\n' + '\n'.join(lines) if lines else '')
+        elif action == 'stats':
+            st = cache.status()
+            hit_rate = f"{st['hit_rate']:.0%}" if st['hit_rate'] is not None else 'n/a'
+            output = (f"Persistent cache at {st['directory']}\n"
+                      f"  entries: {st['entries']}  size: {st['bytes']:,} / {st['max_bytes']:,} bytes\n"
+                      f"  hits: {st['hits']}  misses: {st['misses']}  hit rate: {hit_rate}  "
+                      f"time saved: {st['seconds_saved']:.3f}s")
+        else:
+            # %cache <function> [--ttl SECONDS] [--compress]
+            name, ttl, compress = action, None, False
+            rest = parts[1:]
+            while rest:
+                flag = rest.pop(0)
+                if flag == '--compress':
+                    compress = True
+                elif flag == '--ttl':
+                    if not rest:
+                        raise ValueError('Missing value after --ttl')
+                    ttl = float(rest.pop(0))
+                else:
+                    raise ValueError(f'Unknown option: {flag}')
+            func = self.global_namespace.get(name)
+            if not callable(func):
+                raise ValueError(f"'{name}' is not a function in this session. "
+                                 "Usage: %cache <function> [--ttl S] [--compress] | list | clear [function] | stats")
+            if hasattr(func, 'cache_entries'):
+                # Already cached: re-wrap the original with the new options
+                func = func.__wrapped__
+            self.global_namespace[name] = persist_cache(func, ttl=ttl, compress=compress)
+            output = f"'{name}' results are now cached on disk" + (f' for {ttl:g}s' if ttl else '')
+
+        return {
+            'success': True,
+            'output': output,
+            'error': '',
+            'result': None,
+            'variables': {},
+            'is_magic': True
+        }
+    
+    def _magic_parallel(self, args: str) -> Dict[str, Any]:
+        """
+        Map the cell body over an iterable in a process pool:
+
+            %%parallel for x in items -> results [--workers N] [--chunksize K] [--unordered]
+            y = heavy(x)
+            y * 2
+
+        The body's last expression is the per-item result. Results are
+        collected into the target variable (default `results`) as workers
+        finish; progress and anything the workers print stream into the output.
+        """
+        usage = ('Usage: %%parallel for <name> in <iterable> [-> <result>] '
+                 '[--workers N] [--chunksize K] [--unordered]\n<cell body>')
+        header, _, body = args.partition('\n')
+        spec, _, flags = header.partition(' --')
+        match = re.match(r'^for\s+([A-Za-z_]\w*)\s+in\s+(.+?)(?:\s*->\s*([A-Za-z_]\w*))?\s*$', spec.strip())
+        if not match or not body.strip():
+            raise ValueError(usage)
+        var, iterable_src, target = match.group(1), match.group(2), match.group(3) or 'results'
+        options = {'workers': None, 'chunksize': 1, 'unordered': False}
+        words = shlex.split('--' + flags) if flags else []
+        while words:
+            flag = words.pop(0)
+            if flag == '--unordered':
+                options['unordered'] = True
+            elif flag in ('--workers', '--chunksize'):
+                if not words:
+                    raise ValueError(f'Missing value after {flag}')
+                options[flag[2:]] = int(words.pop(0))
+            else:
+                raise ValueError(f'Unknown option: {flag}\n{usage}')
+
+        # Compile the body into a one-argument function whose globals are the
+        # session namespace; a trailing expression becomes its return value
+        tree = ast.parse(body)
+        if tree.body and isinstance(tree.body[-1], ast.Expr):
+            tree.body[-1] = ast.Return(value=tree.body[-1].value)
+        func_def = ast.FunctionDef(
+            name='_parallel_cell',
+            args=ast.arguments(posonlyargs=[], args=[ast.arg(arg=var)], kwonlyargs=[],
+                               kw_defaults=[], defaults=[]),
+            body=tree.body, decorator_list=[], returns=None)
+        module = ast.fix_missing_locations(ast.Module(body=[func_def], type_ignores=[]))
+        scope = {}
+        exec(compile(module, '<parallel cell>', 'exec'), self.global_namespace, scope)
+        items = list(eval(iterable_src, self.global_namespace))
+
+        self.output_buffer = self._new_output_buffer()
+        started = time.perf_counter()
+        last = 0.0
+        results = []
+        for value in parallel.parallel_map(scope['_parallel_cell'], items, workers=options['workers'],
+                                           chunksize=options['chunksize'],
+                                           ordered=not options['unordered'],
+                                           on_output=self.output_buffer.write):
+            results.append(value)
+            now = time.monotonic()
+            if now - last >= data_loader.PROGRESS_INTERVAL:
+                last = now
+                self.output_buffer.write(f'⏳ {len(results):,} / {len(items):,} items\n')
+
+        self.set_variable(target, results)
+        self.output_buffer.write(f'⚡ {target} = list of {len(results):,} results in '
+                                 f'{time.perf_counter() - started:.2f}s '
+                                 f'({options["workers"] or os.cpu_count()} workers)\n')
+        return {
+            'success': True,
+            'output': self.output_buffer.getvalue(),
+            'error': '',
+            'result': None,
+            'variables': self._serialized_variables(),
+            'is_magic': True
+        }
+    
+    def _magic_tasks(self, args: str) -> Dict[str, Any]:
+        """List asyncio tasks still running in the session, or cancel them."""
+        parts = args.split()
+        if self._loop is None:
+            output = 'No event loop yet: run a cell that uses await first.'
+        elif parts and parts[0] == 'cancel':
+            cancelled = self._loop.cancel(parts[1] if len(parts) > 1 else None)
+            output = f'Cancelled {cancelled} task(s)'
+        elif parts:
+            raise ValueError('Usage: %tasks [cancel [name]]')
+        else:
+            tasks = self._loop.tasks()
+            lines = [f"  {t['name']:<20} {t['coro']:<30} {'done' if t['done'] else 'running'}" for t in tasks]
+            output = f'{len(tasks)} task(s)' + ('\n' + '\n'.join(lines) if lines else '')
+            background, _ = self._loop.drain_output()
+            if background:
+                output += '\n\nOutput since the last cell:\n' + background
+        return {
+            'success': True,
+            'output': output,
+            'error': '',
+            'result': None,
+            'variables': {},
+            'is_magic': True
+        }
+    
+    def _magic_bg(self, args: str) -> Dict[str, Any]:
+        """Run code as a background job; returns at once with the job id."""
+        if not args.strip():
+            raise ValueError('Usage: %bg <code>')
+        job = self.jobs.submit(args)
+        return {
+            'success': True,
+            'output': f'Started job {job.id} (check with %jobs {job.id})',
+            'error': '',
+            'result': None,
+            'variables': {},
+            'job_id': job.id,
+            'is_magic': True
+        }
+    
+    def _magic_jobs(self, args: str) -> Dict[str, Any]:
+        """List background jobs, show one job's output, or cancel one."""
+        parts = args.split()
+        if len(parts) == 2 and parts[0] == 'cancel':
+            job = self.jobs.cancel(parts[1])
+            if job is None:
+                raise ValueError(f'No job {parts[1]}')
+            output = f'Job {job.id}: {job.status}'
+        elif len(parts) == 1:
+            job = self.jobs.get(parts[0])
+            if job is None:
+                raise ValueError(f'No job {parts[0]}')
+            info = job.to_dict(serialize=self._serialize_value)
+            output = f"Job {job.id}: {info['status']}\n{info['output']}"
+            if info['result'] is not None:
+                output += f"\nResult: {info['result']}"
+            if info['error']:
+                output += f"\n{info['error']}"
+        elif parts:
+            raise ValueError('Usage: %jobs [<id> | cancel <id>]')
+        else:
+            jobs = self.jobs.list()
+            lines = [f"  {j.id}  {j.status:<10} {j.code.splitlines()[0][:50]}" for j in jobs]
+            output = f'{len(jobs)} job(s)' + ('\n' + '\n'.join(lines) if lines else '')
+        return {
+            'success': True,
+            'output': output,
+            'error': '',
+            'result': None,
+            'variables': {},
+            'is_magic': True
+        }
+    
     def _magic_who(self, args: str) -> Dict[str, Any]:
         """List all variable names."""
         vars_dict = self.get_all_variables()
@@ -503,12 +1131,12 @@ class PythonInterpreter:
             }
     
     def _magic_table(self, args: str) -> Dict[str, Any]:
-        """Format list of dicts as a table."""
+        """Format list of dicts/tuples, DataFrame or array as a table."""
         if not args:
             return {
                 'success': False,
                 'output': '',
-                'error': 'Usage: %table <variable containing list of dicts>',
+                'error': 'Usage: %table <list of dicts/tuples, DataFrame or array>',
                 'result': None,
                 'variables': {},
                 'is_magic': True
@@ -518,11 +1146,11 @@ class PythonInterpreter:
             # Evaluate the expression
             value = eval(args, self.global_namespace, self.local_namespace)
             
-            if not isinstance(value, (list, tuple)):
+            if not isinstance(value, (list, tuple)) and to_columns(value) is None:
                 return {
                     'success': False,
                     'output': '',
-                    'error': 'Value must be a list or tuple',
+                    'error': 'Value must be a list, tuple, DataFrame or 2-D/record array',
                     'result': None,
                     'variables': {},
                     'is_magic': True
@@ -570,13 +1198,19 @@ class PythonInterpreter:
         """
         Mock input function that uses pre-provided values or raises an error.
         """
+        if current_job() is not None:
+            # A background job ran into the foreground cell's input() hook
+            raise RuntimeError('input() is not available in background jobs')
         # Store prompt for tracking
         if prompt:
             self.input_prompts.append(prompt)
         
         if self.input_values:
             # We have pre-provided values, use them
+            self._input_calls += 1
             value = self.input_values.pop(0)
+            self._consumed_inputs.append(value)
+            self._run_answers.append(value)
             # Do not print prompt/value here. Frontends or callers should
             # control display of prompts to avoid duplicate echoing.
             return str(value)
@@ -614,8 +1248,9 @@ class PythonInterpreter:
                 'variables': {}
             }
         
-        # Add the input value
-        self.input_values.append(value)
+        # The retry runs the code from the top: replay the earlier answers first
+        self.input_values = self._pending_answers + [value]
+        self._pending_answers = []
         self.waiting_for_input = False
         
         # Continue execution with the pending code
@@ -764,13 +1399,17 @@ class PythonInterpreter:
 
         return figs
     
-    def execute(self, code: str, mode: str = 'exec') -> Dict[str, Any]:
+    def execute(self, code: str, mode: str = 'exec', supersede: bool = False,
+                cell_id: Optional[str] = None) -> Dict[str, Any]:
         """
-        Execute Python code and return results.
+        Execute Python code and return results. Runs are serialized: a call
+        made while another cell runs waits for it.
         
         Args:
             code: Python code to execute
             mode: Execution mode ('exec', 'eval', or 'single')
+            supersede: Interrupt the running cell and drop queued runs first
+            cell_id: The /api/cells id the code belongs to (recorded for go-to-definition)
             
         Returns:
             Dictionary containing:
@@ -780,20 +1419,169 @@ class PythonInterpreter:
                 - result: Return value (for eval mode)
                 - variables: Current variables in namespace
                 - is_magic: True if this was a magic command
+                - interrupted: True if stopped by interrupt() (output is partial)
+                - superseded: True if dropped from the queue without running
+                - timings: nanoseconds spent per phase (queue, validate, exec,
+                  serialize, figures, ...) plus the total
         """
-        # Ensure plotting uses a safe non-interactive backend
+        timer = PhaseTimer()
+        run = self._current_run
+        if run is not None and run.thread == threading.get_ident():
+            # Nested (magics running code): part of the outer run
+            result, recorded = self._execute(code, mode, timer)
+            return self._finish_run(code, result, recorded, timer, cell_id)
+        if supersede:
+            self.interrupt(queued=True)
+        with self._state_lock:
+            run = _Execution(next(self._tickets))
+            self._queued += 1
+        # Bound now: a %reset inside the run replaces the attribute
+        run_lock = self._run_lock
         try:
-            self._configure_matplotlib_backend()
-        except Exception:
-            pass
+            with timer.phase('queue'):
+                run_lock.acquire()
+            try:
+                with self._state_lock:
+                    self._queued -= 1
+                    superseded = run.ticket < self._cancel_before
+                    if not superseded:
+                        self._current_run = run
+                if superseded:
+                    run.result = {
+                        'success': False,
+                        'output': '',
+                        'error': 'Superseded by a newer run before it started',
+                        'result': None,
+                        'variables': {},
+                        'code': code,
+                        'superseded': True
+                    }
+                    return run.result
+                try:
+                    run.result, recorded = self._execute(code, mode, timer)
+                    return self._finish_run(code, run.result, recorded, timer, cell_id)
+                finally:
+                    with self._state_lock:
+                        self._current_run = None
+            finally:
+                run_lock.release()
+        finally:
+            run.done.set()
+
+    def interrupt(self, queued: bool = False) -> Dict[str, Any]:
+        """
+        Raise KeyboardInterrupt in the running cell (cancelling it on the
+        session loop if it is awaiting) and, if queued, drop the runs waiting
+        behind it. The exception lands at the cell's next Python instruction,
+        so a long call into C (time.sleep, a big numpy op) finishes first.
+        Returns {'interrupted': bool, 'cancelled_queued': int, 'run': _Execution or None}.
+        """
+        with self._state_lock:
+            run = self._current_run
+            dropped = 0
+            if queued:
+                self._cancel_before = next(self._tickets)
+                dropped = self._queued
+            interrupted = False
+            if run is not None and not run.interrupted:
+                if run.future is not None:
+                    run.interrupted = True
+                    run.future.cancel()
+                    interrupted = True
+                elif run.interruptible:
+                    target = run.loop_thread if run.loop_thread is not None else run.thread
+                    run.interrupted = raise_in_thread(target)
+                    interrupted = run.interrupted
+        return {'interrupted': interrupted, 'cancelled_queued': dropped, 'run': run}
+
+    def _set_interruptible(self, run: Optional[_Execution], value: bool):
+        # Under the same lock as interrupt(): no KeyboardInterrupt can be
+        # scheduled for this thread once user code has returned
+        if run is not None:
+            with self._state_lock:
+                run.interruptible = value
+
+    def _eval_in_loop(self, run: Optional[_Execution], compiled, ns: Dict[str, Any]) -> Any:
+        """eval() for cells run inside the session loop's thread; interrupt() raises there meanwhile."""
+        if run is not None:
+            with self._state_lock:
+                run.loop_thread = threading.get_ident()
+                run.interruptible = True
+        try:
+            return eval(compiled, ns, ns)
+        finally:
+            if run is not None:
+                with self._state_lock:
+                    run.interruptible = False
+                    run.loop_thread = None
+                    if run.interrupted:
+                        # Scheduled but not raised yet: it must not hit the loop's next task
+                        cancel_raise(threading.get_ident())
+
+    def _run_on_loop(self, coro) -> Any:
+        """Run a cell's coroutine on the session loop; interrupt() cancels it."""
+        run = self._current_run
+        future = self._loop.submit(coro)
+        if run is not None:
+            run.future = future
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            if run is not None and run.interrupted:
+                raise KeyboardInterrupt from None
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if run is not None:
+                run.future = None
+
+    def _finish_run(self, code: str, result: Dict[str, Any], recorded: bool,
+                    timer: PhaseTimer, cell_id: Optional[str]) -> Dict[str, Any]:
+        """Add the timings and, if the run belongs in it, append the completed result to history."""
+        result['timings'] = timer.to_dict()
+        if recorded:
+            # Appended only once complete: history readers cache an entry's encoding
+            self.execution_history.append(result)
+        self._index_run(code, result, cell_id)
+        return result
+
+    def _execute(self, code: str, mode: str, timer: PhaseTimer) -> tuple:
+        """Body of execute(), without the run queue. Returns (result, whether it goes in the history)."""
+        # Ensure plotting uses a safe non-interactive backend
+        with timer.phase('setup'):
+            try:
+                self._configure_matplotlib_backend()
+            except Exception:
+                pass
+
+        self.state_version += 1
+
+        # Nested executions (e.g. from %load) are covered by the outer record
+        journaling = self.journal is not None and not self._in_magic
+        if journaling:
+            with timer.phase('journal'):
+                self._consumed_inputs = []
+                ids_before = self._namespace_ids()
 
         # Check if this is a magic command
         if self._is_magic_command(code):
-            return self._execute_magic_command(code)
+            nested, self._in_magic = self._in_magic, True
+            try:
+                with timer.phase('magic'):
+                    result = self._execute_magic_command(code)
+            finally:
+                self._in_magic = nested
+            if journaling:
+                with timer.phase('journal'):
+                    self._journal_cell(code, mode, result, ids_before)
+            return result, False
         
         # Clear buffers
-        self.output_buffer = io.StringIO()
-        self.error_buffer = io.StringIO()
+        self.output_buffer = self._new_output_buffer()
+        self.error_buffer = BoundedBuffer()
+        self._run_answers = []
         
         result = {
             'success': False,
@@ -805,19 +1593,44 @@ class PythonInterpreter:
         }
         
         # Validate syntax first
-        is_valid, syntax_error = self.validate_syntax(code)
+        with timer.phase('validate'):
+            is_valid, syntax_error = self.validate_syntax(code)
         if not is_valid:
             result['error'] = syntax_error
-            return result
+            return result, False
+
+        memo_pending = None
+        if self.memo is not None:
+            with timer.phase('memo_lookup'):
+                memo_pending, hit = self.memo.begin(code, mode, self.global_namespace)
+                if hit is not None:
+                    result = self._restore_memoized(result, hit)
+            if hit is not None:
+                if journaling:
+                    with timer.phase('journal'):
+                        self._journal_cell(code, mode, result, ids_before)
+                return result, True
+            inputs_before = self._input_calls
+
+        # Top-level await runs on the session loop; create it before stdout is
+        # redirected (see session_loop)
+        awaits, in_loop = _loop_usage(code, mode)
+        if awaits or in_loop:
+            self.session_loop()
         
         # Execute the code
         old_stdout = sys.stdout
         old_stderr = sys.stderr
         old_input = builtins.input  # Save original input
+        # Routed rather than plain buffers so background jobs and event-loop
+        # tasks running meanwhile keep writing to their own output
+        cell_output = capture.CaptureTarget(self.output_buffer)
+        cell_errors = capture.CaptureTarget(self.error_buffer)
+        capture_token = capture.push(cell_output, cell_errors)
         
         try:
-            sys.stdout = self.output_buffer
-            sys.stderr = self.error_buffer
+            sys.stdout = capture.StreamRouter(self.output_buffer)
+            sys.stderr = capture.StreamRouter(self.error_buffer, capture.STDERR)
             builtins.input = self.mock_input  # Replace input with our mock
             
             # Use a single unified namespace for globals and locals when
@@ -826,23 +1639,41 @@ class PythonInterpreter:
             # within the same executed block (avoids NameError for names
             # that would otherwise end up only in the locals dict).
             ns = self.global_namespace
+            started = time.perf_counter()
+            exec_started = time.perf_counter_ns()
+            compiled = compile(code, '<string>', 'eval' if mode == 'eval' else 'exec',
+                               flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+            run = self._current_run
+            try:
+                self._set_interruptible(run, True)
+                if compiled.co_flags & inspect.CO_COROUTINE:
+                    # The cell awaits: run it on the session's persistent loop
+                    exec_result = self._run_on_loop(eval(compiled, ns, ns))
+                elif in_loop:
+                    # Starts tasks without awaiting: needs to run inside the loop too.
+                    # The waiting thread isn't running the cell, so it is no target
+                    self._set_interruptible(run, False)
+                    exec_result = self._loop.call(self._eval_in_loop, run, compiled, ns)
+                else:
+                    exec_result = eval(compiled, ns, ns)
+            finally:
+                self._set_interruptible(run, False)
+                timer.add('exec', time.perf_counter_ns() - exec_started)
             if mode == 'eval':
-                # Evaluate expression and return result
-                exec_result = eval(code, ns, ns)
                 result['result'] = exec_result
-            else:
-                # Execute statements
-                exec(code, ns, ns)
+            elapsed = time.perf_counter() - started
             
             result['success'] = True
             result['output'] = self.output_buffer.getvalue()
             
             # Capture current variables (excluding builtins and private vars)
-            result['variables'] = {
-                k: self._serialize_value(v) 
-                for k, v in {**self.global_namespace, **self.local_namespace}.items()
-                if not k.startswith('__') and k != '__builtins__'
-            }
+            with timer.phase('serialize'):
+                result['variables'] = self._serialized_variables()
+            
+        except KeyboardInterrupt as e:
+            result['error'] = self._format_exception(e)
+            result['output'] = self.output_buffer.getvalue()
+            result['interrupted'] = True
             
         except Exception as e:
             error_msg = str(e)
@@ -851,11 +1682,13 @@ class PythonInterpreter:
             if error_msg.startswith("INPUT_REQUIRED:"):
                 prompt = error_msg.replace("INPUT_REQUIRED:", "")
                 self.pending_code = code  # Store the code for retry
+                self._pending_answers = list(self._run_answers)
                 result['error'] = ''
                 result['output'] = self.output_buffer.getvalue()
                 result['input_required'] = True
                 result['input_prompt'] = prompt
-                return result
+                self._finish_output(result)
+                return result, False
             
             result['error'] = self._format_exception(e)
             result['output'] = self.output_buffer.getvalue()
@@ -864,27 +1697,153 @@ class PythonInterpreter:
             sys.stdout = old_stdout
             sys.stderr = old_stderr
             builtins.input = old_input  # Restore original input
+            capture.pop(capture_token)
+            # Tasks that outlive the cell must not write into its result
+            cell_output.close()
+            cell_errors.close()
+            # The run changed the namespace since the bump at its start
+            self.state_version += 1
+        self._finish_output(result)
             
-        # Add to history
-        self.execution_history.append(result)
         # Capture any matplotlib figures (PNG base64) and include in result
-        try:
-            figures = self._capture_matplotlib_figures()
-            if figures:
-                result['figures'] = figures
-        except Exception:
-            # don't let capture errors affect execution result
-            pass
+        with timer.phase('figures'):
+            try:
+                figures = self._capture_matplotlib_figures()
+                if figures:
+                    result['figures'] = figures
+            except Exception:
+                # don't let capture errors affect execution result
+                pass
+
+        if self._loop is not None:
+            background, truncated = self._loop.drain_output()
+            if background:
+                result['background_output'] = background
+            if truncated:
+                result['background_output_truncated'] = truncated
+
+        # Cells that ended up reading input() depend on more than their code and names
+        if memo_pending is not None and result['success'] and self._input_calls == inputs_before:
+            with timer.phase('memo_store'):
+                try:
+                    self.memo.store(memo_pending, self.global_namespace, elapsed, result)
+                except Exception as e:
+                    print(f"[MEMO] failed to store result: {e}", file=sys.__stderr__)
         
+        if journaling:
+            with timer.phase('journal'):
+                self._journal_cell(code, mode, result, ids_before)
+        return result, True
+    
+    def _new_output_buffer(self) -> BoundedBuffer:
+        """A fresh capture buffer; the previous one's spill file is closed."""
+        self.output_buffer.finish()
+        return BoundedBuffer(self.outputs)
+    
+    def _finish_output(self, result: Dict[str, Any]):
+        """Close the run's output and report what was left out of result['output']."""
+        self.output_buffer.finish()
+        if self.output_buffer.truncated_bytes:
+            result['output_truncated'] = self.output_buffer.summary()
+    
+    def _index_run(self, code: str, result: Dict[str, Any], cell_id: Optional[str] = None):
+        """Update the completion and definition indexes after a run."""
+        self.completer.note_code(code)
+        if result.get('success'):
+            # Runs are numbered by their position in execution_history (%history)
+            self.introspector.record(code, cell_id, len(self.execution_history))
+    
+    def _restore_memoized(self, result: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the result of a memo hit: rebind the cell's values and replay its output."""
+        self.global_namespace.update(entry['values'])
+        result['success'] = True
+        result['output'] = entry['output']
+        result['result'] = entry['result']
+        if entry.get('figures'):
+            result['figures'] = entry['figures']
+        result['variables'] = {
+            k: self._serialize_value(v)
+            for k, v in self.get_all_variables().items()
+        }
+        result['memoized'] = {'seconds_saved': round(entry['seconds'], 6)}
         return result
     
-    def execute_line(self, line: str) -> Dict[str, Any]:
+    def run_job(self, job) -> Any:
+        """
+        Run a background job's code in the session namespace. Called in the
+        job's thread with its output already routed (see jobs.JobManager).
+        """
+        ids_before = self._namespace_ids() if self.journal is not None else None
+        ns = self.global_namespace
+        compiled = compile(job.code, '<string>', 'eval' if job.mode == 'eval' else 'exec',
+                           flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+        try:
+            if compiled.co_flags & inspect.CO_COROUTINE:
+                # Cancelled through the future rather than by interrupting this thread
+                job.future = self.session_loop().submit(eval(compiled, ns, ns))
+                value = job.future.result()
+            else:
+                value = eval(compiled, ns, ns)
+        finally:
+            # Failed and cancelled jobs may have changed the namespace too
+            self.state_version += 1
+        if job.mode != 'eval':
+            value = None
+        output = job.output.buffer
+        output.finish()
+        record = {
+            'success': True,
+            'output': output.getvalue(),
+            'error': '',
+            'result': value,
+            'variables': {},
+            'code': job.code,
+            'job_id': job.id
+        }
+        if output.truncated_bytes:
+            record['output_truncated'] = output.summary()
+        self.execution_history.append(record)
+        self._index_run(job.code, record)
+        if ids_before is not None:
+            self._journal_cell(job.code, job.mode, record, ids_before)
+        return value
+    
+    def run_cell(self, cell_id: str, code: str, reactive: bool = True,
+                 position: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run a notebook-style cell and, if reactive, the cells downstream of
+        the names it defines (see dataflow.CellGraph.run).
+        """
+        return self.cells.run(cell_id, code, lambda source, cell: self.execute(source, cell_id=cell),
+                              reactive=reactive, position=position)
+    
+    def complete(self, code: str, line: int, ch: int, limit: int = 50) -> Dict[str, Any]:
+        """Ranked completions at (line, ch) of code; see completion.Completer."""
+        ns = self.global_namespace
+        # A name count change or the end of a run means the index may be stale
+        version = (self._state_epoch, self.state_version, len(ns), self._current_run is None)
+        return self.completer.complete(code, line, ch, ns, version=version, limit=limit)
+    
+    def signature_help(self, code: str, line: int, ch: int) -> Dict[str, Any]:
+        """Signature of the innermost open call at (line, ch); see introspection.Introspector."""
+        return self.introspector.signature(code, line, ch, self.global_namespace)
+    
+    def hover(self, code: str, line: int, ch: int) -> Dict[str, Any]:
+        """Type, signature and docs of the symbol under (line, ch)."""
+        return self.introspector.hover(code, line, ch, self.global_namespace)
+    
+    def find_definition(self, code: str, line: int, ch: int) -> Dict[str, Any]:
+        """Where the symbol under (line, ch) was last defined (cell and line, or source file)."""
+        return self.introspector.definition(code, line, ch, self.global_namespace)
+    
+    def execute_line(self, line: str, supersede: bool = False) -> Dict[str, Any]:
         """
         Execute a single line of Python code (REPL-style).
         Automatically determines if it's an expression or statement.
         
         Args:
             line: Single line of Python code
+            supersede: See execute()
             
         Returns:
             Execution result dictionary
@@ -904,13 +1863,19 @@ class PythonInterpreter:
         # Try to execute as expression first (to get return value)
         try:
             ast.parse(line, mode='eval')
-            result = self.execute(line, mode='eval')
+            result = self.execute(line, mode='eval', supersede=supersede)
             if result['success'] and result['result'] is not None:
-                result['output'] = str(result['result']) + '\n' + result['output']
+                # Bounded like printed output: a huge value must not be rendered in full
+                text, omitted = result_text(result['result'])
+                result['output'] = text + '\n' + result['output']
+                if omitted:
+                    truncated = result.setdefault('output_truncated', {
+                        'total_bytes': 0, 'truncated_bytes': 0, 'spilled_bytes': 0, 'output_id': None})
+                    truncated['truncated_bytes'] += omitted
             return result
         except SyntaxError:
             # Not an expression, execute as statement
-            return self.execute(line, mode='exec')
+            return self.execute(line, mode='exec', supersede=supersede)
     
     def _format_exception(self, exception: Exception) -> str:
         """Format exception with traceback."""
@@ -923,6 +1888,9 @@ class PythonInterpreter:
         filtered_lines = []
         skip_next = False
         for line in tb_lines:
+            if any(part in line for part in HANDOFF_FRAMES):
+                # Frames of the hand-off to the session event loop or a job thread
+                continue
             if 'python_interpreter.py' in line:
                 skip_next = True
                 continue
@@ -942,7 +1910,8 @@ class PythonInterpreter:
         
         # Check if it's a pandas DataFrame
         if hasattr(value, 'to_string') and 'DataFrame' in str(type(value)):
-            return value.to_string()
+            return value.to_string(max_rows=DISPLAY_MAX_ROWS, min_rows=DISPLAY_MIN_ROWS,
+                                   max_cols=DISPLAY_MAX_COLUMNS)
         
         # Check if it's a dict - pretty print JSON-style
         if isinstance(value, dict):
@@ -965,53 +1934,26 @@ class PythonInterpreter:
         except:
             return pprint.pformat(d, width=80)
     
-    def _format_table(self, data: list) -> str:
-        """Format list of dicts as a table."""
-        if not data:
+    def _format_table(self, data: Any) -> str:
+        """Format tabular data (list of dicts/tuples, DataFrame, record array) as a table."""
+        if isinstance(data, (list, tuple)) and not data:
             return '[]'
-        
-        # Get all keys
-        keys = set()
-        for item in data:
-            if isinstance(item, dict):
-                keys.update(item.keys())
-        keys = sorted(keys)
-        
-        if not keys:
-            return str(data)
-        
-        # Calculate column widths
-        col_widths = {k: len(str(k)) for k in keys}
-        for item in data:
-            for key in keys:
-                if key in item:
-                    col_widths[key] = max(col_widths[key], len(str(item[key])))
-        
-        # Build table
-        lines = []
-        
-        # Header
-        header = ' | '.join(str(k).ljust(col_widths[k]) for k in keys)
-        lines.append(header)
-        lines.append('-' * len(header))
-        
-        # Rows
-        for item in data:
-            row = ' | '.join(str(item.get(k, '')).ljust(col_widths[k]) for k in keys)
-            lines.append(row)
-        
-        return '\n'.join(lines)
+        try:
+            return format_table(data, max_rows=DISPLAY_MAX_ROWS, min_rows=DISPLAY_MIN_ROWS)
+        except TypeError:
+            # Not tabular (e.g. a list of scalars)
+            return bounded_repr(data, VARIABLE_REPR_CHARS)
     
     def _serialize_value(self, value: Any) -> str:
         """Convert a value to a string representation."""
         try:
             # Handle common types
-            if isinstance(value, (int, float, str, bool, type(None))):
-                return repr(value)
-            elif isinstance(value, (list, tuple, set)):
-                return repr(value)
-            elif isinstance(value, dict):
+            if isinstance(value, (int, float, bool, type(None))):
                 return repr(value)
+            elif isinstance(value, (str, list, tuple, set, dict)):
+                # Bounded repr: huge or deeply nested values are truncated
+                # (explore them with the inspector instead)
+                return bounded_repr(value, VARIABLE_REPR_CHARS)
             elif callable(value):
                 return f"<function {getattr(value, '__name__', 'unknown')}>"
             elif hasattr(value, '__class__'):
@@ -1021,6 +1963,10 @@ class PythonInterpreter:
         except:
             return "<unserializable object>"
     
+    def _serialized_variables(self) -> Dict[str, str]:
+        """User variables as the bounded strings results carry (see _serialize_value)."""
+        return {k: self._serialize_value(v) for k, v in self.get_all_variables().items()}
+
     def get_variable(self, name: str) -> Optional[Any]:
         """Get the value of a variable from namespace."""
         if name in self.local_namespace:
@@ -1032,12 +1978,18 @@ class PythonInterpreter:
     def set_variable(self, name: str, value: Any):
         """Set a variable in the global namespace."""
         self.global_namespace[name] = value
+        self.completer.note_names([name])
+        self.state_version += 1
     
+    def has_variable(self, name: str) -> bool:
+        """Check whether a user variable exists (get_variable() can't tell None from missing)."""
+        return name in self.get_all_variables()
+
     def get_all_variables(self) -> Dict[str, Any]:
         """Get all variables in the current namespace."""
         return {
             k: v for k, v in {**self.global_namespace, **self.local_namespace}.items()
-            if not k.startswith('__') and k != '__builtins__'
+            if not k.startswith('__') and k != '__builtins__' and SESSION_HELPERS.get(k) is not v
         }
     
     def get_history(self) -> list:
@@ -1047,6 +1999,22 @@ class PythonInterpreter:
     def clear_history(self):
         """Clear execution history."""
         self.execution_history = []
+        self.state_version += 1
+
+    def has_background_work(self) -> bool:
+        """True while a background job or a task on the session loop may still touch the namespace."""
+        return self.jobs.running() or (self._loop is not None and self._loop.live_tasks > 0)
+
+    def state_tag(self) -> str:
+        """Opaque tag that changes whenever variables or history may have changed."""
+        tag = f"{self._state_epoch}-{self.state_version}"
+        loop = self._loop
+        if loop is not None:
+            tag += f"-{loop.finished_tasks}"
+        if self._current_run is not None or self.has_background_work():
+            # Values can change at any moment: a tag taken now must never validate later
+            tag += f"-live{next(self._volatile_tags)}"
+        return tag
 
 
 # Demo usage
@@ -0,0 +1,124 @@
+"""
+Session Event Loop
+A long-lived asyncio event loop per interpreter, running in its own thread.
+Cells compiled with top-level await are run on it, so tasks a cell starts
+(asyncio.create_task, servers, ...) keep running
+between cells. Anything those tasks print while no cell is running is
+captured in the session instead of the server console and handed to the
+next result as `background_output`, bounded like cell output.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
+
+import capture
+from bounded_output import BoundedBuffer, OutputSpool
+
+
+class SessionLoop:
+    """An event loop running forever in a daemon thread."""
+
+    def __init__(self, name: str = 'session-loop', outputs: Optional[OutputSpool] = None):
+        # Must run while no cell output is redirected (see capture.install_router)
+        capture.install_router()
+        self.loop = asyncio.new_event_loop()
+        # What tasks print once the cell that started them has finished
+        self.background = capture.CaptureTarget(factory=lambda: BoundedBuffer(outputs))
+        # Task counts (updated on the loop thread) let state_tag notice tasks
+        # that change the namespace between cells
+        self.live_tasks = 0
+        self.finished_tasks = 0
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.set_task_factory(self._create_task)
+        capture.register_thread(self.background)
+        self._ready.set()
+        try:
+            while True:
+                try:
+                    self.loop.run_forever()
+                    break
+                except KeyboardInterrupt:
+                    # interrupt() aimed at a cell running inside the loop (see
+                    # PythonInterpreter._eval_in_loop): the cell's task has
+                    # already failed with it, the loop keeps serving
+                    continue
+        finally:
+            capture.unregister_thread()
+
+    def _create_task(self, loop, coro, **kwargs):
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+        self.live_tasks += 1
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task):
+        self.live_tasks -= 1
+        self.finished_tasks += 1
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop without waiting for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a cell's coroutine on the loop and wait for its result."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def call(self, func, *args) -> Any:
+        """Call a plain function inside the loop thread (so it sees a running loop)."""
+        async def invoke():
+            return func(*args)
+        return self.run(invoke())
+
+    def drain_output(self) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """(what tasks printed since the last drain, its truncation summary or None)."""
+        buffer = self.background.drain()
+        buffer.finish()
+        return buffer.getvalue(), buffer.summary() if buffer.truncated_bytes else None
+
+    def tasks(self) -> List[Dict[str, Any]]:
+        """Tasks still scheduled on the loop (the calling cell's own task excluded)."""
+        async def collect():
+            current = asyncio.current_task()
+            return [t for t in asyncio.all_tasks() if t is not current]
+
+        found = asyncio.run_coroutine_threadsafe(collect(), self.loop).result(5)
+        return [{'name': t.get_name(), 'coro': getattr(t.get_coro(), '__qualname__', repr(t.get_coro())),
+                 'done': t.done()} for t in found]
+
+    def cancel(self, name: Optional[str] = None) -> int:
+        """Cancel the task called `name`, or every task when name is None."""
+        async def cancel_tasks():
+            current = asyncio.current_task()
+            hit = [t for t in asyncio.all_tasks()
+                   if t is not current and (name is None or t.get_name() == name)]
+            for t in hit:
+                t.cancel()
+            return len(hit)
+
+        return asyncio.run_coroutine_threadsafe(cancel_tasks(), self.loop).result(5)
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        try:
+            self.cancel()
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        if not self._thread.is_alive():
+            self.loop.close()
+
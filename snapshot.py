@@ -0,0 +1,206 @@
+"""
+Namespace Snapshots
+Writes a session namespace to a directory and reads it back. numpy arrays are
+stored as raw .npy files and come back memory-mapped (copy-on-write), so
+restoring a snapshot costs almost nothing until the data is touched; arrays
+that are already memory maps of workspace files are stored by reference.
+Everything else is pickled with cloudpickle (or dill) when installed, so
+functions and classes defined in cells survive too.
+
+Arrays are written from inside the pickle (as persistent ids), wherever they
+sit in the namespace, so an array bound to two names or held in a dict comes
+back as one shared object, not as copies.
+"""
+
+import io
+import os
+import pickle
+import types
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import cloudpickle
+except ImportError:
+    # Optional: dill or the stdlib pickle is used instead
+    cloudpickle = None
+
+try:
+    import dill
+except ImportError:
+    dill = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+MANIFEST = 'namespace.pkl'
+
+
+def dumps(obj: Any, persistent_id: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Pickle obj with the most capable pickler available."""
+    if persistent_id is None:
+        if cloudpickle is not None:
+            return cloudpickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        if dill is not None:
+            return dill.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler_class = (cloudpickle.Pickler if cloudpickle is not None
+                     else dill.Pickler if dill is not None else pickle.Pickler)
+    buffer = io.BytesIO()
+    pickler = pickler_class(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = persistent_id
+    pickler.dump(obj)
+    return buffer.getvalue()
+
+
+def loads(data: bytes, persistent_load: Optional[Callable[[Any], Any]] = None) -> Any:
+    if persistent_load is None:
+        if dill is not None and cloudpickle is None:
+            return dill.loads(data)
+        return pickle.loads(data)
+    unpickler_class = dill.Unpickler if dill is not None and cloudpickle is None else pickle.Unpickler
+    unpickler = unpickler_class(io.BytesIO(data))
+    unpickler.persistent_load = persistent_load
+    return unpickler.load()
+
+
+def dumps_values(values: Dict[str, Any],
+                 persistent_id: Optional[Callable[[Any], Any]] = None) -> Tuple[bytes, List[str]]:
+    """
+    Pickle a dict of values in one go (keeping shared references), falling
+    back to value-by-value when something can't be pickled. Returns the blob
+    and the names that had to be left out.
+    """
+    try:
+        return dumps(values, persistent_id), []
+    except Exception:
+        parts, failed = {}, []
+        for name, value in values.items():
+            try:
+                parts[name] = dumps(value, persistent_id)
+            except Exception:
+                failed.append(name)
+        return dumps({'__per_value__': parts}), failed
+
+
+def loads_values(blob: bytes, persistent_load: Optional[Callable[[Any], Any]] = None) -> Dict[str, Any]:
+    values = loads(blob, persistent_load)
+    if '__per_value__' in values:
+        values = {name: loads(data, persistent_load) for name, data in values['__per_value__'].items()}
+    return values
+
+
+def history_for_pickle(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Execution history with the live objects left out, so it always pickles:
+    'result' can be anything (a generator, a socket...) and 'variables' is a
+    per-cell copy of the namespace summary.
+    """
+    return [{k: (None if k == 'result' else v) for k, v in entry.items() if k != 'variables'}
+            for entry in history]
+
+
+def _is_plain_array(value: Any) -> bool:
+    return (np is not None and type(value) is np.ndarray
+            and not value.dtype.hasobject and value.nbytes > 0)
+
+
+def _is_readonly_map(value: Any) -> bool:
+    # Copy-on-write maps may hold private changes, so they are saved by value
+    return (np is not None and isinstance(value, np.memmap)
+            and value.mode == 'r' and value.filename is not None)
+
+
+class _ArrayStore:
+    """persistent_id/persistent_load pair that keeps arrays out of the pickle."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.files: Dict[int, str] = {}
+        self.loaded: Dict[Any, Any] = {}
+        # Arrays written so far, kept alive so their ids stay unique while pickling
+        self._arrays: List[Any] = []
+
+    def persistent_id(self, value: Any) -> Optional[Tuple]:
+        if _is_readonly_map(value):
+            order = 'F' if value.flags.f_contiguous and not value.flags.c_contiguous else 'C'
+            return ('map', value.filename, value.dtype.str, value.shape, value.offset, order)
+        if not _is_plain_array(value):
+            return None
+        filename = self.files.get(id(value))
+        if filename is None:
+            filename = f'array-{len(self.files)}.npy'
+            np.save(os.path.join(self.directory, filename), value, allow_pickle=False)
+            self.files[id(value)] = filename
+            self._arrays.append(value)
+        return ('array', filename)
+
+    def persistent_load(self, pid: Tuple) -> Any:
+        value = self.loaded.get(pid)
+        if value is not None:
+            return value
+        if pid[0] == 'array':
+            # Copy-on-write map viewed as a plain ndarray: writable, paged in lazily
+            mapped = np.load(os.path.join(self.directory, pid[1]), mmap_mode='c', allow_pickle=False)
+            value = mapped.view(np.ndarray)
+        else:
+            _, filename, dtype, shape, offset, order = pid
+            try:
+                value = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape, order=order)
+            except Exception:
+                # The mapped file is gone or changed: load_namespace reports the name
+                return None
+        self.loaded[pid] = value
+        return value
+
+
+def save_namespace(directory: str, namespace: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Write `namespace` to `directory` (which must be new or empty).
+    Returns {'saved': [...], 'unpicklable': [...], 'bytes': int}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    modules, maps, values = {}, [], {}
+    for name, value in namespace.items():
+        if isinstance(value, types.ModuleType):
+            modules[name] = value.__name__
+        else:
+            values[name] = value
+            if _is_readonly_map(value):
+                maps.append(name)
+
+    store = _ArrayStore(directory)
+    blob, unpicklable = dumps_values(values, store.persistent_id if np is not None else None)
+    manifest = {'modules': modules, 'maps': maps, 'values': blob}
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+    size = sum(os.path.getsize(os.path.join(directory, fn)) for fn in os.listdir(directory))
+    saved = [n for n in namespace if n not in unpicklable]
+    return {'saved': saved, 'unpicklable': unpicklable, 'bytes': size}
+
+
+def load_namespace(directory: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Read a namespace written by save_namespace. Arrays are mapped, not read.
+    Returns (namespace, names that could not be restored).
+    """
+    with open(os.path.join(directory, MANIFEST), 'rb') as f:
+        manifest = pickle.load(f)
+    namespace, failed = {}, []
+    store = _ArrayStore(directory)
+    namespace.update(loads_values(manifest['values'], store.persistent_load))
+    for name, module_name in manifest['modules'].items():
+        try:
+            namespace[name] = __import__(module_name, fromlist=['_'])
+        except Exception:
+            failed.append(name)
+    for name in manifest['maps']:
+        if namespace.get(name) is None:
+            namespace.pop(name, None)
+            failed.append(name)
+    return namespace, failed
@@ -0,0 +1,171 @@
+"""
+Spotify playback state stream
+One background poller per authenticated user, fanned out to every open tab over SSE
+"""
+
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+# How often the server asks Spotify for playback state while someone is listening
+POLL_INTERVAL = 2.5
+# Push a progress update when the real position drifts this far from the
+# position the client would have interpolated on its own (i.e. after a seek)
+DRIFT_THRESHOLD_MS = 2000
+# Idle SSE connections get a comment line this often so dead sockets are noticed
+KEEPALIVE_INTERVAL = 15.0
+
+
+def _state_key(payload: Dict[str, Any]) -> tuple:
+    """Fields whose change always warrants a push (progress is handled separately)."""
+    player = payload.get('player') or {}
+    item = player.get('item') or {}
+    device = player.get('device') or {}
+    return (
+        payload.get('authenticated'),
+        payload.get('error'),
+        player.get('is_playing'),
+        item.get('id'),
+        item.get('duration_ms'),
+        device.get('id'),
+        device.get('volume_percent'),
+        player.get('shuffle_state'),
+        player.get('repeat_state'),
+    )
+
+
+class _UserPoller:
+    """Polls Spotify for a single user while at least one tab is subscribed."""
+
+    def __init__(self, hub: 'SpotifyStatusHub', key: str, token: Dict[str, Any]):
+        self.hub = hub
+        self.key = key
+        self.token = dict(token)
+        self.subscribers = []
+        self.last_payload = None
+        self.last_key = None
+        self.last_progress = None
+        self.last_push = 0.0
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name=f'spotify-poller-{self.key}', daemon=True)
+        self.thread.start()
+
+    def _should_push(self, payload: Dict[str, Any], now: float) -> bool:
+        """Return True if the payload differs from what subscribers can infer."""
+        key = _state_key(payload)
+        if key != self.last_key:
+            return True
+        player = payload.get('player') or {}
+        progress = player.get('progress_ms')
+        if progress is None or self.last_progress is None:
+            return progress != self.last_progress
+        expected = self.last_progress
+        if player.get('is_playing'):
+            expected += (now - self.last_push) * 1000
+        return abs(progress - expected) > DRIFT_THRESHOLD_MS
+
+    def _run(self):
+        while True:
+            with self.hub.lock:
+                if not self.subscribers:
+                    # Last tab went away; retire this poller
+                    if self.hub.pollers.get(self.key) is self:
+                        del self.hub.pollers[self.key]
+                    return
+                token = dict(self.token)
+
+            try:
+                payload, new_token = self.hub.fetch(token)
+            except Exception as e:
+                payload, new_token = {'authenticated': True, 'error': str(e)}, None
+
+            now = time.time()
+            with self.hub.lock:
+                if new_token:
+                    self.token = dict(new_token)
+                if self._should_push(payload, now):
+                    self.last_key = _state_key(payload)
+                    self.last_progress = (payload.get('player') or {}).get('progress_ms')
+                    self.last_push = now
+                    payload = dict(payload, server_time=int(now * 1000))
+                    self.last_payload = payload
+                    for q in self.subscribers:
+                        q.put(payload)
+
+            self.wakeup.wait(POLL_INTERVAL)
+            self.wakeup.clear()
+
+
+class SpotifyStatusHub:
+    """
+    Shares one Spotify poller between all tabs of the same user.
+
+    `fetch(token)` must return a tuple of (status_payload, refreshed_token_or_None);
+    it is called from a background thread, so it cannot rely on the Flask session.
+    """
+
+    def __init__(self, fetch: Callable[[Dict[str, Any]], tuple]):
+        self.fetch = fetch
+        self.lock = threading.Lock()
+        self.pollers: Dict[str, _UserPoller] = {}
+
+    def subscribe(self, key: str, token: Dict[str, Any]) -> queue.Queue:
+        """Register a tab for `key`, starting that user's poller if needed."""
+        q = queue.Queue()
+        with self.lock:
+            poller = self.pollers.get(key)
+            if poller is None:
+                poller = _UserPoller(self, key, token)
+                self.pollers[key] = poller
+                poller.start()
+            elif float(token.get('expires_at') or 0) > float(poller.token.get('expires_at') or 0):
+                # Another tab's session may still hold a token the poller already
+                # refreshed (and Spotify may have rotated); only take a newer one
+                poller.token = dict(token)
+            poller.subscribers.append(q)
+            if poller.last_payload is not None:
+                # Late joiners get the current state immediately
+                q.put(poller.last_payload)
+        return q
+
+    def unsubscribe(self, key: str, q: queue.Queue):
+        with self.lock:
+            poller = self.pollers.get(key)
+            if poller and q in poller.subscribers:
+                poller.subscribers.remove(q)
+                if not poller.subscribers:
+                    poller.wakeup.set()
+
+    def nudge(self, key: Optional[str]):
+        """Poll right away, e.g. after a play/pause/seek command changed the state."""
+        if not key:
+            return
+        with self.lock:
+            poller = self.pollers.get(key)
+        if poller:
+            poller.wakeup.set()
+
+    def listener_count(self) -> int:
+        with self.lock:
+            return sum(len(p.subscribers) for p in self.pollers.values())
+
+    def stream(self, key: str, token: Dict[str, Any]):
+        """Generator of SSE frames for one tab; unsubscribes when the client disconnects."""
+        q = self.subscribe(key, token)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    payload = q.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'event: status\ndata: {json.dumps(payload)}\n\n'
+        finally:
+            self.unsubscribe(key, q)
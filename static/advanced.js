@@ -157,6 +157,57 @@ document.addEventListener('DOMContentLoaded', () => {
 // ============================================
 // CodeMirror Editor Setup
 // ============================================
+
+// Server-side completions (/api/complete): session namespace, module
+// attributes, names defined earlier in the document, builtins and keywords
+function serverHint(cm, callback) {
+    const cursor = cm.getCursor();
+    fetch('/api/complete', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ code: cm.getValue(), line: cursor.line, ch: cursor.ch })
+    })
+        .then(response => response.json())
+        .then(data => callback({
+            list: (data.completions || []).map(c => ({ text: c.name, displayText: `${c.name}  ·  ${c.kind}` })),
+            from: CodeMirror.Pos(data.from.line, data.from.ch),
+            to: CodeMirror.Pos(data.to.line, data.to.ch)
+        }))
+        .catch(() => callback(null));
+}
+serverHint.async = true;
+
+// Signature help, hover docs and go-to-definition share the cursor payload
+function postCursor(endpoint, cm, pos) {
+    return fetch(endpoint, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ code: cm.getValue(), line: pos.line, ch: pos.ch })
+    }).then(response => response.json());
+}
+
+// Show the open call's signature in the status bar, the active parameter in brackets
+function updateSignatureInfo(cm) {
+    const el = document.getElementById('signatureInfo');
+    if (!el) return;
+    postCursor('/api/signature', cm, cm.getCursor()).then(data => {
+        if (!data.found || !data.signature) { el.textContent = ''; el.title = ''; return; }
+        const params = data.parameters.map((p, i) => i === data.active ? `[${p.label}]` : p.label);
+        el.textContent = `${data.name}(${params.join(', ')})`;
+        el.title = data.doc || '';
+    }).catch(() => {});
+}
+
+function goToDefinition(cm) {
+    postCursor('/api/definition', cm, cm.getCursor()).then(data => {
+        if (!data.found) { showToast('info', 'Definition', `No definition found for ${data.name || 'this symbol'}`); return; }
+        if (data.source === 'file') { showToast('info', 'Definition', `${data.file}:${data.line + 1}`); return; }
+        if (data.source === 'session' && data.cell) { showToast('info', 'Definition', `Cell ${data.cell}, line ${data.line + 1}`); return; }
+        cm.setCursor(CodeMirror.Pos(data.line, data.ch || 0));
+        cm.focus();
+    }).catch(() => {});
+}
+
 function initializeEditor() {
     const textarea = document.getElementById('codeEditor');
     // Create breadcrumb container above the editor if not present
@@ -185,6 +236,7 @@ function initializeEditor() {
         indentWithTabs: false,
         lineWrapping: true,
         styleActiveLine: true,
+        hintOptions: { hint: serverHint, completeSingle: false },
         extraKeys: {
             'Shift-Enter': () => executeCode(),
             'Ctrl-S': () => { saveCode(); return false; },
@@ -192,6 +244,7 @@ function initializeEditor() {
             'Ctrl-N': () => { newSession(); return false; },
             'Ctrl-/': 'toggleComment',
             'Ctrl-Space': 'autocomplete',
+            'F12': (cm) => goToDefinition(cm),
             'Ctrl-Q': (cm) => {
                 try {
                     // prefer indent-based folding for Python
@@ -233,6 +286,30 @@ print("Type %help for magic commands")
     
     // Update cursor position
     AppState.editor.on('cursorActivity', updateCursorInfo);
+    // Offer attribute completions as soon as a dot is typed
+    AppState.editor.on('inputRead', (cm, change) => {
+        if (change.text.length === 1 && change.text[0] === '.' && !cm.state.completionActive) cm.showHint();
+    });
+    // Refresh signature help when a bracket or comma is typed (autoCloseBrackets inserts '()' at once);
+    // ')' may close the call or fall back to an enclosing one
+    AppState.editor.on('change', (cm, change) => {
+        const typed = change.text.join('\n');
+        if (typed.length <= 2 && /[(),]/.test(typed)) updateSignatureInfo(cm);
+    });
+    // Hover docs: the server caches introspection per object, so a short debounce is enough
+    let hoverTimeout = null;
+    AppState.editor.getWrapperElement().addEventListener('mousemove', (event) => {
+        if (hoverTimeout) clearTimeout(hoverTimeout);
+        hoverTimeout = setTimeout(() => {
+            const cm = AppState.editor;
+            const pos = cm.coordsChar({ left: event.clientX, top: event.clientY }, 'window');
+            postCursor('/api/hover', cm, pos).then(data => {
+                const head = data.found ? `${data.name}: ${data.type}${data.signature || ''}` : '';
+                const value = data.value ? `\n= ${data.value}` : '';
+                cm.getWrapperElement().title = data.found ? `${head}${value}\n\n${data.doc || ''}`.trim() : '';
+            }).catch(() => {});
+        }, 150);
+    });
 
     // ===== Line-status (lint-like) gutter coloring =====
     // Define keywords for quick heuristic scanning. These can be extended later
@@ -1890,6 +1967,14 @@ function initSpotifyUI() {
         try {
             const res = await fetch('/api/spotify/status');
             const j = await res.json();
+            renderSpotifyStatus(j);
+            applySeekSnapshot(j);
+        } catch (e) { console.error('status ui', e); }
+    }
+
+    // Render a status payload (from /api/spotify/status or the status stream)
+    function renderSpotifyStatus(j) {
+        try {
             if (!j || !j.authenticated) {
                 spotifyAuthStatus.textContent = 'Not connected';
                 spotifyControls.classList.add('hidden');
@@ -1922,7 +2007,7 @@ function initSpotifyUI() {
                 const artistEl = document.getElementById('spotifyNowArtist'); if (artistEl) artistEl.textContent = '';
                 playPauseBtn.innerHTML = '<i class="fas fa-play"></i>';
             }
-        } catch (e) { console.error('status ui', e); }
+        } catch (e) { console.error('status render', e); }
     }
 
     // --- Spotify seek/slider support ---
@@ -1935,51 +2020,99 @@ function initSpotifyUI() {
         return `${m}:${sec.toString().padStart(2,'0')}`;
     }
 
-    let spotifyPollingInterval = null;
+    let spotifyPollingInterval = null;  // fallback polling when EventSource is unavailable
+    let spotifyEventSource = null;
+    let spotifyTickInterval = null;
     let spotifyIsDragging = false;
+    // Last known playback position; the seek bar is interpolated from it between server pushes
+    let spotifySnapshot = null;
+
+    function applySeekSnapshot(j) {
+        const player = (j && j.player) || {};
+        spotifySnapshot = {
+            progress: (typeof player.progress_ms === 'number') ? player.progress_ms : null,
+            duration: (player.item && typeof player.item.duration_ms === 'number') ? player.item.duration_ms : null,
+            playing: !!player.is_playing,
+            receivedAt: performance.now()
+        };
+        renderSeekPosition();
+    }
+
+    function renderSeekPosition() {
+        const slider = document.getElementById('spotifySeekSlider');
+        const cur = document.getElementById('spotifyCurrentTime');
+        const tot = document.getElementById('spotifyTotalTime');
+        if (!slider || !cur || !tot || !spotifySnapshot) return;
+
+        const dur = spotifySnapshot.duration;
+        if (dur) {
+            // Update max in milliseconds
+            slider.max = Math.max(1, Math.floor(dur));
+            tot.textContent = formatMs(dur);
+        } else {
+            slider.max = 100;
+            tot.textContent = '0:00';
+        }
+
+        if (spotifySnapshot.progress !== null && !spotifyIsDragging) {
+            let progress = spotifySnapshot.progress;
+            if (spotifySnapshot.playing) progress += performance.now() - spotifySnapshot.receivedAt;
+            if (dur) progress = Math.min(progress, dur);
+            slider.value = Math.min(slider.max, Math.floor(progress));
+            cur.textContent = formatMs(progress);
+        }
+    }
 
     async function updateSeekFromStatus() {
         try {
             const res = await fetch('/api/spotify/status');
             if (!res.ok) return;
-            const j = await res.json();
-            const player = j.player || {};
-            const progress = (player && typeof player.progress_ms === 'number') ? player.progress_ms : null;
-            const dur = (player && player.item && typeof player.item.duration_ms === 'number') ? player.item.duration_ms : null;
-
-            const slider = document.getElementById('spotifySeekSlider');
-            const cur = document.getElementById('spotifyCurrentTime');
-            const tot = document.getElementById('spotifyTotalTime');
-            if (!slider || !cur || !tot) return;
-
-            if (dur) {
-                // Update max in milliseconds
-                slider.max = Math.max(1, Math.floor(dur));
-                tot.textContent = formatMs(dur);
-            } else {
-                slider.max = 100;
-                tot.textContent = '0:00';
-            }
-
-            if (progress !== null && !spotifyIsDragging) {
-                // Set slider value to current progress
-                slider.value = Math.min(slider.max, Math.floor(progress));
-                cur.textContent = formatMs(progress);
-            }
+            applySeekSnapshot(await res.json());
         } catch (e) {
             // ignore transient errors
         }
     }
 
     function startSpotifyPolling() {
-        if (spotifyPollingInterval) return;
+        if (spotifyEventSource || spotifyPollingInterval) return;
+        // Advance the seek bar locally; no network traffic involved
+        if (!spotifyTickInterval) spotifyTickInterval = setInterval(renderSeekPosition, 500);
+
+        if (window.EventSource) {
+            // The server pushes only when playback state changes
+            spotifyEventSource = new EventSource('/api/spotify/stream');
+            spotifyEventSource.addEventListener('status', (ev) => {
+                let j = null;
+                try { j = JSON.parse(ev.data); } catch (e) { return; }
+                renderSpotifyStatus(j);
+                applySeekSnapshot(j);
+            });
+            spotifyEventSource.onerror = () => {
+                // A 401 (not connected) closes the stream for good; network errors auto-reconnect
+                if (spotifyEventSource && spotifyEventSource.readyState === EventSource.CLOSED) {
+                    spotifyEventSource = null;
+                }
+            };
+            return;
+        }
+
         // initial immediate update
         updateSeekFromStatus();
         spotifyPollingInterval = setInterval(updateSeekFromStatus, 1200);
     }
 
     function stopSpotifyPolling() {
+        if (spotifyEventSource) { spotifyEventSource.close(); spotifyEventSource = null; }
         if (spotifyPollingInterval) { clearInterval(spotifyPollingInterval); spotifyPollingInterval = null; }
+        if (spotifyTickInterval) { clearInterval(spotifyTickInterval); spotifyTickInterval = null; }
+    }
+
+    // Optimistically move the interpolation origin after a local seek
+    function setLocalSeek(pos) {
+        if (!spotifySnapshot) return;
+        spotifySnapshot.progress = pos;
+        spotifySnapshot.receivedAt = performance.now();
+        renderSeekPosition();
     }
 
     // Wire slider interaction: suspend polling while dragging, send seek when released
@@ -1991,7 +2124,6 @@ function initSpotifyUI() {
         // For mouse/touch interactions
         slider.addEventListener('pointerdown', (e) => {
             spotifyIsDragging = true;
-            stopSpotifyPolling();
             pointerDown = true;
         });
 
@@ -2011,9 +2143,9 @@ function initSpotifyUI() {
                 console.warn('seek failed', err);
             }
             spotifyIsDragging = false;
-            // refresh UI and resume polling
-            updateSeekFromStatus();
-            startSpotifyPolling();
+            setLocalSeek(parseInt(slider.value, 10) || 0);
+            // the status stream pushes the confirmed position; only poll without it
+            if (!spotifyEventSource) updateSeekFromStatus();
         };
 
         slider.addEventListener('pointerup', endDrag);
@@ -2029,7 +2161,8 @@ function initSpotifyUI() {
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ position_ms: pos })
                 });
-                updateSeekFromStatus();
+                setLocalSeek(pos);
+                if (!spotifyEventSource) updateSeekFromStatus();
             } catch (err) { console.warn('seek change failed', err); }
         });
     }
@@ -2648,7 +2781,9 @@ async function executeCodeInteractive(code, collectedInputs = []) {
             body: JSON.stringify({ 
                 code: code, 
                 mode: 'exec',
-                inputs: collectedInputs
+                inputs: collectedInputs,
+                // Running again stops the previous run instead of queueing behind it
+                supersede: true
             })
         });
         
@@ -3336,6 +3471,7 @@ try { enableInteractiveFigures(); } catch (e) { console.warn('Interactive view i
     // Update small status execution time element (keeps numeric status synced)
     const execTimeEl = document.getElementById('executionTime');
     if (execTimeEl) execTimeEl.textContent = executionTime + 's';
+    updateTimingInfo(result.timings);
     
     // Update output counts in status bar
     try { updateOutputCounts(); } catch (e) { /* ignore */ }
@@ -4644,6 +4780,15 @@ function updateLineCount() {
     document.getElementById('totalLines').textContent = lineCount;
 }
 
+// Show the server's per-phase timings (nanoseconds) of the last run in the status bar
+function updateTimingInfo(timings) {
+    const el = document.getElementById('timingInfo');
+    if (!el || !timings) return;
+    const ms = ns => (ns / 1e6).toFixed(ns < 1e7 ? 2 : 0) + ' ms';
+    el.textContent = `exec ${ms(timings.exec || timings.magic || 0)} / ${ms(timings.total)}`;
+    el.title = Object.entries(timings).map(([phase, ns]) => `${phase}: ${ms(ns)}`).join('\n');
+}
+
 function updateExecutionStats(success, time) {
     AppState.executionStats.totalRuns++;
     if (success) {
@@ -0,0 +1,191 @@
+"""
+Table Formatter
+Renders tabular values (lists of dicts, lists of tuples/namedtuples, pandas
+DataFrames, numpy record and 2-D arrays) as text tables for %table and auto
+display. Rows are rendered in chunks; long inputs show only head and tail
+rows, and cell widths for columnar inputs are computed with vectorized string
+ops over the displayed rows only.
+"""
+
+from typing import Any, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+MAX_ROWS = 60          # longer tables are truncated ...
+MIN_ROWS = 20          # ... to this many rows, split between head and tail
+MAX_COLWIDTH = 100     # longer cells are cut and end with '…'
+CHUNK_ROWS = 1000      # rows rendered per yielded chunk
+SEPARATOR = ' | '
+
+
+class _Columns:
+    """Column-major view of a tabular value: names plus cells(start, stop) per column."""
+
+    def __init__(self, names: List[str], n_rows: int, cells):
+        self.names = names
+        self.n_rows = n_rows
+        self.cells = cells  # (start, stop) -> list of per-column lists of str
+
+
+def _clip(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+
+def _str_columns(columns, max_colwidth: int) -> Tuple[List[List[str]], List[int]]:
+    """Convert each column to a list of clipped strings and return their max widths."""
+    out, widths = [], []
+    for col in columns:
+        if np is not None and isinstance(col, np.ndarray):
+            strs = col.astype(str)
+            width = int(np.char.str_len(strs).max()) if strs.size else 0
+            values = strs.tolist()
+            if width > max_colwidth:
+                values = [_clip(v, max_colwidth) for v in values]
+                width = max_colwidth
+        else:
+            values = [_clip(v if isinstance(v, str) else str(v), max_colwidth) for v in col]
+            width = max(map(len, values), default=0)
+        out.append(values)
+        widths.append(width)
+    return out, widths
+
+
+def _from_dataframe(df) -> _Columns:
+    names = [df.index.name or ''] + [str(c) for c in df.columns]
+
+    def cells(start, stop):
+        sub = df.iloc[start:stop]
+        # astype(str) converts a whole column at once
+        return [sub.index.astype(str).to_numpy()] + [sub.iloc[:, i].astype(str).to_numpy() for i in range(sub.shape[1])]
+    return _Columns(names, len(df), cells)
+
+
+def _from_ndarray(arr) -> Optional[_Columns]:
+    if arr.dtype.names:
+        names = list(arr.dtype.names)
+        return _Columns(names, len(arr), lambda a, b: [arr[n][a:b] for n in names])
+    if arr.ndim == 2:
+        return _Columns([str(i) for i in range(arr.shape[1])], arr.shape[0],
+                        lambda a, b: list(arr[a:b].T))
+    return None
+
+
+def _from_rows(data) -> Optional[_Columns]:
+    """Lists/tuples of dicts, tuples or namedtuples."""
+    if not data:
+        return None
+    first = data[0]
+    if isinstance(first, dict):
+        # Header comes from the keys of the rows actually displayed; iter_table fills it in
+        table = _Columns([], len(data), None)
+
+        def cells(start, stop):
+            rows = data[start:stop]
+            return [[row.get(k, '') if isinstance(row, dict) else '' for row in rows] for k in table.names]
+        table.cells = cells
+        return table
+    if isinstance(first, (tuple, list)):
+        fields = getattr(first, '_fields', None)
+        width = len(fields) if fields else max(len(r) for r in data[:CHUNK_ROWS] if isinstance(r, (tuple, list)))
+        names = list(fields) if fields else [str(i) for i in range(width)]
+
+        def cells(start, stop):
+            rows = data[start:stop]
+            return [[row[i] if isinstance(row, (tuple, list)) and i < len(row) else '' for row in rows]
+                    for i in range(width)]
+        return _Columns(names, len(data), cells)
+    return None
+
+
+def _segments(n_rows: int, max_rows: Optional[int], min_rows: int) -> Tuple[List[Tuple[int, int]], int]:
+    """Row ranges to display and how many rows are hidden between them."""
+    if max_rows is None or n_rows <= max_rows:
+        return [(0, n_rows)], 0
+    head = (min_rows + 1) // 2
+    tail = min_rows // 2
+    return [(0, head), (n_rows - tail, n_rows)], n_rows - head - tail
+
+
+def to_columns(data: Any) -> Optional[_Columns]:
+    """Column-major view of data, or None if it is not tabular."""
+    if pd is not None and isinstance(data, pd.DataFrame):
+        return _from_dataframe(data)
+    if np is not None and isinstance(data, np.ndarray):
+        return _from_ndarray(data)
+    if isinstance(data, (list, tuple)):
+        return _from_rows(data)
+    return None
+
+
+def iter_table(data: Any, max_rows: Optional[int] = MAX_ROWS, min_rows: int = MIN_ROWS,
+               max_colwidth: int = MAX_COLWIDTH, chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    """
+    Yield the rendered table in chunks of up to `chunk_rows` lines.
+
+    With max_rows=None every row is rendered; column widths are then sampled
+    from the first chunk and later cells are clipped to fit.
+    """
+    table = to_columns(data)
+    if table is None:
+        raise TypeError(f"Cannot format {type(data).__name__} as a table")
+
+    segments, hidden = _segments(table.n_rows, max_rows, min_rows)
+    if max_rows is None:
+        first = [(0, min(chunk_rows, table.n_rows))]
+    else:
+        first = segments
+
+    blocks = []
+    if not table.names:
+        # Lists of dicts: header = sorted union of keys in the displayed rows
+        keys = set()
+        for start, stop in first:
+            for row in data[start:stop]:
+                if isinstance(row, dict):
+                    keys.update(row.keys())
+        table.names = sorted(keys, key=str)
+        if not table.names:
+            raise TypeError("Rows have no keys to use as columns")
+
+    widths = [len(str(n)) for n in table.names]
+    for start, stop in first:
+        cols, w = _str_columns(table.cells(start, stop), max_colwidth)
+        blocks.append(cols)
+        widths = [max(a, b) for a, b in zip(widths, w)]
+
+    header = SEPARATOR.join(str(n).ljust(w) for n, w in zip(table.names, widths))
+    yield header + '\n' + '-' * len(header)
+
+    def render(cols):
+        if not cols or not cols[0]:
+            return ''
+        return '\n' + '\n'.join(SEPARATOR.join(_clip(c, w).ljust(w) for c, w in zip(row, widths))
+                                for row in zip(*cols))
+
+    if max_rows is not None:
+        # Everything shown fits in `first`; chunk it for consistency
+        for i, ((start, stop), cols) in enumerate(zip(segments, blocks)):
+            if i == 1:
+                yield f'\n... ({hidden:,} more rows) ...'
+            for offset in range(0, stop - start, chunk_rows):
+                yield render([c[offset:offset + chunk_rows] for c in cols])
+        return
+
+    yield render(blocks[0])
+    for start in range(first[0][1], table.n_rows, chunk_rows):
+        cols, _ = _str_columns(table.cells(start, min(start + chunk_rows, table.n_rows)), max_colwidth)
+        yield render(cols)
+
+
+def format_table(data: Any, **kwargs) -> str:
+    """Render data as a single table string (see iter_table for options)."""
+    return ''.join(iter_table(data, **kwargs))
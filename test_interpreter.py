@@ -3,7 +3,16 @@ Test script for the Python Interpreter
 Run this to verify the interpreter functionality
 """
 
+import io
+import os
+import tempfile
+import threading
+import time
+
 from python_interpreter import PythonInterpreter
+from workspace import Workspace
+from journal import SessionJournal
+from hibernation import HibernationManager
 
 def test_interpreter():
     """Run comprehensive tests on the interpreter"""
@@ -168,6 +177,743 @@ data_keys = list(data.keys())
         print("✗ FAILED")
         tests_failed += 1
     
+    # Test 13: State tag tracks namespace changes
+    print("\nTest 13: State Tag")
+    tag_before = interpreter.state_tag()
+    unchanged = interpreter.state_tag() == tag_before
+    interpreter.execute("tagged = 1")
+    tag_after = interpreter.state_tag()
+    interpreter.reset()
+    if unchanged and tag_after != tag_before and interpreter.state_tag() not in (tag_before, tag_after):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    
+    # Test 14: Large values are serialized with a bounded repr
+    print("\nTest 14: Bounded Variable Repr")
+    result = interpreter.execute("big = [list(range(100)) for _ in range(10000)]")
+    if result['success'] and len(result['variables']['big']) < 5000 and result['variables']['big'].startswith('[[0, 1'):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    
+    # Test 15: Table formatting truncates long inputs to head/tail rows
+    print("\nTest 15: Bounded Table Formatting")
+    interpreter.execute("rows = [{'id': i, 'name': 'n%d' % i} for i in range(100000)]")
+    result = interpreter.execute("%table rows")
+    lines = result['output'].splitlines()
+    if result['success'] and lines[0].startswith('id') and len(lines) < 100 and 'more rows' in result['output']:
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    
+    # Test 16: Uploads are streamed into a private workspace and memory-mapped
+    print("\nTest 16: Workspace Upload and %mmap")
+    workspace_interpreter = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    workspace_interpreter.workspace.write_stream('data.bin', io.BytesIO(bytes(range(256)) * 4), chunk_size=100)
+    result = workspace_interpreter.execute("%mmap data.bin as data --shape 4,-1")
+    data = workspace_interpreter.get_variable('data')
+    escaped = not workspace_interpreter.workspace.exists('../data.bin')
+    if (result['success'] and data.shape == (4, 256) and int(data[3, 255]) == 255 and escaped
+            and isinstance(result['variables']['data'], str)):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    
+    # Test 17: %read loads a workspace CSV into a DataFrame and reports progress
+    print("\nTest 17: %read Data Loader")
+    csv_data = "id,name\n" + "".join(f"{i},n{i}\n" for i in range(1000))
+    workspace_interpreter.workspace.write_text('rows.csv', csv_data)
+    result = workspace_interpreter.execute("%read rows.csv as rows_df --engine pandas --chunksize 300")
+    rows_df = workspace_interpreter.get_variable('rows_df')
+    if (result['success'] and rows_df is not None and rows_df.shape == (1000, 2) and '100.0%' in result['output']
+            and isinstance(result['variables']['rows_df'], str)):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    workspace_interpreter.workspace.destroy()
+    
+    # Test 18: A new interpreter recovers state from the journal and checkpoint
+    print("\nTest 18: Journal Recovery")
+    journal_dir = tempfile.mkdtemp()
+    journaled = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    journaled.attach_journal(SessionJournal(journal_dir, checkpoint_every=3))
+    journaled.ensure_recovered()
+    for cell in ["items = [1]", "def double(x):\n    return x * 2", "items.append(double(5))", "print(items)"]:
+        journaled.execute(cell)
+    journaled.journal.close()
+    restored = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    restored.attach_journal(SessionJournal(journal_dir))
+    report = restored.ensure_recovered()
+    if (restored.get_variable('items') == [1, 10] and restored.execute("double(4)", mode='eval')['result'] == 8
+            and report['checkpoint'] == 3 and report['skipped'] == 1 and len(restored.execution_history) >= 4):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    
+    # Test 19: Idle sessions hibernate to disk and rehydrate on next use
+    print("\nTest 19: Session Hibernation")
+    sleeper = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    manager = HibernationManager(idle_seconds=0)
+    manager.register(sleeper)
+    sleeper.execute("import numpy as np\nweights = np.arange(1000.0)\nnames = ['a', 'b']\nstream = (i for i in range(3))")
+    manager.sweep()
+    asleep = manager.status(sleeper)['hibernated'] and not sleeper.has_variable('weights')
+    manager.acquire(sleeper)
+    result = sleeper.execute("total = weights.sum() + len(names)")
+    manager.release(sleeper)
+    if (asleep and result['success'] and sleeper.get_variable('total') == 499502.0
+            and manager.status(sleeper)['unpicklable'] == ['stream']):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    sleeper.workspace.destroy()
+    
+    # Test 20: Editing a cell re-runs only the cells that read its names
+    print("\nTest 20: Reactive Cell Graph")
+    notebook = PythonInterpreter()
+    notebook.run_cell('a', "base = 2")
+    notebook.run_cell('b', "scaled = base * 10")
+    notebook.run_cell('c', "other = 7")
+    edit = notebook.run_cell('a', "base = 5")
+    lazy = notebook.run_cell('c', "other = 8", reactive=False)
+    if (edit['rerun'] == ['b'] and notebook.get_variable('scaled') == 50
+            and lazy['rerun'] == [] and lazy['stale'] == []
+            and notebook.cells.to_dict()['cells'][1]['depends_on'] == ['a']):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    
+    # Test 21: Memoized cells skip re-execution until an input changes
+    print("\nTest 21: Cell Memoization")
+    cached = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    cached.enable_memo().min_seconds = 0
+    cached.execute("calls = []\nnums = list(range(1000))")
+    cell = "total = sum(n * n for n in nums)\nprint(total)"
+    cached.execute(cell)  # seen running slowly: inputs are hashed from the next run on
+    first = cached.execute(cell)
+    second = cached.execute(cell)
+    cached.execute("nums = nums[:10]")
+    third = cached.execute(cell)
+    impure = cached.execute("calls.append(1)")
+    if (first.get('memoized') is None and second.get('memoized') is not None
+            and second['output'] == first['output'] and third.get('memoized') is None
+            and third['output'] == '285\n' and impure['success']
+            and cached.memo.status()['hits'] == 1 and cached.memo.status()['uncacheable'] == 1):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    cached.workspace.destroy()
+    
+    # Test 22: @persist_cache results survive %reset
+    print("\nTest 22: Persistent Function Cache")
+    cache_dir = tempfile.mkdtemp()
+    persistent = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    define = ("store = PersistentCache(%r)\n"
+              "@persist_cache(cache=store, compress=True)\n"
+              "def square_all(values):\n"
+              "    return [v * v for v in values]\n") % cache_dir
+    persistent.execute("from persistent_cache import PersistentCache\n" + define + "first = square_all([1, 2, 3])")
+    persistent.execute("%reset")
+    again = persistent.execute("from persistent_cache import PersistentCache\n" + define +
+                               "second = square_all([1, 2, 3])\nstats = store.stats")
+    stats = persistent.get_variable('stats')
+    if (again['success'] and persistent.get_variable('second') == [1, 4, 9]
+            and stats['hits'] == 1 and stats['stored'] == 0
+            and 'persist_cache' not in persistent.get_all_variables()):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    persistent.workspace.destroy()
+    
+    # Test 23: Functions defined in cells run in worker processes
+    print("\nTest 23: Parallel Map Over Cell Functions")
+    pooled = PythonInterpreter()
+    pooled.execute("def cube(n):\n    return n ** 3 + bonus\nbonus = 1")
+    result = pooled.execute("%%parallel for n in range(6) -> cubes --workers 2\ncube(n)")
+    if result['success'] and pooled.get_variable('cubes') == [1, 2, 9, 28, 65, 126]:
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    
+    # Test 24: Top-level await, with tasks that outlive their cell
+    print("\nTest 24: Top-level Await")
+    aio = PythonInterpreter()
+    first = aio.execute("import asyncio\n"
+                        "async def later(v):\n"
+                        "    await asyncio.sleep(0.05)\n"
+                        "    print('done', v)\n"
+                        "    return v * 2\n"
+                        "value = await later(1)\n"
+                        "task = asyncio.create_task(later(5))")
+    time.sleep(0.2)
+    second = aio.execute("task.result()", mode='eval')
+    if (first['success'] and first['output'] == 'done 1\n' and aio.get_variable('value') == 2
+            and second['result'] == 10 and second.get('background_output') == 'done 5\n'):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    aio.reset()
+
+    # Test 25: Background jobs run alongside foreground cells and can be cancelled
+    print("\nTest 25: Background Jobs")
+    bg = PythonInterpreter()
+    started = bg.execute("%bg import time\nfor k in range(3):\n    print('tick', k)\n    time.sleep(0.05)\ntotal = 6")
+    foreground = bg.execute("print('fg')")
+    job = bg.jobs.get(started['job_id'])
+    job.done.wait(5)
+    spinning = bg.jobs.submit("while True:\n    pass")
+    time.sleep(0.1)
+    bg.jobs.cancel(spinning.id)
+    spinning.done.wait(5)
+    if (foreground['output'] == 'fg\n' and job.status == 'done' and bg.get_variable('total') == 6
+            and job.to_dict(7)['output'] == 'tick 1\ntick 2\n' and spinning.status == 'cancelled'):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    bg.reset()
+
+    # Test 26: Interrupting a runaway cell, and superseding it with a new run
+    print("\nTest 26: Interrupt and Supersede")
+    runaway = PythonInterpreter()
+    outcomes = {}
+    spin = threading.Thread(target=lambda: outcomes.update(
+        first=runaway.execute("print('partial')\nwhile True:\n    pass")))
+    spin.start()
+    time.sleep(0.2)
+    stopped = runaway.interrupt()
+    spin.join(5)
+    spin = threading.Thread(target=lambda: outcomes.update(second=runaway.execute("while True:\n    pass")))
+    spin.start()
+    time.sleep(0.2)
+    newer = runaway.execute("print('newer')", supersede=True)
+    spin.join(5)
+    if (stopped['interrupted'] and outcomes['first'].get('interrupted')
+            and outcomes['first']['output'] == 'partial\n'
+            and outcomes['second'].get('interrupted') and newer['output'] == 'newer\n'):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 27: Per-phase timings in every result
+    print("\nTest 27: Execution Timings")
+    timed = runaway.execute("import time\ntime.sleep(0.05)\nvalue = 1")
+    spans = timed.get('timings', {})
+    phases = ('queue', 'setup', 'validate', 'exec', 'serialize', 'figures')
+    if (all(isinstance(spans.get(p), int) for p in phases) and spans['exec'] >= 50_000_000
+            and spans['total'] >= sum(spans[p] for p in phases)):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 28: Benchmark comparison flags slowdowns beyond the threshold only
+    print("\nTest 28: Benchmark Baseline Comparison")
+    import benchmark
+    baseline = {'benchmarks': {'a': {'median_ms': 10.0}, 'b': {'median_ms': 10.0}, 'c': {'median_ms': 0.01}}}
+    current = {'benchmarks': {'a': {'median_ms': 14.0}, 'b': {'median_ms': 10.5}, 'c': {'median_ms': 0.02},
+                              'd': {'skipped': True}}}
+    rows = {r['name']: r['regressed'] for r in benchmark.compare(current, baseline, threshold=0.25)}
+    measured = benchmark.run_benchmark(benchmark.Benchmark('noop', lambda state: None), repeat=5)
+    if rows == {'a': True, 'b': False, 'c': False} and measured['repeat'] == 5:
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 29: Load test harness drives the app and reports per-endpoint percentiles
+    print("\nTest 29: Load Test Harness")
+    import contextlib
+    import loadtest
+    from app import app
+    with contextlib.redirect_stdout(io.StringIO()):
+        # input is left out: users share one session, so they answer each other's prompts (Test 43)
+        report = loadtest.run_load(lambda: loadtest.TestClientTransport(app), users=3, duration=0.5, think=0,
+                                   mix={'typing': 4, 'run': 3, 'poll': 2})
+    endpoints = report['endpoints']
+    if (report['requests'] > 0 and report['error_rate'] == 0
+            and all(row['p50_ms'] <= row['p95_ms'] <= row['p99_ms'] for row in endpoints.values())
+            and 'POST /api/validate_lines' in endpoints):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 30: Completions from the namespace, module attributes and the document
+    print("\nTest 30: Code Completion")
+    completing = PythonInterpreter()
+    completing.execute("import math\ndataset = [1, 2]\ndef data_loader(): pass")
+    names = lambda code: [c['name'] for c in completing.complete(code, 0, len(code))['completions']]
+    completing.global_namespace.update({f'col{i}': i for i in range(100000)})
+    completing.complete('co', 0, 2)  # builds the index once
+    completing.execute("del dataset\ncolumns = 3")
+    started = time.perf_counter()
+    cols = names('col9999')
+    elapsed = time.perf_counter() - started
+    if (names('data') == ['data_loader'] and 'sqrt' in names('math.sq') and names('pri') == ['print']
+            and 'total' in [c['name'] for c in completing.complete('total = 1\ntot', 1, 3)['completions']]
+            and cols[:2] == ['col9999', 'col99990'] and 'columns' in names('colu') and elapsed < 0.05):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 31: Signature help, hover and go-to-definition
+    print("\nTest 31: Signature Help, Hover and Definitions")
+    looking = PythonInterpreter()
+    looking.execute("import json\ndef scale(x, factor=2):\n    '''Scale x.'''\n    return x * factor\nlimit = 10")
+    sig = looking.signature_help('scale(1, ', 0, 9)
+    hovered = looking.hover('limit + 1', 0, 2)
+    library = looking.find_definition('json.dumps', 0, 7)
+    first = looking.find_definition('scale', 0, 2)
+    looking.hover('scale', 0, 2)
+    looking.run_cell('c1', 'def scale(y):\n    return y')
+    redefined = looking.find_definition('scale', 0, 2)
+    if (sig['signature'] == '(x, factor=2)' and sig['active'] == 1 and sig['doc'] == 'Scale x.'
+            and hovered['type'] == 'int' and hovered['value'] == '10'
+            and library['source'] == 'file' and library['file'].endswith('__init__.py')
+            and (first['line'], first['cell']) == (1, None)
+            and (redefined['line'], redefined['cell']) == (0, 'c1')
+            and looking.hover('scale', 0, 2)['signature'] == '(y)'):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 32: Bounded output with the full stream spilled to the workspace
+    print("\nTest 32: Bounded Output Capture")
+    printing = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    printed = printing.execute("for k in range(50000):\n    print('line', k)")
+    truncated = printed.get('output_truncated') or {}
+    pages, offset = [], 0
+    while truncated.get('output_id'):
+        page = printing.outputs.read(truncated['output_id'], offset, 256 * 1024)
+        pages.append(page['text'])
+        offset = page['next_offset']
+        if page['complete']:
+            break
+    full = ''.join(pages)
+    echoed = printing.execute_line('list(range(10 ** 6))')
+    if (printed['output'].startswith('line 0\n') and printed['output'].endswith('line 49999\n')
+            and len(printed['output']) < 140 * 1024 and truncated.get('truncated_bytes', 0) > 400000
+            and full == ''.join(f'line {k}\n' for k in range(50000))
+            and echoed['output'].rstrip().endswith('...]') and len(echoed['output']) < 10000):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 33: Checkpoints still succeed after a cell evaluates to an unpicklable value
+    print("\nTest 33: Checkpoint After Unpicklable Result")
+    checkpoint_dir = tempfile.mkdtemp()
+    generating = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    generating.attach_journal(SessionJournal(checkpoint_dir, checkpoint_every=2))
+    generating.ensure_recovered()
+    generating.execute('(x for x in range(3))', mode='eval')
+    for k in range(4):
+        generating.execute(f'step = {k}')
+    generating.journal.close()
+    files = os.listdir(checkpoint_dir)
+    if 'checkpoint-000000000004.pkl' in files and not any(f.endswith('.tmp') for f in files):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 34: The state tag never validates a snapshot taken while the namespace could change
+    print("\nTest 34: State Tag During Runs")
+    tagged = PythonInterpreter()
+    before = tagged.state_tag()
+    job = tagged.jobs.submit("import time\ntime.sleep(0.2)\nlate_var = 1")
+    time.sleep(0.05)
+    during = tagged.state_tag()
+    job.done.wait(5)
+    after = tagged.state_tag()
+    if 'live' in during and len({before, during, after}) == 3 and after == tagged.state_tag():
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 35: Memo keys cover closure cells and are taken before the cell runs
+    print("\nTest 35: Memo Closure Keys")
+    cached = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    cached.enable_memo().min_seconds = 0
+    cached.execute("def make(k):\n    def f(x):\n        return x * k\n    return f\nscale = make(2)")
+    cell = "out = scale(21)\nprint(out)"
+    cached.execute(cell)
+    cached.execute(cell)
+    warm = cached.execute(cell)
+    cached.execute("scale = make(3)")
+    changed = cached.execute(cell)
+    cached.execute("n = 1")
+    rebind = "n = n + 1\nprint(n)"
+    runs = [cached.execute(rebind)['output'] for _ in range(4)]
+    if (warm.get('memoized') is not None and changed.get('memoized') is None
+            and changed['output'] == '63\n' and runs == ['2\n', '3\n', '4\n', '5\n']):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    cached.workspace.destroy()
+
+    # Test 36: Hibernation keeps shared arrays shared, survives odd history and waits for tasks
+    print("\nTest 36: Hibernation Aliasing And Live Tasks")
+    sleeper = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    manager = HibernationManager(idle_seconds=0)
+    manager.register(sleeper)
+    sleeper.execute("import numpy as np\nbase = np.zeros(100)\nalias = base\nholder = {'w': base}")
+    sleeper.execute("(i for i in range(3))")
+    sleeper.execute("import asyncio\ntask = asyncio.ensure_future(asyncio.sleep(1))")
+    busy = manager.hibernate(sleeper)
+    time.sleep(1.5)
+    slept = manager.hibernate(sleeper)
+    manager.acquire(sleeper)
+    sleeper.execute("alias[0] = 7\nshared = (base[0], holder['w'][0], alias is base, holder['w'] is base)")
+    manager.release(sleeper)
+    if (not busy and slept and sleeper.get_variable('shared') == (7.0, 7.0, True, True)
+            and not os.path.exists(os.path.join(sleeper.workspace.path, '.hibernate.new'))
+            and len(sleeper.execution_history) >= 4):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    sleeper.workspace.destroy()
+
+    # Test 37: interrupt() reaches a cell that runs inside the session loop
+    print("\nTest 37: Interrupt Loop-Thread Cell")
+    looper = PythonInterpreter()
+    box = {}
+    spinner = threading.Thread(target=lambda: box.setdefault('result', looper.execute(
+        "import asyncio\ntask = asyncio.ensure_future(asyncio.sleep(0))\nn = 0\nwhile n < 10 ** 9:\n    n += 1")))
+    spinner.start()
+    time.sleep(0.5)
+    stopped = looper.interrupt()['interrupted']
+    spinner.join(10)
+    after = looper.execute("import asyncio\nlater = asyncio.ensure_future(asyncio.sleep(0))\nok = 1")
+    if (stopped and not spinner.is_alive() and box['result'].get('interrupted')
+            and looper.get_variable('n') < 10 ** 9 and after['success']):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 38: Names bound inside a function body don't redefine the session's names
+    print("\nTest 38: Dataflow Ignores Function Locals")
+    notebook = PythonInterpreter()
+    notebook.run_cell('a', "base = 2")
+    notebook.run_cell('b', "def reset_local():\n    base = 0\n    return base")
+    notebook.run_cell('c', "y = base * 3")
+    edit = notebook.run_cell('b', "def reset_local():\n    base = 1\n    return base")
+    if edit['rerun'] == [] and notebook.cells.to_dict()['cells'][2]['depends_on'] == ['a']:
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 39: Output from several threads is kept whole; stderr stays bounded
+    print("\nTest 39: Concurrent Output And Bounded stderr")
+    writer = PythonInterpreter()
+    threaded = writer.execute(
+        "import sys, threading\n"
+        "def spam(k):\n"
+        "    for i in range(2000):\n"
+        "        sys.stdout.write(f'{k} {i}\\n')\n"
+        "workers = [threading.Thread(target=spam, args=(k,)) for k in range(4)]\n"
+        "for w in workers:\n"
+        "    w.start()\n"
+        "for w in workers:\n"
+        "    w.join()")
+    noisy = writer.execute("import sys\nfor i in range(50000):\n    sys.stderr.write('warning %d\\n' % i)")
+    lines = threaded['output'].splitlines()
+    if (threaded['success'] and len(lines) == 8000 and len(set(lines)) == 8000
+            and noisy['success'] and len(writer.error_buffer.getvalue()) < 200 * 1024):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 40: @persist_cache keys closures by the values they captured
+    print("\nTest 40: Persistent Cache Closure Keys")
+    cache_dir = tempfile.mkdtemp()
+    closures = PythonInterpreter()
+    closures.execute(("from persistent_cache import PersistentCache\n"
+                      "store = PersistentCache(%r)\n"
+                      "def scaler(k):\n"
+                      "    @persist_cache(cache=store)\n"
+                      "    def scale(x):\n"
+                      "        return x * k\n"
+                      "    return scale\n"
+                      "doubled = scaler(2)(10)\n"
+                      "tripled = scaler(3)(10)") % cache_dir)
+    if closures.get_variable('doubled') == 20 and closures.get_variable('tripled') == 30:
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 41: Parquet chunks share the frame's schema; both CSV paths end rows alike
+    print("\nTest 41: Export Schemas And Line Endings")
+    import data_export
+    chunk_rows, data_export.CHUNK_ROWS = data_export.CHUNK_ROWS, 2
+    try:
+        import pandas as pd
+        import pyarrow.parquet as pq
+
+        def parquet_of(value):
+            return pq.read_table(io.BytesIO(b''.join(bytes(c) for c in data_export.export(value, 'parquet')[0])))
+
+        mixed = parquet_of(pd.DataFrame({'name': [None, None, 'x'], 'score': [1, 2, 3.5]}))
+        empty = parquet_of(pd.DataFrame({'name': pd.Series([], dtype=str)}))
+        csv_frame = b''.join(data_export.export(pd.DataFrame({'a': [1, 2, 3]}), 'csv')[0])
+        csv_rows = b''.join(data_export.export([[1], [2], [3]], 'csv')[0])
+        ok = (mixed.column('name').to_pylist() == [None, None, 'x'] and mixed.num_rows == 3
+              and empty.num_rows == 0 and empty.schema.names == ['name']
+              and b'\r' not in csv_frame + csv_rows)
+    except ImportError:
+        ok = True  # pandas/pyarrow not installed
+    finally:
+        data_export.CHUNK_ROWS = chunk_rows
+    if ok:
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 42: Sorting puts None/NaN last in both directions on every value type
+    print("\nTest 42: Viewer Sort Missing Values Last")
+    from data_viewer import page_value
+    import numpy as np
+    values = [3.0, None, 1.0, float('nan'), 3.0, 2.0]
+    orders = []
+    for ascending in (True, False):
+        records = page_value([{'v': v} for v in values], sort='v', ascending=ascending)['index']
+        array = page_value(np.array([np.nan if v is None else v for v in values]), sort='value',
+                           ascending=ascending)['index']
+        try:
+            import pandas as pd
+            frame = page_value(pd.DataFrame({'v': values}), sort='v', ascending=ascending)['index']
+        except ImportError:
+            frame = records
+        orders.append((records, array, frame))
+    if (orders[0] == ([2, 5, 0, 4, 1, 3],) * 3
+            and orders[1] == ([0, 4, 5, 2, 1, 3],) * 3):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 43: Multi-prompt cells finish through provide_input; failed flows are counted
+    print("\nTest 43: Input Scenario Completion")
+    asking = PythonInterpreter()
+    code = 'name = input("Name? ")\nage = int(input("Age? "))\nprint(name, age)'
+    steps = [asking.execute(code), asking.provide_input('ada'), asking.provide_input('36')]
+    recorder = loadtest.Recorder()
+    recorder.scenario('input')
+    recorder.scenario('input', 'ran out of answers')
+    scenarios = recorder.report(1.0)['scenarios']
+    with contextlib.redirect_stdout(io.StringIO()):
+        single = loadtest.run_load(lambda: loadtest.TestClientTransport(app), users=1, duration=0.3,
+                                   think=0, mix={'input': 1})
+    if (steps[0].get('input_required') and steps[1]['input_prompt'] == 'Age? '
+            and steps[2]['success'] and steps[2]['output'] == 'ada 36\n'
+            and scenarios['input']['runs'] == 2 and scenarios['input']['errors'] == 1
+            and single['scenario_errors'] == 0 and single['scenarios']['input']['runs'] > 0):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 44: Encoded history entries survive later runs; replaced entries are re-encoded
+    print("\nTest 44: History Encoding Cache")
+    import wire_format
+    entry_cache = wire_format.EncodedEntryCache()
+    cache_interp = PythonInterpreter()
+    cache_interp.execute("x = 1")
+    first = entry_cache.encode(0, cache_interp.get_history()[0], 'json')
+    cache_interp.execute("y = 2")
+    history = cache_interp.get_history()
+    kept = entry_cache.encode(0, history[0], 'json')
+    second = entry_cache.encode(1, history[1], 'json')
+    cache_interp.clear_history()
+    cache_interp.execute("z = 3")
+    replaced = entry_cache.encode(0, cache_interp.get_history()[0], 'json')
+    cache_interp.get_history()[0]['timestamp'] = 'now'  # as the /api routes do after a run
+    stamped = entry_cache.encode(0, cache_interp.get_history()[0], 'json')
+    if (kept is first and b'"timings"' in first and b'"timings"' in second
+            and b'z = 3' in replaced and b'"timestamp"' in stamped):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 45: Dot-prefixed workspace paths are refused; session data counts toward the quota
+    print("\nTest 45: Workspace Reserved Names And Internal Quota")
+    from workspace import Workspace as _Workspace, WorkspaceError, QuotaExceeded
+    space = _Workspace(root=tempfile.mkdtemp(), quota_bytes=1000)
+    refused = 0
+    for name in ('.journal/checkpoint-000000000001.pkl', '.hidden', 'data/.memo', '..x'):
+        try:
+            space.resolve(name)
+        except WorkspaceError:
+            refused += 1
+    space.write_text('notes.v1.txt', 'x' * 100)
+    os.makedirs(os.path.join(space.path, '.output'))
+    with open(os.path.join(space.path, '.output', 'spill.txt'), 'wb') as f:
+        f.write(b'y' * 800)
+    try:
+        space.write_stream('big.bin', io.BytesIO(b'z' * 200))
+        over = False
+    except QuotaExceeded:
+        over = True
+    listed = [f['name'] for f in space.list_files()]
+    if refused == 4 and over and listed == ['notes.v1.txt'] and space.info()['internal_usage'] == 800:
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    space.destroy()
+
+    # Test 46: Arrays and frames in payloads are summarized, not expanded
+    print("\nTest 46: Wire Format Array Summaries")
+    encoded = wire_format.dumps_json({'big': np.zeros(10**6), 'n': np.int64(7)})
+    if len(encoded) < 200 and b'shape (1000000,)' in encoded and b'"n":7' in encoded:
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 47: Cells that run their own loop through an imported run() stay off the session loop
+    print("\nTest 47: Loop Routing From The AST")
+    loop_interp = PythonInterpreter()
+    own_loop = loop_interp.execute("import asyncio\nfrom asyncio import run, create_task\n"
+                                   "async def main():\n    return await create_task(asyncio.sleep(0, 'ok'))\n"
+                                   "print(run(main()))")
+    started = loop_interp.execute("import asyncio as aio\nasync def five():\n    return 5\n"
+                                  "task = aio.create_task(five())")
+    awaited = loop_interp.execute("await task", mode='eval')
+    if own_loop['success'] and own_loop['output'] == 'ok\n' and started['success'] and awaited['result'] == 5:
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
+    # Test 48: Background job and task output is bounded like cell output
+    print("\nTest 48: Bounded Job And Task Output")
+    noisy = PythonInterpreter()
+    job = noisy.jobs.submit("for k in range(300000):\n    print('line', k)")
+    job.done.wait(60)
+    record = noisy.get_history()[-1]
+    polled = job.to_dict(0)
+    resumed = job.to_dict(polled['offset'])
+    cells = [noisy.execute("import asyncio\nasync def chatter():\n    await asyncio.sleep(0.2)\n    for k in range(300000):\n        print('bg', k)\n"
+                           "task = asyncio.create_task(chatter())")]
+    cells += [noisy.execute("await task"), noisy.execute("1 + 1", mode='eval')]
+    # Drained into whichever result comes after the task printed
+    chatty = [r for r in cells if r.get('background_output_truncated')] + [{}]
+    if (len(record['output']) < 200000 and record['output'].endswith('line 299999\n')
+            and record['output_truncated']['output_id'] and len(polled['output']) < 200000
+            and 'bytes omitted' in polled['output'] and resumed['output'] == ''
+            and len(chatty[0].get('background_output', '')) < 200000
+            and chatty[0].get('background_output_truncated', {}).get('total_bytes', 0) > 2000000):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    noisy.workspace.destroy()
+
+    # Test 49: A failed rehydrate leaves the session hibernated and not marked busy
+    print("\nTest 49: Hibernation Rehydrate Failure")
+    sleeper = PythonInterpreter(workspace=Workspace(root=tempfile.mkdtemp()))
+    manager = HibernationManager(idle_seconds=0)
+    manager.register(sleeper)
+    sleeper.execute("kept = 41")
+    manager.sweep()
+    history_path = os.path.join(sleeper.workspace.path, '.hibernate', 'history.pkl')
+    os.rename(history_path, history_path + '.bak')
+    try:
+        manager.acquire(sleeper)
+        raised = False
+    except OSError:
+        raised = True
+    status = manager.status(sleeper)
+    os.rename(history_path + '.bak', history_path)
+    manager.acquire(sleeper)
+    woke = sleeper.get_variable('kept') == 41
+    manager.release(sleeper)
+    if (raised and status['hibernated'] and 'rehydrate_error' in status and woke
+            and 'rehydrate_error' not in manager.status(sleeper) and manager.hibernate(sleeper)):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+    sleeper.workspace.destroy()
+
+    # Test 50: /api/validate_lines counts names bound inside one-line defs; cell results leave history intact
+    print("\nTest 50: Validate Lines And Cell Results")
+    with app.test_client() as client:
+        checked = client.post('/api/validate_lines', json={'lines': ['def setup(): helper_total = 1', 'helper_total']}).get_json()
+        ran = client.post('/api/cells/run', json={'cell_id': 'validate-cell', 'code': 'cell_value = 5'}).get_json()
+        history = client.get('/api/history').get_json()['history']
+    if (checked['results'][1]['valid'] and 'variables' not in ran['results'][0] and 'cell_value' in ran['variables']
+            and 'variables' in history[-1]):
+        print("✓ PASSED")
+        tests_passed += 1
+    else:
+        print("✗ FAILED")
+        tests_failed += 1
+
     # Print summary
     print("\n" + "=" * 70)
     print(f"TESTS COMPLETED: {tests_passed + tests_failed}")
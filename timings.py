@@ -0,0 +1,94 @@
+"""
+Execution Timings
+Per-phase wall-clock spans (time.perf_counter_ns) for each execution, so a
+slow Run can be attributed to queueing, validation, the user's code,
+variable serialization, figure capture or response encoding. Results carry
+the spans as `timings` (nanoseconds); the server adds its own phases, sends
+them as a Server-Timing header and aggregates them for /api/metrics.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# Executions kept per endpoint for /api/metrics percentiles
+WINDOW = 1000
+
+
+class PhaseTimer:
+    """Accumulates nanoseconds per named phase from its creation on."""
+
+    def __init__(self):
+        self.started = time.perf_counter_ns()
+        self.phases: Dict[str, int] = {}
+
+    def add(self, name: str, ns: int):
+        self.phases[name] = self.phases.get(name, 0) + ns
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter_ns() - start)
+
+    def to_dict(self) -> Dict[str, int]:
+        return {**self.phases, 'total': time.perf_counter_ns() - self.started}
+
+
+def server_timing(timings: Dict[str, int]) -> str:
+    """Server-Timing header value (durations in milliseconds)."""
+    return ', '.join(f'{name};dur={ns / 1e6:.3f}' for name, ns in timings.items())
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TimingStats:
+    """Recent timings per endpoint, summarized as percentiles per phase."""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, timings: Dict[str, int]):
+        with self._lock:
+            samples = self._samples.setdefault(endpoint, deque(maxlen=self.window))
+            samples.append(timings)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def summary(self, endpoint: Optional[str] = None) -> Dict[str, Any]:
+        """{endpoint: {'count', 'window', 'phases': {phase: {p50, p95, p99, max, mean} in ms}}}"""
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._samples.items() if endpoint in (None, k)}
+            counts = dict(self._counts)
+        out = {}
+        for name, samples in snapshot.items():
+            phases: Dict[str, list] = {}
+            for timings in samples:
+                for phase, ns in timings.items():
+                    phases.setdefault(phase, []).append(ns)
+            summarized = {}
+            for phase, values in phases.items():
+                values.sort()
+                summarized[phase] = {
+                    'p50': round(_percentile(values, 0.50) / 1e6, 3),
+                    'p95': round(_percentile(values, 0.95) / 1e6, 3),
+                    'p99': round(_percentile(values, 0.99) / 1e6, 3),
+                    'max': round(values[-1] / 1e6, 3),
+                    'mean': round(sum(values) / len(values) / 1e6, 3),
+                    'samples': len(values),
+                }
+            out[name] = {'count': counts.get(name, 0), 'window': len(samples), 'phases': summarized}
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
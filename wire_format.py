@@ -0,0 +1,279 @@
+"""
+Wire Format
+Fast response serialization: orjson for JSON when installed, msgpack when the
+client asks for it via the Accept header, and streamed encoding for long lists
+such as execution history pages.
+
+Run `python wire_format.py` to benchmark encoders on realistic payloads.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from flask import Response, current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    # Optional: the stdlib encoder is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    # Optional: without it only JSON is offered
+    msgpack = None
+
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+# Streamed responses are flushed in chunks of roughly this many bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+if orjson is not None:
+    # No OPT_SERIALIZE_NUMPY: arrays go through _default() and are summarized
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """
+    Fallback for objects the encoders don't know: their str(). Arrays, frames
+    and series that reach a payload are summarized by shape and dtype rather
+    than expanded, since a memory-mapped array could be gigabytes.
+    """
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    shape = getattr(value, 'shape', None)
+    if shape == () and hasattr(value, 'item'):
+        # numpy scalars
+        return value.item()
+    if isinstance(shape, tuple):
+        dtype = getattr(value, 'dtype', None)
+        dtype = f', dtype {dtype}' if dtype is not None else ''
+        return f'<{type(value).__name__} shape {shape}{dtype}>'
+    return str(value)
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    return json.dumps(obj, default=_default, separators=(',', ':'),
+                      ensure_ascii=False, sort_keys=sort_keys).encode('utf-8')
+
+
+def dumps_json(obj: Any, sort_keys: bool = False) -> bytes:
+    """Encode obj as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        opts = _ORJSON_OPTS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=_default, option=opts)
+        except (orjson.JSONEncodeError, TypeError):
+            # e.g. integers beyond 64 bits or mixed-type keys with sorting
+            pass
+    return _stdlib_dumps(obj, sort_keys=sort_keys)
+
+
+def _msgpack_safe(value: Any) -> Any:
+    """Replace values msgpack cannot represent (huge ints, unknown objects)."""
+    if isinstance(value, dict):
+        return {k if isinstance(k, (str, int)) else str(k): _msgpack_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_msgpack_safe(v) for v in value]
+    if isinstance(value, int) and not isinstance(value, bool) and not -2**63 <= value < 2**64:
+        return str(value)
+    if value is None or isinstance(value, (str, bytes, int, float, bool)):
+        return value
+    return _msgpack_safe(_default(value))
+
+
+def dumps_msgpack(obj: Any) -> bytes:
+    """Encode obj as msgpack bytes."""
+    try:
+        return msgpack.packb(obj, default=_default, use_bin_type=True)
+    except (OverflowError, TypeError, ValueError):
+        return msgpack.packb(_msgpack_safe(obj), use_bin_type=True)
+
+
+def encode(obj: Any, fmt: str = 'json') -> bytes:
+    """Encode obj in the given wire format ('json' or 'msgpack')."""
+    if fmt == 'msgpack':
+        return dumps_msgpack(obj)
+    return dumps_json(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so every jsonify() call benefits."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs.get('indent'):
+            return super().dumps(obj, **kwargs)
+        return dumps_json(obj, sort_keys=self.sort_keys).decode('utf-8')
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_json(obj, sort_keys=self.sort_keys), mimetype=self.mimetype)
+
+
+def negotiate() -> str:
+    """Pick the response format from the request's Accept header."""
+    if msgpack is None:
+        return 'json'
+    best = request.accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES, default=JSON_MIMETYPE)
+    return 'msgpack' if best in MSGPACK_MIMETYPES else 'json'
+
+
+def respond(payload: Any, status: int = 200) -> Response:
+    """Serialize payload in the negotiated format."""
+    fmt = negotiate()
+    if fmt == 'msgpack':
+        response = Response(dumps_msgpack(payload), status=status, mimetype=MSGPACK_MIMETYPES[0])
+    else:
+        response = current_app.json.response(payload)
+        response.status_code = status
+    response.vary.add('Accept')
+    return response
+
+
+class EncodedEntryCache:
+    """
+    Caches the encoded bytes of list entries that don't change once written,
+    like execution history items. Entries are keyed by their sequence number
+    in the list and re-encoded only when a different object sits at that
+    position (after a reset, a history clear or a restore); the cache keeps
+    the entry it encoded alive, so that identity check can't be fooled by a
+    recycled id. A dict entry that gained or lost keys (e.g. the timestamp
+    routes add after a run) is re-encoded too; other in-place edits are not
+    noticed.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+    def encode(self, seq: int, entry: Any, fmt: str) -> bytes:
+        key = (seq, fmt)
+        size = len(entry) if isinstance(entry, dict) else None
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] is entry and cached[1] == size:
+            self._cache.move_to_end(key)
+            return cached[2]
+        data = encode(entry, fmt)
+        self._cache[key] = (entry, size, data)
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return data
+
+    def clear(self):
+        self._cache.clear()
+
+
+def _chunked(parts: Iterable[bytes]) -> Iterable[bytes]:
+    buf, size = [], 0
+    for part in parts:
+        buf.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_SIZE:
+            yield b''.join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b''.join(buf)
+
+
+def stream_list(key: str, items: list, extra: Optional[Dict[str, Any]] = None,
+                cache: Optional[EncodedEntryCache] = None, first_seq: int = 0) -> Response:
+    """
+    Stream {key: [items...], **extra} item by item instead of building one string.
+    Items are encoded lazily (through `cache` when given, keyed by first_seq
+    plus their position) as the client reads.
+    """
+    fmt = negotiate()
+    extra = extra or {}
+    items = list(items)  # snapshot so concurrent appends don't change the count
+
+    def enc(i, item):
+        return cache.encode(first_seq + i, item, fmt) if cache is not None else encode(item, fmt)
+
+    if fmt == 'msgpack':
+        def generate():
+            packer = msgpack.Packer(use_bin_type=True)
+            yield packer.pack_map_header(1 + len(extra))
+            yield packer.pack(key)
+            yield packer.pack_array_header(len(items))
+            for i, item in enumerate(items):
+                yield enc(i, item)
+            for k, v in extra.items():
+                yield packer.pack(k)
+                yield dumps_msgpack(v)
+        mimetype = MSGPACK_MIMETYPES[0]
+    else:
+        def generate():
+            yield b'{' + dumps_json(key) + b':['
+            for i, item in enumerate(items):
+                yield (b',' if i else b'') + enc(i, item)
+            yield b']'
+            for k, v in extra.items():
+                yield b',' + dumps_json(k) + b':' + dumps_json(v)
+            yield b'}\n'
+        mimetype = JSON_MIMETYPE
+
+    response = Response(_chunked(generate()), mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+
+def _benchmark():
+    """Compare encoders on payloads shaped like /api/variables and /api/history."""
+    import base64
+    import os
+    import time
+
+    variables = {f'var_{i}': repr(list(range(i % 200))) for i in range(5000)}
+    figure = base64.b64encode(os.urandom(60000)).decode('ascii')
+    history = [{
+        'success': True,
+        'output': 'line of output\n' * 50,
+        'error': '',
+        'result': None,
+        'variables': {k: variables[k] for k in list(variables)[:200]},
+        'code': 'for i in range(10):\n    print(i)\n',
+        'figures': [{'mime': 'image/png', 'data': figure}] if i % 10 == 0 else [],
+        'timestamp': '2025-10-21T16:18:31.000000',
+    } for i in range(300)]
+    payloads = {'variables (5k names)': {'variables': variables},
+                'history (300 entries)': {'history': history}}
+
+    def timeit(fn, repeat=5):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, len(out)
+
+    encoders = [('stdlib json', lambda p: json.dumps(p).encode('utf-8'))]
+    if orjson is not None:
+        encoders.append(('orjson', lambda p: orjson.dumps(p, option=_ORJSON_OPTS)))
+    if msgpack is not None:
+        encoders.append(('msgpack', lambda p: msgpack.packb(p, use_bin_type=True)))
+
+    print(f"{'payload':24} {'encoder':12} {'time (ms)':>10} {'size (KB)':>10} {'speedup':>8}")
+    for label, payload in payloads.items():
+        baseline = None
+        for name, fn in encoders:
+            seconds, size = timeit(lambda: fn(payload))
+            baseline = baseline or seconds
+            print(f"{label:24} {name:12} {seconds * 1000:10.2f} {size / 1024:10.0f} {baseline / seconds:7.1f}x")
+
+        if label.startswith('history'):
+            # Re-fetching history: per-entry cache means only new entries are encoded
+            cache = EncodedEntryCache()
+            for i, entry in enumerate(history):
+                cache.encode(i, entry, 'json')
+            seconds, _ = timeit(lambda: b','.join(cache.encode(i, e, 'json') for i, e in enumerate(history)))
+            print(f"{label:24} {'cached':12} {seconds * 1000:10.2f} {'':>10} {baseline / seconds:7.1f}x")
+
+
+if __name__ == '__main__':
+    _benchmark()
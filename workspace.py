@@ -0,0 +1,238 @@
+"""
+Session Workspace
+A private directory per interpreter for uploaded and saved files, with a size
+quota. Uploads are streamed to disk in fixed-size chunks (the request body is
+never held in memory) and large binary/.npy files can be exposed to code as
+memory-mapped numpy arrays instead of being read into RAM.
+"""
+
+import os
+import re
+import secrets
+import shutil
+import tempfile
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+WORKSPACE_ROOT = os.environ.get(
+    'INTERPRETER_WORKSPACE_ROOT',
+    os.path.join(tempfile.gettempdir(), 'python-interpreter-workspaces'))
+QUOTA_BYTES = int(os.environ.get('INTERPRETER_WORKSPACE_QUOTA', 20 * 1024 ** 3))
+MAX_FILES = 1000
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Names starting with a dot are reserved for session internals (.journal, .output, ...)
+_SAFE_PART = re.compile(r'^[\w\- ][\w\-. ]*$')
+
+
+class WorkspaceError(ValueError):
+    """Raised for invalid workspace paths or operations."""
+
+
+class QuotaExceeded(WorkspaceError):
+    """Raised when a write would take the workspace over its quota."""
+
+
+class Workspace:
+    """
+    Files belonging to one interpreter session. The directory is created on
+    first use; `usage` is tracked incrementally so quota checks never walk the
+    tree while an upload is in progress. Session internals kept in hidden
+    directories (journal, hibernation, output spills, memo) are not listed
+    but count against the quota too.
+    """
+
+    def __init__(self, root: str = WORKSPACE_ROOT, session_id: Optional[str] = None,
+                 quota_bytes: int = QUOTA_BYTES):
+        self.session_id = session_id or secrets.token_hex(8)
+        self.path = os.path.join(root, self.session_id)
+        self.quota_bytes = quota_bytes
+        self._usage = None
+
+    # ----------------------------------------
+    # Paths and accounting
+    # ----------------------------------------
+
+    def ensure(self) -> str:
+        os.makedirs(self.path, exist_ok=True)
+        return self.path
+
+    def resolve(self, name: str) -> str:
+        """Absolute path of `name` inside the workspace; rejects escapes like '../x'."""
+        parts = [p for p in name.replace('\\', '/').split('/') if p not in ('', '.')]
+        if not parts or any(p == '..' or not _SAFE_PART.match(p) for p in parts):
+            raise WorkspaceError(f"Invalid workspace file name: '{name}'")
+        return os.path.join(self.path, *parts)
+
+    def exists(self, name: str) -> bool:
+        try:
+            return os.path.isfile(self.resolve(name))
+        except WorkspaceError:
+            return False
+
+    def usage(self) -> int:
+        """Bytes currently stored (computed once, then kept up to date)."""
+        if self._usage is None:
+            self._usage = sum(size for _, size in self._walk())
+        return self._usage
+
+    def internal_usage(self) -> int:
+        """Bytes in the hidden directories that hold session internals (walked on each call)."""
+        if not os.path.isdir(self.path):
+            return 0
+        total = 0
+        for entry in os.scandir(self.path):
+            if entry.is_dir(follow_symlinks=False) and entry.name.startswith('.'):
+                for dirpath, _, filenames in os.walk(entry.path):
+                    for fn in filenames:
+                        try:
+                            total += os.path.getsize(os.path.join(dirpath, fn))
+                        except OSError:
+                            # Rotated away meanwhile (e.g. an old output spill)
+                            pass
+        return total
+
+    def _walk(self) -> List[Tuple[str, int]]:
+        files = []
+        if not os.path.isdir(self.path):
+            return files
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            # Hidden directories hold session internals (see internal_usage)
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for fn in filenames:
+                if fn.startswith('.upload-'):
+                    continue
+                full = os.path.join(dirpath, fn)
+                files.append((os.path.relpath(full, self.path).replace(os.sep, '/'),
+                              os.path.getsize(full)))
+        return files
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        files = [{'name': name, 'size': size} for name, size in sorted(self._walk())]
+        self._usage = sum(f['size'] for f in files)
+        return files
+
+    def info(self) -> Dict[str, Any]:
+        files = self.list_files()
+        return {'files': files, 'usage': self._usage, 'internal_usage': self.internal_usage(),
+                'quota': self.quota_bytes}
+
+    def _check_quota(self, extra: int, replacing: int = 0, internal: Optional[int] = None):
+        if internal is None:
+            internal = self.internal_usage()
+        if self.usage() + internal - replacing + extra > self.quota_bytes:
+            raise QuotaExceeded(
+                f'Workspace quota exceeded ({self.quota_bytes:,} bytes; '
+                f'{self.usage():,} used by files, {internal:,} by session data)')
+
+    # ----------------------------------------
+    # Writing
+    # ----------------------------------------
+
+    def write_stream(self, name: str, stream: BinaryIO, length: Optional[int] = None,
+                     chunk_size: int = UPLOAD_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Copy `stream` into the workspace file `name` chunk by chunk.
+
+        Data goes to a temporary file that replaces the target only once the
+        stream is complete, so a failed or over-quota upload leaves nothing
+        behind. `length` (e.g. Content-Length) lets oversize uploads fail
+        before any byte is read.
+        """
+        target = self.resolve(name)
+        replacing = os.path.getsize(target) if os.path.isfile(target) else 0
+        if not replacing and len(self._walk()) >= MAX_FILES:
+            raise QuotaExceeded(f'Workspace file limit reached ({MAX_FILES} files)')
+        # Internals don't grow much during one upload: walk them once
+        internal = self.internal_usage()
+        if length is not None:
+            self._check_quota(length, replacing, internal)
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.upload-', dir=self.ensure())
+        written = 0
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    self._check_quota(written, replacing, internal)
+                    out.write(chunk)
+            os.replace(tmp, target)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self._usage = self.usage() - replacing + written
+        return {'name': name, 'size': written}
+
+    def write_text(self, name: str, text: str) -> str:
+        """Write a small text file (used by %save); returns its path."""
+        data = text.encode('utf-8')
+        target = self.resolve(name)
+        replacing = os.path.getsize(target) if os.path.isfile(target) else 0
+        self._check_quota(len(data), replacing)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        self._usage = self.usage() - replacing + len(data)
+        return target
+
+    def delete(self, name: str) -> bool:
+        target = self.resolve(name)
+        if not os.path.isfile(target):
+            return False
+        size = os.path.getsize(target)
+        os.unlink(target)
+        self._usage = self.usage() - size
+        return True
+
+    def destroy(self):
+        """Remove the whole workspace directory."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        self._usage = 0
+
+    # ----------------------------------------
+    # Memory mapping
+    # ----------------------------------------
+
+    def memmap(self, name: str, dtype: Optional[str] = None, shape: Optional[Tuple[int, ...]] = None,
+               offset: int = 0, mode: str = 'r'):
+        """
+        Memory-map a workspace file as a numpy array. `.npy` files carry their
+        own dtype/shape; other files are raw binary (dtype defaults to uint8 and
+        the shape to whatever fits). Pages are read from disk only on access.
+        """
+        if np is None:
+            raise WorkspaceError('%mmap requires numpy')
+        if mode not in ('r', 'r+', 'c'):
+            raise WorkspaceError("mode must be 'r', 'r+' or 'c'")
+        path = self.resolve(name)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(name)
+
+        if path.endswith('.npy') and dtype is None and shape is None and not offset:
+            return np.load(path, mmap_mode=mode, allow_pickle=False)
+
+        dt = np.dtype(dtype or 'uint8')
+        available = os.path.getsize(path) - offset
+        if available < 0:
+            raise WorkspaceError('offset is beyond the end of the file')
+        if shape is None:
+            shape = (available // dt.itemsize,)
+        elif -1 in shape:
+            known = 1
+            for s in shape:
+                if s != -1:
+                    known *= s
+            shape = tuple(available // dt.itemsize // known if s == -1 else s for s in shape)
+        return np.memmap(path, dtype=dt, mode=mode, offset=offset, shape=shape)